@@ -0,0 +1,97 @@
+# Copyright (c) 2018 Mycroft AI, Inc.
+#
+# This file is part of Mycroft Skills Manager
+# (see https://github.com/MatthewScholefield/mycroft-light).
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""
+    Memory and latency of MycroftSkillsManager.list() on a large catalog
+
+    Usage: python benchmarks/bench_list.py [num_skills]
+"""
+import sys
+import time
+import tracemalloc
+from os.path import abspath, dirname, join
+from shutil import rmtree
+from tempfile import mkdtemp
+
+# Run against the msm of this checkout
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+from msm import MycroftSkillsManager, SkillRepo
+
+
+class SyntheticRepo(SkillRepo):
+    """Skill repo serving a generated catalog without git"""
+    def __init__(self, path, num_skills):
+        super().__init__(path)
+        self.skill_data = [
+            ('skill-{}'.format(i), 'skill-{}'.format(i),
+             'https://github.com/author{}/skill-{}'.format(i % 97, i),
+             '{:040x}'.format(i))
+            for i in range(num_skills)
+        ]
+
+    def update(self):
+        pass
+
+    def get_sha(self):
+        return '0' * 40
+
+    def get_skill_data(self):
+        return iter(self.skill_data)
+
+    def get_default_skill_names(self):
+        yield 'default', [name for name, _, _, _ in self.skill_data[:30]]
+
+
+def main(num_skills=5000):
+    root = mkdtemp()
+    try:
+        msm = MycroftSkillsManager(
+            skills_dir=join(root, 'skills'),
+            repo=SyntheticRepo(join(root, 'repo'), num_skills),
+            catalog_ttl=0
+        )
+        msm.invalidate_catalog()
+        tracemalloc.start()
+        start = time.perf_counter()
+        names = [skill.name for skill in msm.list()]
+        build_time = time.perf_counter() - start
+        memory, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        start = time.perf_counter()
+        for i in range(10):
+            msm.list()
+        cached_time = (time.perf_counter() - start) / 10
+
+        print('Skills:            {}'.format(len(names)))
+        print('Build list():      {:.1f} ms'.format(build_time * 1000))
+        print('Cached list():     {:.2f} ms'.format(cached_time * 1000))
+        print('Catalog memory:    {:.0f} KiB (peak {:.0f} KiB)'.format(
+            memory / 1024, peak / 1024
+        ))
+        print('Per entry:         {:.0f} bytes'.format(memory / len(names)))
+    finally:
+        rmtree(root)
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,152 @@
+# Copyright (c) 2018 Mycroft AI, Inc.
+#
+# This file is part of Mycroft Skills Manager
+# (see https://github.com/MatthewScholefield/mycroft-light).
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""
+    Startup time and imports of msm commands
+
+    Runs each command in a new interpreter against a local catalog and
+    reports its wall time, the time spent importing modules and which
+    slow dependencies it imported.
+
+    Usage: python benchmarks/bench_startup.py [runs]
+"""
+import os
+import subprocess
+import sys
+import time
+from os import makedirs
+from os.path import abspath, dirname, join
+from shutil import rmtree
+from tempfile import mkdtemp
+
+# Dependencies worth avoiding when a command doesn't need them
+HEAVY_MODULES = ['git', 'fasteners', 'asyncio', 'multiprocessing.pool',
+                 'difflib', 'packaging.requirements', 'urllib.request',
+                 'tarfile']
+
+NUM_SKILLS = 20
+
+
+def git(path, *args):
+    subprocess.check_call(['git', '-C', path] + list(args),
+                          stdout=subprocess.DEVNULL)
+
+
+def create_catalog(root):
+    """Create skill repos and a catalog repo listing them"""
+    catalog = join(root, 'catalog')
+    makedirs(catalog)
+    git(catalog, 'init', '-q', '-b', 'bench')
+    modules = ''
+    for i in range(NUM_SKILLS):
+        name = 'skill-{}'.format(i)
+        path = join(root, 'src', name)
+        makedirs(path)
+        git(path, 'init', '-q')
+        with open(join(path, '__init__.py'), 'w'):
+            pass
+        git(path, 'add', '-A')
+        git(path, '-c', 'user.name=bench', '-c', 'user.email=bench@test',
+            'commit', '-q', '-m', 'init')
+        sha = subprocess.check_output(
+            ['git', '-C', path, 'rev-parse', 'HEAD']
+        ).decode().strip()
+        modules += '[submodule "{0}"]\n\tpath = {0}\n\turl = {1}\n'.format(
+            name, path
+        )
+        git(catalog, 'update-index', '--add', '--cacheinfo',
+            '160000,{},{}'.format(sha, name))
+    with open(join(catalog, '.gitmodules'), 'w') as f:
+        f.write(modules)
+    with open(join(catalog, 'DEFAULT-SKILLS'), 'w') as f:
+        f.write('skill-0\n')
+    git(catalog, 'add', '.gitmodules', 'DEFAULT-SKILLS')
+    git(catalog, '-c', 'user.name=bench', '-c', 'user.email=bench@test',
+        'commit', '-q', '-m', 'init')
+    return catalog
+
+
+def parse_importtime(stderr):
+    """Total import time in ms and names of the imported modules"""
+    total = 0
+    modules = set()
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        total += int(self_us)
+        modules.add(name.strip())
+    return total / 1000, modules
+
+
+def run(args, env, cwd, runs):
+    """Best wall time in ms, import time in ms and heavy modules"""
+    command = [sys.executable, '-X', 'importtime', '-m', 'msm'] + args
+    best = float('inf')
+    for i in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run(command, env=env, cwd=cwd,
+                                stdout=subprocess.DEVNULL,
+                                stderr=subprocess.PIPE,
+                                universal_newlines=True)
+        best = min(best, time.perf_counter() - start)
+        if result.returncode != 0:
+            raise RuntimeError('{} failed:\n{}'.format(
+                ' '.join(args), result.stderr[-2000:]
+            ))
+    import_ms, modules = parse_importtime(result.stderr)
+    return best * 1000, import_ms, [m for m in HEAVY_MODULES
+                                    if m in modules]
+
+
+def main(runs=5):
+    root = mkdtemp()
+    try:
+        env = dict(os.environ, HOME=join(root, 'home'),
+                   PYTHONPATH=dirname(dirname(abspath(__file__))))
+        options = ['--no-daemon', '-u', create_catalog(root), '-b', 'bench',
+                   '-d', join(root, 'skills'), '-c', join(root, 'cache')]
+        commands = [
+            ['--help'],
+            options + ['list'],
+            options + ['list'],
+            options + ['search', 'skill-1'],
+            options + ['info', 'skill-1'],
+            options + ['install', 'skill-1'],
+            options + ['update', 'skill-1'],
+            options + ['remove', 'skill-1'],
+        ]
+        print('{:<22} {:>9} {:>10}  {}'.format('Command', 'Wall ms',
+                                               'Import ms', 'Heavy imports'))
+        for args in commands:
+            # Each install is undone by the remove after it
+            wall, imports, heavy = run(args, env, root, 1 if 'install' in args
+                                       or 'remove' in args else runs)
+            print('{:<22} {:>9.1f} {:>10.1f}  {}'.format(
+                ' '.join(args[len(options):] if args[0] != '--help'
+                         else args), wall, imports, ', '.join(heavy) or '-'
+            ))
+    finally:
+        rmtree(root)
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
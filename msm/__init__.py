@@ -19,7 +19,33 @@
 # KIND, either express or implied.  See the License for the
 # specific language governing permissions and limitations
 # under the License.
+from importlib import import_module
+
+from . import exceptions
 from .exceptions import *
-from .mycroft_skills_manager import MycroftSkillsManager
-from .skill_entry import SkillEntry
-from .skill_repo import SkillRepo
+
+# Loaded on first access so importing msm doesn't import GitPython, asyncio
+# and everything else the managers need
+LAZY_ATTRIBUTES = {
+    'MycroftSkillsManager': '.mycroft_skills_manager',
+    'SkillEntry': '.skill_entry',
+    'SkillRepo': '.skill_repo',
+    'AsyncMycroftSkillsManager': '.async_skills_manager'
+}
+
+__all__ = [name for name in dir(exceptions) if not name.startswith('_')] + \
+    list(LAZY_ATTRIBUTES)
+
+
+def __getattr__(name):
+    if name not in LAZY_ATTRIBUTES:
+        raise AttributeError(
+            'module {!r} has no attribute {!r}'.format(__name__, name)
+        )
+    value = getattr(import_module(LAZY_ATTRIBUTES[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(LAZY_ATTRIBUTES))
@@ -21,34 +21,51 @@
 # under the License.
 
 import logging
+import os
 import sys
+from contextlib import ExitStack
 from logging import ERROR, INFO
+from os.path import expanduser, join
+from threading import Lock
 
+from typing import Dict
+
+from msm.artifacts import BUNDLE, FORMATS
+from msm.daemon import DEFAULT_SOCKET, send_command
 from msm.exceptions import MsmException
-from msm.mycroft_skills_manager import MycroftSkillsManager
-from msm.skill_repo import SkillRepo
+from msm.platforms import SKILL_GROUPS
 
 LOG = logging.getLogger(__name__)
 
+# Actions that only read skills and skills.json
+QUERY_ACTIONS = {'list', 'search', 'info'}
+
+# Options deciding which skills manager of the daemon runs a command
+MANAGER_OPTIONS = ('platform', 'skills_dir', 'repo_url', 'repo_branch',
+                   'repo_cache', 'versioned', 'wheelhouse', 'object_store',
+                   'artifacts')
+
+# Options holding paths, which can be relative to the client
+PATH_OPTIONS = ('skills_dir', 'repo_cache', 'wheelhouse', 'object_store',
+                'artifacts', 'constraints', 'output_dir')
+
 
 def get_error_code(error_cls):
     return 1 + (sum(map(ord, error_cls.__name__)) % 255)
 
 
 def skill_info(skill):
-    print('\n'.join([
+    return '\n'.join([
         'Name: ' + skill.name,
         'Author: ' + str(skill.author),
         'Url: ' + str(skill.url),
         'Path: ' + (str(skill.path) if skill.is_local else 'Not installed')
-    ]))
+    ])
 
 
-def main(args=None, printer=print):
-    logging.basicConfig(level=INFO, format='%(levelname)s - %(message)s')
-
+def create_parser():
     import argparse
-    platforms = list(MycroftSkillsManager.SKILL_GROUPS)
+    platforms = list(SKILL_GROUPS)
     parser = argparse.ArgumentParser()
     parser.add_argument('-p', '--platform', choices=platforms,
                         default='default')
@@ -58,6 +75,22 @@ def main(args=None, printer=print):
     parser.add_argument('-c', '--repo-cache')
     parser.add_argument('-l', '--latest', action='store_false',
                         dest='versioned', help="Disable skill versioning")
+    parser.add_argument('-w', '--wheelhouse',
+                        help='folder with wheels of skill requirements')
+    parser.add_argument('--force-deps', action='store_true',
+                        help='reinstall dependencies even if they seem to '
+                             'be installed')
+    parser.add_argument('--shallow', action='store_true',
+                        help='download skills without their git history')
+    parser.add_argument('-o', '--object-store',
+                        help='folder of git mirrors to clone skills from')
+    parser.add_argument('-a', '--artifacts',
+                        help='folder or url with skill bundles to install '
+                             'from')
+    parser.add_argument('-s', '--socket', default=DEFAULT_SOCKET,
+                        help='Unix socket of the msm daemon')
+    parser.add_argument('--no-daemon', action='store_true',
+                        help='run in this process even if a daemon runs')
     parser.add_argument('-r', '--raw', action='store_true')
     parser.set_defaults(raw=False, versioned=True)
     subparsers = parser.add_subparsers(dest='action')
@@ -85,17 +118,38 @@ def main(args=None, printer=print):
                                                action='store_true')
     add_search_args(subparsers.add_parser('update'), skill_is_optional=True)
     subparsers.add_parser('default')
-    args = parser.parse_args(args or sys.argv[1:])
+    wheelhouse_parser = subparsers.add_parser('wheelhouse')
+    wheelhouse_parser.add_argument('wheelhouse_action', choices=['build'])
+    add_constraint_args(wheelhouse_parser)
+    export_parser = subparsers.add_parser('export-bundles')
+    export_parser.add_argument('output_dir')
+    export_parser.add_argument('--format', choices=FORMATS, default=BUNDLE)
+    subparsers.add_parser('serve')
+    return parser
 
-    if args.raw:
-        LOG.level = ERROR
+
+def create_msm(args):
+    # Imported here so commands sent to the daemon don't load them
+    from msm.mycroft_skills_manager import MycroftSkillsManager
+    from msm.skill_repo import SkillRepo
 
     repo = SkillRepo(
         url=args.repo_url, branch=args.repo_branch, path=args.repo_cache
     )
-    msm = MycroftSkillsManager(
-        args.platform, args.skills_dir, repo, args.versioned
+    return MycroftSkillsManager(
+        args.platform, args.skills_dir, repo, args.versioned,
+        wheelhouse=args.wheelhouse, object_store=args.object_store,
+        artifacts=args.artifacts
     )
+
+
+def run_action(msm, args, printer=print):
+    """Run the action of the parsed arguments and return the exit code"""
+    if args.action not in QUERY_ACTIONS:
+        # Queries share the manager of the daemon with a running command,
+        # which is the only one allowed to change its options
+        msm.force_deps = args.force_deps
+        msm.shallow_clones = args.shallow
     main_functions = {
         'install': lambda: msm.install(args.skill, args.author,
                                        args.constraints, 'cli'),
@@ -110,13 +164,18 @@ def main(args=None, printer=print):
         'update': lambda: msm.update(args.skill, args.author),
         'default': msm.install_defaults,
         'search': lambda: '\n'.join(
-            skill.name
-            for skill in msm.list()
-            if skill.match(args.skill, args.author) >= 0.3
+            skill.name for skill in msm.search(args.skill, args.author)
         ),
-        'info': lambda: skill_info(msm.find_skill(args.skill, args.author))
+        'info': lambda: skill_info(msm.find_skill(args.skill, args.author)),
+        'wheelhouse': lambda: msm.build_wheelhouse(args.constraints),
+        'export-bundles': lambda: msm.export_bundles(args.output_dir,
+                                                     args.format)
     }
-    with msm.lock:
+    with ExitStack() as stack:
+        # Other actions lock the skills they change and skills.json only
+        # while saving it, so queries can run while they work
+        if args.action in QUERY_ACTIONS:
+            stack.enter_context(msm.lock.read_lock())
         try:
             result = main_functions[args.action]()
             if result is False:
@@ -129,5 +188,75 @@ def main(args=None, printer=print):
             printer('{}: {}'.format(exc_type, str(e)))
             return get_error_code(e.__class__)
 
+
+def make_paths_absolute(args, cwd):
+    """Resolve the paths of a client relative to its working directory"""
+    for option in PATH_OPTIONS:
+        value = getattr(args, option, None)
+        if value and '://' not in value:
+            setattr(args, option, join(cwd, expanduser(value)))
+
+
+def create_daemon(socket_path):
+    """
+    Daemon running commands with skills managers kept in memory
+
+    Commands changing skills run one at a time per manager, queries run
+    alongside them.
+    """
+    from msm.daemon import MsmDaemon
+    from msm.mycroft_skills_manager import MycroftSkillsManager
+
+    managers = {}  # type: Dict[tuple, MycroftSkillsManager]
+    locks = {}  # type: Dict[tuple, Lock]
+    managers_lock = Lock()
+
+    def run_command(argv, cwd, printer):
+        args = create_parser().parse_args(argv)
+        if args.action == 'serve':
+            printer('The msm daemon is already running')
+            return 1
+        make_paths_absolute(args, cwd or os.getcwd())
+        key = tuple(getattr(args, option) for option in MANAGER_OPTIONS)
+        with managers_lock:
+            if key not in managers:
+                managers[key] = create_msm(args)
+                locks[key] = Lock()
+        msm = managers[key]
+        if args.action in QUERY_ACTIONS:
+            return run_action(msm, args, printer)
+        with locks[key]:
+            # Pick up changes other processes made to skills.json
+            with msm.lock.read_lock():
+                msm.sync_skills_data()
+            return run_action(msm, args, printer)
+
+    return MsmDaemon(socket_path, run_command)
+
+
+def main(args=None, printer=print):
+    logging.basicConfig(level=INFO, format='%(levelname)s - %(message)s')
+
+    argv = args or sys.argv[1:]
+    args = create_parser().parse_args(argv)
+
+    if args.raw:
+        LOG.level = ERROR
+
+    if args.action == 'serve':
+        try:
+            create_daemon(args.socket).serve()
+            return 0
+        except MsmException as e:
+            printer('{}: {}'.format(e.__class__.__name__, str(e)))
+            return get_error_code(e.__class__)
+
+    if not args.no_daemon:
+        code = send_command(args.socket, argv, printer)
+        if code is not None:
+            return code
+    return run_action(create_msm(args), args, printer)
+
+
 if __name__ == "__main__":
     main()
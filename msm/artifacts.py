@@ -0,0 +1,227 @@
+# Copyright (c) 2018 Mycroft AI, Inc.
+#
+# This file is part of Mycroft Skills Manager
+# (see https://github.com/MatthewScholefield/mycroft-light).
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""
+    Skill artifacts for installing without cloning over the network
+
+    An artifact is a git bundle named <sha>.bundle or a tarball of a
+    clone named <sha>.tar.gz, where sha is the commit the catalog pins
+    the skill to. Artifacts are looked up in a folder or under an http
+    url and are created with "msm export-bundles".
+"""
+import logging
+import os
+import shutil
+from os.path import abspath, join
+from tempfile import NamedTemporaryFile, mkdtemp
+
+from msm.exceptions import ArtifactException, git_to_msm_exceptions
+from msm.git_reader import get_head_sha
+from msm.stage_limits import DEFAULT_LIMITS, GIT, NETWORK
+from msm.util import Git
+
+LOG = logging.getLogger(__name__)
+
+BUNDLE = 'bundle'
+TARBALL = 'tar.gz'
+FORMATS = (BUNDLE, TARBALL)
+
+
+def _check_members(tar, target):
+    """Refuse tarballs writing outside of the target folder"""
+    target = abspath(target)
+    for member in tar.getmembers():
+        path = abspath(join(target, member.name))
+        if path != target and not path.startswith(target + os.sep):
+            raise ArtifactException('Unsafe path in tarball: ' + member.name)
+        if member.issym() or member.islnk():
+            link = abspath(join(target, os.path.dirname(member.name),
+                                member.linkname))
+            if not link.startswith(target + os.sep):
+                raise ArtifactException(
+                    'Unsafe link in tarball: ' + member.name
+                )
+
+
+def read_artifact_file(artifact, fmt, sha, filename):
+    """Contents of a file at sha of an artifact or None if it's missing"""
+    if fmt == BUNDLE:
+        from git import GitError
+        tmp_dir = mkdtemp()
+        try:
+            git = Git(tmp_dir)
+            git.init(bare=True)
+            git.fetch(artifact, 'HEAD')
+            try:
+                return git.show('{}:{}'.format(sha, filename))
+            except GitError:
+                return None
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    import tarfile
+    with tarfile.open(artifact) as tar:
+        for name in ('./' + filename, filename):
+            try:
+                member = tar.getmember(name)
+            except KeyError:
+                continue
+            f = tar.extractfile(member)
+            return f.read().decode() if f else None
+    return None
+
+
+class ArtifactSource(object):
+    """
+    Folder or http url to look up artifacts in
+
+    Arguments:
+        location: folder path or http(s) url
+    """
+
+    def __init__(self, location):
+        self.location = location.rstrip('/')
+
+    @property
+    def is_remote(self):
+        return self.location.startswith(('http://', 'https://'))
+
+    def _download(self, name):
+        from urllib.error import HTTPError, URLError
+        from urllib.request import urlopen
+        url = self.location + '/' + name
+        try:
+            with urlopen(url, timeout=30) as response, \
+                    NamedTemporaryFile(delete=False) as f:
+                shutil.copyfileobj(response, f)
+                return f.name
+        except HTTPError as e:
+            if e.code != 404:
+                LOG.warning('Failed to download {}: {}'.format(url, e))
+        except URLError as e:
+            LOG.warning('Failed to download {}: {}'.format(url, e))
+        return None
+
+    def find(self, sha, stage_limits=None):
+        """
+        Local path of the artifact of a commit and its format
+
+        Returns:
+            (path, format), path being a temporary file for http sources,
+            or (None, None) if there is no artifact
+        """
+        for fmt in FORMATS:
+            name = '{}.{}'.format(sha, fmt)
+            if self.is_remote:
+                with (stage_limits or DEFAULT_LIMITS).stage(NETWORK):
+                    path = self._download(name)
+            else:
+                path = join(self.location, name)
+                path = path if os.path.isfile(path) else None
+            if path:
+                return path, fmt
+        return None, None
+
+    def install(self, sha, url, path, stage_limits=None):
+        """
+        Create the clone of a skill at path from its artifact
+
+        Returns:
+            False if there is no artifact for sha
+        """
+        artifact, fmt = self.find(sha, stage_limits)
+        if not artifact:
+            return False
+        LOG.info('Installing {} from {}'.format(url, artifact))
+        try:
+            with (stage_limits or DEFAULT_LIMITS).stage(GIT):
+                if fmt == BUNDLE:
+                    Git(os.path.dirname(path) or '.').clone(artifact, path)
+                else:
+                    import tarfile
+                    with tarfile.open(artifact) as tar:
+                        _check_members(tar, path)
+                        tar.extractall(path)
+                git = Git(path)
+                git.remote('set-url', 'origin', url)
+                git.reset(sha, hard=True)
+                if get_head_sha(path) != sha:
+                    raise ArtifactException('{} is not at {}'.format(
+                        artifact, sha
+                    ))
+        finally:
+            if self.is_remote:
+                os.remove(artifact)
+        return True
+
+
+def export_artifact(skill, output_dir, fmt=BUNDLE, stage_limits=None):
+    """
+    Write the artifact of the commit a skill is pinned to
+
+    Installed skills at that commit are exported from their folder,
+    other skills are cloned from their url.
+
+    Returns:
+        Path of the artifact
+    """
+    if fmt not in FORMATS:
+        raise ValueError('Unknown artifact format: ' + fmt)
+    if skill.is_beta:
+        raise ArtifactException(
+            '{} is not pinned to a commit'.format(skill.name)
+        )
+    stage_limits = stage_limits or DEFAULT_LIMITS
+    filename = join(output_dir, '{}.{}'.format(skill.sha, fmt))
+    tmp_dir = mkdtemp()
+    try:
+        with git_to_msm_exceptions():
+            tmp_file = _create_artifact(skill, tmp_dir, fmt, stage_limits)
+        os.makedirs(output_dir, exist_ok=True)
+        shutil.move(tmp_file, filename)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    LOG.info('Exported {} to {}'.format(skill.name, filename))
+    return filename
+
+
+def _create_artifact(skill, tmp_dir, fmt, stage_limits):
+    clone = join(tmp_dir, skill.name)
+    if skill.is_local and get_head_sha(skill.path) == skill.sha:
+        with stage_limits.stage(GIT):
+            Git(tmp_dir).clone(skill.path, clone)
+    else:
+        with stage_limits.stage(NETWORK):
+            Git(tmp_dir).clone(skill.url, clone)
+    git = Git(clone)
+    tmp_file = join(tmp_dir, 'artifact')
+    with stage_limits.stage(GIT):
+        git.reset(skill.sha, hard=True)
+        git.remote('set-url', 'origin', skill.url)
+        if fmt == BUNDLE:
+            branch = git.rev_parse('--abbrev-ref', 'HEAD').strip()
+            refs = ['HEAD'] + ([branch] if branch != 'HEAD' else [])
+            git.bundle('create', tmp_file, *refs)
+        else:
+            import tarfile
+            with tarfile.open(tmp_file, 'w:gz') as tar:
+                tar.add(clone, arcname='.')
+    return tmp_file
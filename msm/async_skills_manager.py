@@ -0,0 +1,530 @@
+# Copyright (c) 2018 Mycroft AI, Inc.
+#
+# This file is part of Mycroft Skills Manager
+# (see https://github.com/MatthewScholefield/mycroft-light).
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""
+asyncio interface to the skills manager
+
+Clone, fetch, merge, pip and requirements.sh run as asyncio subprocesses
+so many skills can be processed from one event loop without a thread per
+skill. Catalog lookups and loading the skills data still run in the
+default executor since they only touch the network when the catalog
+expires.
+"""
+import asyncio
+import logging
+import os
+import tarfile
+import time
+from contextlib import contextmanager
+from subprocess import PIPE
+from os.path import exists, join
+from shutil import rmtree
+from tempfile import mktemp
+
+from git import GitError
+from typing import Dict, List
+
+from msm.dependency_graph import DependencyGraph
+from msm.exceptions import (AlreadyInstalled, ArtifactException,
+                            CloneException, GitException, MsmException,
+                            NotInstalled, SkillModified,
+                            SkillRequirementsException)
+from msm.git_reader import is_shallow
+from msm.mycroft_skills_manager import MycroftSkillsManager
+from msm.skill_entry import (PIP_NO_INDEX, SHALLOW_DEPTH, SWITCHABLE_BRANCHES,
+                             SkillEntry)
+from msm.skills_data import (SkillsDataStore, build_skill_entry,
+                             get_skill_entry, mark_installed)
+from msm.stage_limits import GIT, NETWORK, PIP, SHELL
+from msm.util import Git, SkillLock
+
+LOG = logging.getLogger(__name__)
+
+# Seconds between attempts to take a skill lock, doubling up to the max
+LOCK_POLL_DELAY = 0.01
+LOCK_POLL_MAX_DELAY = 0.1
+
+
+async def run_process(*args, cwd=None, env=None, capture=True):
+    """
+    Run a command and return (returncode, stdout, stderr)
+
+    The process is killed if the calling task is cancelled.
+    """
+    pipe = PIPE if capture else None
+    proc = await asyncio.create_subprocess_exec(
+        *args, cwd=cwd, env=env, stdout=pipe, stderr=pipe
+    )
+    try:
+        stdout, stderr = await proc.communicate()
+    except asyncio.CancelledError:
+        if proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+        raise
+    return (proc.returncode, (stdout or b'').decode(),
+            (stderr or b'').decode())
+
+
+async def run_git(*args, cwd=None):
+    """Run git like msm.util.Git, raising GitException on failure"""
+    env = dict(os.environ, **Git.env)
+    code, stdout, stderr = await run_process('git', *args, cwd=cwd, env=env)
+    if code != 0:
+        raise GitException('Git command failed: git {} returned {}: {}'
+                           .format(' '.join(args), code, stderr.strip()))
+    return stdout.rstrip('\n')
+
+
+class AsyncMycroftSkillsManager(object):
+    """
+    Coroutine versions of the MycroftSkillsManager operations
+
+    Bulk operations run every skill as its own task, limited by the stage
+    limits of the wrapped manager. Use schedule() to get the tasks to
+    await or cancel them one by one.
+
+    Arguments:
+        msm: manager to wrap, created from kwargs if not given
+    """
+
+    def __init__(self, msm=None, **kwargs):
+        self.msm = msm or MycroftSkillsManager(**kwargs)
+        self._semaphores = None  # type: Dict[str, asyncio.Semaphore]
+        self._workers = None  # type: asyncio.Semaphore
+        self._dependency_graph = None  # type: DependencyGraph
+        self._installs = None  # type: Dict[str, asyncio.Future]
+
+    def _create_semaphores(self):
+        """Create the semaphores once a loop is running"""
+        limits = self.msm.stage_limits
+        self._semaphores = {
+            stage: asyncio.Semaphore(max(1, limit))
+            for stage, limit in limits.limits.items()
+        }
+        self._workers = asyncio.Semaphore(limits.workers)
+
+    def _stage(self, name):
+        if self._semaphores is None:
+            self._create_semaphores()
+        return self._semaphores[name]
+
+    @staticmethod
+    async def _run_sync(func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, func, *args)
+
+    async def _get_skills_data(self):  # type: () -> SkillsDataStore
+        """Skills data of the manager, loading it in the executor"""
+        return await self._run_sync(lambda: self.msm.skills_data)
+
+    async def list(self):  # type: () -> List[SkillEntry]
+        return await self._run_sync(self.msm.list)
+
+    async def list_defaults(self):  # type: () -> List[SkillEntry]
+        return await self._run_sync(self.msm.list_defaults)
+
+    async def find_skill(self, param, author=None):
+        # type: (str, str) -> SkillEntry
+        if isinstance(param, SkillEntry):
+            return param
+        return await self._run_sync(self.msm.find_skill, param, author)
+
+    async def install(self, param, author=None, constraints=None, origin=''):
+        """Install by url or name"""
+        try:
+            await self._install(param, author, constraints, origin)
+        finally:
+            await self._run_sync(self.msm.write_skills_data)
+
+    async def _install(self, param, author=None, constraints=None,
+                       origin=''):
+        skill = await self.find_skill(param, author)
+        if self._installs is None:
+            return await self._install_entry(skill, constraints, origin)
+        # Skills required by several others are installed once
+        if skill.name not in self._installs:
+            self._installs[skill.name] = asyncio.ensure_future(
+                self._install_entry(skill, constraints, origin)
+            )
+        await asyncio.shield(self._installs[skill.name])
+
+    async def _install_entry(self, skill, constraints=None, origin=''):
+        # Loaded after the install the skill would be found on disk and
+        # get an entry before this one
+        skills_data = await self._get_skills_data()
+        entry = build_skill_entry(skill.name, origin, skill.is_beta)
+        try:
+            await self._install_skill(skill, constraints, entry)
+            mark_installed(entry)
+        except AlreadyInstalled:
+            entry = None
+            raise
+        except MsmException as e:
+            entry['installation'] = 'failed'
+            entry['status'] = 'error'
+            entry['failure_message'] = repr(e)
+            raise
+        finally:
+            if entry:
+                skills_data.add_entry(entry)
+
+    async def _install_skill(self, skill, constraints, entry=None):
+        if skill.is_local:
+            raise AlreadyInstalled(skill.name)
+        await self._install_skill_deps(skill)
+        lock = await self._lock_skill(skill)
+        try:
+            await self._download_skill(skill, constraints, entry)
+        finally:
+            lock.release()
+
+    async def _lock_skill(self, skill):  # type: (SkillEntry) -> SkillLock
+        """
+        Wait until no other process or task works on the skill
+
+        The lock is polled from the loop so a cancelled wait can't take
+        it afterwards and waiting skills don't block executor threads.
+        """
+        lock = SkillLock(skill.name)
+        delay = LOCK_POLL_DELAY
+        while not lock.acquire(blocking=False):
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, LOCK_POLL_MAX_DELAY)
+        return lock
+
+    async def _download_skill(self, skill, constraints, entry=None):
+        # Another process could have installed it meanwhile
+        if exists(skill.path):
+            skill.is_local = True
+            raise AlreadyInstalled(skill.name)
+
+        LOG.info("Downloading skill: " + skill.url)
+        tmp_location = mktemp()
+        try:
+            await self._clone(skill, tmp_location)
+        except GitException as e:
+            raise CloneException(str(e)) from e
+        skill.is_local = True
+
+        with skill.moved_into_place(tmp_location):
+            await self._run_requirements_sh(skill, entry)
+            await self._run_pip(skill, constraints, entry)
+        LOG.info('Successfully installed ' + skill.name)
+
+    async def _clone(self, skill, tmp_location):
+        if skill.artifacts and not skill.is_beta:
+            try:
+                if await self._run_sync(
+                        skill.artifacts.install, skill.sha, skill.url,
+                        tmp_location, self.msm.stage_limits
+                ):
+                    return
+            except (GitError, OSError, tarfile.TarError,
+                    ArtifactException) as e:
+                LOG.warning('Installing {} from its artifact failed: '
+                            '{}'.format(skill.name, e))
+                rmtree(tmp_location, ignore_errors=True)
+
+        store = skill.object_store
+        if store:
+            # Mirrors are shared with other processes and use blocking locks
+            try:
+                await self._run_sync(store.clone, skill.url, skill.sha,
+                                     tmp_location, self.msm.stage_limits)
+                return
+            except GitError as e:
+                LOG.warning('Cloning {} from the object store failed: '
+                            '{}'.format(skill.name, e))
+                rmtree(tmp_location, ignore_errors=True)
+
+        if skill.shallow:
+            try:
+                await self._shallow_clone(skill, tmp_location)
+                return
+            except GitException as e:
+                LOG.warning('Shallow clone of {} failed, downloading full '
+                            'history: {}'.format(skill.name, e))
+                rmtree(tmp_location, ignore_errors=True)
+
+        async with self._stage(NETWORK):
+            await run_git('clone', skill.url, tmp_location)
+        async with self._stage(GIT):
+            await run_git('reset', '--hard', skill.sha or 'HEAD',
+                          cwd=tmp_location)
+
+    async def _shallow_clone(self, skill, tmp_location):
+        if skill.is_beta:
+            async with self._stage(NETWORK):
+                await run_git('clone', '--depth', str(SHALLOW_DEPTH),
+                              skill.url, tmp_location)
+            return
+
+        os.makedirs(tmp_location)
+        async with self._stage(GIT):
+            await run_git('init', cwd=tmp_location)
+            await run_git('remote', 'add', 'origin', skill.url,
+                          cwd=tmp_location)
+        async with self._stage(NETWORK):
+            await run_git('fetch', '--depth', '1', 'origin', skill.sha,
+                          cwd=tmp_location)
+        async with self._stage(GIT):
+            await run_git('checkout', skill.sha, cwd=tmp_location)
+
+    async def _fetch(self, skill):
+        store = skill.object_store
+        if store and store.has_mirror(skill.url):
+            await self._run_sync(store.fetch_into, skill.url, skill.sha,
+                                 skill.path, self.msm.stage_limits)
+            return
+        async with self._stage(NETWORK):
+            if is_shallow(skill.path) and not skill.is_beta:
+                try:
+                    await run_git('fetch', 'origin', skill.sha,
+                                  cwd=skill.path)
+                    return
+                except GitException:
+                    LOG.debug('Failed to fetch {} by sha'.format(skill.name))
+            await run_git('fetch', cwd=skill.path)
+
+    async def _merge(self, skill):
+        target = skill.sha or 'origin/HEAD'
+        try:
+            await run_git('merge', '--ff-only', target, cwd=skill.path)
+        except GitException:
+            if not is_shallow(skill.path):
+                raise
+            LOG.info('Fetching history of {} to update it'.format(skill.name))
+            async with self._stage(NETWORK):
+                await run_git('fetch', '--unshallow', cwd=skill.path)
+            await run_git('merge', '--ff-only', target, cwd=skill.path)
+
+    @contextmanager
+    def _dependency_scope(self):
+        """Share one dependency graph and its installs with nested calls"""
+        if self._installs is not None:
+            yield self._dependency_graph
+            return
+        self._dependency_graph = DependencyGraph(self.msm.find_skill)
+        self._installs = {}
+        try:
+            yield self._dependency_graph
+        finally:
+            self._dependency_graph = self._installs = None
+
+    async def _install_dependency(self, dep):
+        LOG.info("Installing skill dependency: {}".format(dep.name))
+        try:
+            await self._install(dep)
+        except AlreadyInstalled:
+            pass
+
+    async def _install_skill_deps(self, skill):
+        try:
+            with self._dependency_scope() as graph:
+                await self._run_sync(graph.add, skill)
+                for wave in graph.waves(skill.name)[:-1]:
+                    deps = [dep for dep in wave if not dep.is_local]
+                    results = await asyncio.gather(*(
+                        self._install_dependency(dep) for dep in deps
+                    ), return_exceptions=True)
+                    for dep, result in zip(deps, results):
+                        if isinstance(result, BaseException):
+                            raise SkillRequirementsException(
+                                'Failed to install {}: {}'.format(
+                                    dep.name, repr(result)
+                                )
+                            ) from result
+        except (asyncio.CancelledError, SkillRequirementsException):
+            raise
+        except Exception as e:
+            raise SkillRequirementsException(e) from e
+
+    async def _run_requirements_sh(self, skill, entry=None):
+        if not skill.requirements_sh_needed(entry):
+            return False
+        async with self._stage(SHELL):
+            rc, _, _ = await run_process(
+                'bash', join(skill.path, "requirements.sh"),
+                cwd=skill.path, capture=False
+            )
+        skill.check_requirements_sh_result(rc)
+        skill.record_requirements_sh(entry)
+        return True
+
+    async def _run_pip(self, skill, constraints=None, entry=None):
+        pip_args = skill.get_pip_args(constraints, entry)
+        if not pip_args:
+            return False
+        LOG.info('Installing requirements.txt for ' + skill.name)
+        async with self._stage(PIP):
+            result = await run_process(*pip_args)
+            if result[0] != 0 and PIP_NO_INDEX in pip_args:
+                LOG.warning('Installing from the wheelhouse failed, '
+                            'retrying with the package index')
+                result = await run_process(*[
+                    arg for arg in pip_args if arg != PIP_NO_INDEX
+                ])
+        skill.check_pip_result(pip_args, *result)
+        skill.record_requirements(constraints, entry)
+        return True
+
+    async def update(self, skill=None, author=None):
+        """Update all downloaded skills or one specified skill"""
+        if skill is None:
+            return await self.update_all()
+        try:
+            return await self._update(skill, author)
+        finally:
+            await self._run_sync(self.msm.write_skills_data)
+
+    async def _update(self, skill, author=None):
+        skill = await self.find_skill(skill, author)
+        entry = get_skill_entry(skill.name, await self._get_skills_data())
+        if entry:
+            entry['beta'] = skill.is_beta
+        updated = await self._update_skill(skill, entry)
+        if updated and entry:
+            entry['updated'] = time.time()
+        return updated
+
+    async def _update_skill(self, skill, entry=None):
+        if not skill.is_local:
+            raise NotInstalled('{} is not installed'.format(skill.name))
+        lock = await self._lock_skill(skill)
+        try:
+            return await self._pull_skill(skill, entry)
+        finally:
+            lock.release()
+
+    async def _pull_skill(self, skill, entry=None):
+        path = skill.path
+        async with self._stage(GIT):
+            sha_before = await run_git('rev-parse', 'HEAD', cwd=path)
+            modified_files = await run_git('status', '--porcelain',
+                                           '--untracked=no', cwd=path)
+        if modified_files != '':
+            raise SkillModified('Uncommitted changes:\n' + modified_files)
+
+        await self._fetch(skill)
+        async with self._stage(GIT):
+            current_branch = await run_git('rev-parse', '--abbrev-ref',
+                                           'HEAD', cwd=path)
+            if skill.sha and current_branch.strip() in SWITCHABLE_BRANCHES:
+                branch = skill.parse_sha_branch(
+                    await run_git('branch', '--contains', skill.sha, '--all',
+                                  cwd=path),
+                    await run_git('remote', cwd=path)
+                )
+                await run_git('checkout', branch, cwd=path)
+            await self._merge(skill)
+            sha_after = await run_git('rev-parse', 'HEAD', cwd=path)
+
+        if sha_before == sha_after:
+            LOG.info('Nothing new for ' + skill.name)
+            return False
+        await self._install_skill_deps(skill)
+        await self._run_requirements_sh(skill, entry)
+        await self._run_pip(skill, entry=entry)
+        skill.mark_updated()
+        return True
+
+    async def remove(self, param, author=None):
+        """Remove by url or name"""
+        return await self._run_sync(self.msm.remove, param, author)
+
+    def schedule(self, func, skills):
+        # type: (callable, List[SkillEntry]) -> Dict[str, asyncio.Future]
+        """
+        Start a task running the coroutine function func for each skill
+
+        At most stage_limits.workers skills are processed at once.
+        Returns {skill_name: task} to await or cancel each skill.
+        """
+        if self._workers is None:
+            self._create_semaphores()
+
+        async def run_item(skill):
+            async with self._workers:
+                return await func(skill)
+
+        return {
+            skill.name: asyncio.ensure_future(run_item(skill))
+            for skill in skills
+        }
+
+    async def apply(self, func, skills):
+        """
+        Run a coroutine function on all skills concurrently
+
+        Returns a list of success values like MycroftSkillsManager.apply.
+        Cancelling the call cancels all remaining skills.
+        """
+        skills = list(skills)
+        try:
+            with self._dependency_scope():
+                tasks = self.schedule(func, skills)
+                results = await asyncio.gather(*tasks.values(),
+                                               return_exceptions=True)
+        finally:
+            await self._run_sync(self.msm.write_skills_data)
+
+        successes = []
+        for skill, result in zip(skills, results):
+            if isinstance(result, asyncio.CancelledError):
+                LOG.warning('Cancelled {} on {}'.format(func.__name__,
+                                                        skill.name))
+                successes.append(False)
+            elif isinstance(result, MsmException):
+                LOG.error('Error running {} on {}: {}'.format(
+                    func.__name__, skill.name, repr(result)
+                ))
+                successes.append(False)
+            elif isinstance(result, BaseException):
+                LOG.error('Error running {} on {}:'.format(
+                    func.__name__, skill.name
+                ), exc_info=result)
+                successes.append(None)
+            else:
+                successes.append(True)
+        return successes
+
+    async def update_all(self):
+        local_skills = [skill for skill in await self.list()
+                        if skill.is_local]
+        plan = await self._run_sync(self.msm.plan_updates, local_skills)
+        await self._run_sync(self.msm.record_update_plan, plan)
+        results = dict(zip(
+            (skill.name for skill in plan.outdated),
+            await self.apply(self._update, plan.outdated)
+        ))
+        return [results.get(skill.name, True) for skill in local_skills]
+
+    async def install_defaults(self):
+        """Installs the default skills, updates all others"""
+        async def install_or_update_skill(skill):
+            if skill.is_local:
+                await self._update(skill)
+            else:
+                await self._install(skill, origin='default')
+
+        return await self.apply(install_or_update_skill,
+                                await self.list_defaults())
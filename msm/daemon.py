@@ -0,0 +1,165 @@
+# Copyright (c) 2018 Mycroft AI, Inc.
+#
+# This file is part of Mycroft Skills Manager
+# (see https://github.com/MatthewScholefield/mycroft-light).
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""
+Daemon running msm commands sent over a Unix socket
+
+The daemon keeps its skills managers, and with them the catalog, search
+index and skills data, in memory between commands. A client sends one
+JSON line {"args": [...], "cwd": "..."} and receives a JSON line
+{"output": text} for everything the command prints followed by
+{"code": exit_code}.
+"""
+import json
+import logging
+import os
+import signal
+import socket
+from os.path import dirname, exists, expanduser
+from socketserver import StreamRequestHandler, ThreadingUnixStreamServer
+from threading import Thread, current_thread, main_thread
+
+from msm.exceptions import MsmException
+
+LOG = logging.getLogger(__name__)
+
+DEFAULT_SOCKET = '~/.mycroft/msm.sock'
+
+
+def connect(socket_path):  # type: (str) -> socket.socket
+    """Socket connected to the daemon or None if none is running"""
+    socket_path = expanduser(socket_path)
+    if not exists(socket_path):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+
+def send_command(socket_path, args, printer=print, cwd=None):
+    """
+    Run a command line on the daemon and return its exit code
+
+    Returns None without running anything if no daemon is running.
+    """
+    sock = connect(socket_path)
+    if not sock:
+        return None
+    with sock, sock.makefile('rw', encoding='utf-8') as stream:
+        stream.write(json.dumps({
+            'args': list(args), 'cwd': cwd or os.getcwd()
+        }) + '\n')
+        stream.flush()
+        for line in stream:
+            message = json.loads(line)
+            if 'output' in message:
+                printer(message['output'])
+            if 'code' in message:
+                return message['code']
+    printer('Lost the connection to the msm daemon')
+    return 1
+
+
+class CommandHandler(StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:  # Checking whether the daemon runs
+            return
+        request = json.loads(line.decode())
+        try:
+            code = self.server.run_command(
+                request['args'], request.get('cwd'), self.send_output
+            )
+        except SystemExit as e:  # Raised by argparse
+            code = e.code if isinstance(e.code, int) else 1
+        except Exception as e:
+            LOG.exception('Failed to run {}'.format(request['args']))
+            self.send_output('{}: {}'.format(e.__class__.__name__, e))
+            code = 1
+        self.send({'code': code})
+
+    def send_output(self, text):
+        self.send({'output': text})
+
+    def send(self, message):
+        # Commands keep running if the client went away
+        try:
+            self.wfile.write((json.dumps(message) + '\n').encode())
+            self.wfile.flush()
+        except OSError:
+            pass
+
+
+class MsmDaemon(ThreadingUnixStreamServer):
+    """
+    Server running commands on a Unix socket only the user can access
+
+    Arguments:
+        socket_path: path of the socket to listen on
+        run_command: function (args, cwd, printer) -> exit code
+    """
+    daemon_threads = True
+
+    def __init__(self, socket_path, run_command):
+        self.socket_path = expanduser(socket_path)
+        self.run_command = run_command
+        self._remove_stale_socket()
+        os.makedirs(dirname(self.socket_path) or '.', exist_ok=True)
+        umask = os.umask(0o077)
+        try:
+            super().__init__(self.socket_path, CommandHandler)
+        finally:
+            os.umask(umask)
+
+    def _remove_stale_socket(self):
+        """Remove the socket of a daemon that didn't shut down cleanly"""
+        sock = connect(self.socket_path)
+        if sock:
+            sock.close()
+            raise MsmException('msm daemon already running on ' +
+                               self.socket_path)
+        if exists(self.socket_path):
+            os.remove(self.socket_path)
+
+    def server_close(self):
+        super().server_close()
+        if exists(self.socket_path):
+            os.remove(self.socket_path)
+
+    def serve(self):
+        """Serve until interrupted or terminated"""
+        def stop(*_):
+            # shutdown() waits for serve_forever() so it needs a thread
+            Thread(target=self.shutdown, daemon=True).start()
+
+        if current_thread() is main_thread():
+            signal.signal(signal.SIGTERM, stop)
+        LOG.info('Serving on ' + self.socket_path)
+        try:
+            self.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.server_close()
@@ -0,0 +1,179 @@
+# Copyright (c) 2018 Mycroft AI, Inc.
+#
+# This file is part of Mycroft Skills Manager
+# (see https://github.com/MatthewScholefield/mycroft-light).
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""
+Dependency graph of skills built from their skill_requirements.txt
+
+Bulk operations build the graph once, so every skill is read and
+installed at most once, and install the skills in waves: each wave only
+holds skills whose dependencies were installed by an earlier wave.
+"""
+from threading import Lock
+
+from typing import Callable, Dict, List
+
+from msm.exceptions import DependencyCycle
+from msm.skill_entry import SkillEntry
+
+
+class DependencyGraph(object):
+    """
+    Skills and the skills they require
+
+    Arguments:
+        find_skill: function returning the SkillEntry of a name or url
+            listed in skill_requirements.txt
+    """
+
+    def __init__(self, find_skill):
+        # type: (Callable[[str], SkillEntry]) -> None
+        self.find_skill = find_skill
+        self.skills = {}  # type: Dict[str, SkillEntry]
+        self.dependencies = {}  # type: Dict[str, List[str]]
+        self._lock = Lock()
+        self._install_locks = {}  # type: Dict[str, Lock]
+        self._results = {}  # type: Dict[str, Exception]
+
+    def add(self, skill):  # type: (SkillEntry) -> None
+        """
+        Add a skill and everything it requires
+
+        Requirements are read before taking the lock since reading those
+        of a skill that isn't installed can take a network request.
+
+        Raises:
+            DependencyCycle: if the skill ends up requiring itself
+        """
+        while True:
+            found = self._read_dependencies(skill)
+            with self._lock:
+                required = {dep.name for skill, deps in found.values()
+                            for dep in deps}
+                if required - set(found) - set(self.skills):
+                    # Skills of a failed add were removed meanwhile
+                    continue
+                added = [name for name in found if name not in self.skills]
+                for name in added:
+                    skill, deps = found[name]
+                    self.skills[name] = skill
+                    self.dependencies[name] = [dep.name for dep in deps]
+
+                cycle = self.find_cycle()
+                if cycle:
+                    for name in added:
+                        del self.skills[name], self.dependencies[name]
+                    raise DependencyCycle(cycle)
+                return
+
+    def _read_dependencies(self, skill):
+        """{name: (skill, dependencies)} of skills not in the graph yet"""
+        pending, found = [skill], {}
+        while pending:
+            skill = pending.pop()
+            with self._lock:
+                known = skill.name in self.skills
+            if known or skill.name in found:
+                continue
+            deps = [self.find_skill(name)
+                    for name in skill.get_dependent_skills()]
+            found[skill.name] = (skill, deps)
+            pending.extend(deps)
+        return found
+
+    def find_cycle(self):  # type: () -> List[str]
+        """Names of a cycle like [a, b, a] or [] if there is none"""
+        done = set()
+        for root in self.dependencies:
+            if root in done:
+                continue
+            path = [root]
+            stack = [iter(self.dependencies[root])]
+            while stack:
+                dep = next(stack[-1], None)
+                if dep is None:
+                    done.add(path.pop())
+                    stack.pop()
+                elif dep in path:
+                    return path[path.index(dep):] + [dep]
+                elif dep not in done:
+                    path.append(dep)
+                    stack.append(iter(self.dependencies[dep]))
+        return []
+
+    def required_by(self, name):  # type: (str) -> List[str]
+        """Names of the skill and all skills it requires"""
+        names, pending = set(), [name]
+        while pending:
+            name = pending.pop()
+            if name not in names:
+                names.add(name)
+                pending.extend(self.dependencies[name])
+        return sorted(names)
+
+    def waves(self, name=None):  # type: (str) -> List[List[SkillEntry]]
+        """
+        Skills in the order they have to be installed
+
+        Skills of one wave don't depend on each other so they can be
+        installed in parallel. Only the skill and its dependencies are
+        included when a name is given.
+        """
+        names = self.required_by(name) if name else sorted(self.dependencies)
+        depths = {}
+        for root in names:
+            pending = [root]
+            while pending:
+                current = pending[-1]
+                missing = [dep for dep in self.dependencies[current]
+                           if dep not in depths]
+                if missing:
+                    pending.extend(missing)
+                    continue
+                pending.pop()
+                depths[current] = 1 + max(
+                    (depths[dep] for dep in self.dependencies[current]),
+                    default=-1
+                )
+
+        waves = [[] for _ in range(1 + max(depths.values(), default=-1))]
+        for root in names:
+            waves[depths[root]].append(self.skills[root])
+        return waves
+
+    def install_once(self, skill, install):
+        # type: (SkillEntry, Callable[[SkillEntry], None]) -> None
+        """
+        Run install on the skill unless it already ran in this graph
+
+        Concurrent callers wait for the first one and get its result.
+        """
+        with self._lock:
+            lock = self._install_locks.setdefault(skill.name, Lock())
+        with lock:
+            if skill.name not in self._results:
+                try:
+                    install(skill)
+                    self._results[skill.name] = None
+                except Exception as e:
+                    self._results[skill.name] = e
+            error = self._results[skill.name]
+        if error:
+            raise error
@@ -21,8 +21,6 @@
 # under the License.
 from contextlib import contextmanager
 
-from git import GitError
-
 
 class MsmException(Exception):
     def __repr__(self):
@@ -64,6 +62,15 @@ class SkillRequirementsException(InstallException):
     pass
 
 
+class DependencyCycle(SkillRequirementsException):
+    """Raised when skills require each other through skill_requirements"""
+    def __init__(self, cycle):
+        self.cycle = cycle
+
+    def __str__(self):
+        return ' -> '.join(self.cycle)
+
+
 class CloneException(InstallException):
     pass
 
@@ -90,6 +97,11 @@ class PipRequirementsException(InstallException):
         )
 
 
+class ArtifactException(InstallException):
+    """Raised when a skill artifact can't be created or used"""
+    pass
+
+
 class MultipleSkillMatches(MsmException):
     def __init__(self, skills):
         self.skills = skills
@@ -100,6 +112,7 @@ class MultipleSkillMatches(MsmException):
 
 @contextmanager
 def git_to_msm_exceptions():
+    from git import GitError  # Only loaded once git is used
     try:
         yield
     except GitError as e:
@@ -0,0 +1,236 @@
+# Copyright (c) 2018 Mycroft AI, Inc.
+#
+# This file is part of Mycroft Skills Manager
+# (see https://github.com/MatthewScholefield/mycroft-light).
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""
+    Reads git metadata directly from the .git folder
+
+    Functions return None when the layout is not understood so callers
+    can fall back to running git.
+"""
+import re
+from os.path import join, isdir, isfile, dirname, abspath
+
+MAX_SYMREF_DEPTH = 5
+SHA_PATTERN = re.compile('^[0-9a-f]{40}$')
+
+
+def find_git_dir(path):
+    """Locate the git folder of a working tree, following gitdir files"""
+    git_path = join(path, '.git')
+    if isdir(git_path):
+        return git_path
+    if isfile(git_path):
+        try:
+            with open(git_path) as f:
+                line = f.readline().strip()
+        except OSError:
+            return None
+        if line.startswith('gitdir:'):
+            git_dir = line[len('gitdir:'):].strip()
+            git_dir = join(dirname(abspath(git_path)), git_dir)
+            if isdir(git_dir):
+                return git_dir
+    return None
+
+
+def find_common_dir(git_dir):
+    """Folder holding the shared refs of a linked worktree"""
+    common_dir = _read_ref_file(git_dir, 'commondir')
+    if common_dir:
+        return join(git_dir, common_dir)
+    return git_dir
+
+
+def read_packed_refs(git_dir):
+    """Returns {ref_name: sha} from the packed-refs file"""
+    refs = {}
+    try:
+        with open(join(git_dir, 'packed-refs')) as f:
+            for line in f:
+                if line.startswith(('#', '^')):
+                    continue
+                parts = line.split()
+                if len(parts) == 2:
+                    refs[parts[1]] = parts[0]
+    except OSError:
+        pass
+    return refs
+
+
+def _read_ref_file(git_dir, ref):
+    try:
+        with open(join(git_dir, ref)) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _resolve_full_ref(git_dir, ref, packed_refs, depth=0):
+    if depth > MAX_SYMREF_DEPTH:
+        return None
+    ref_dir = git_dir if ref == 'HEAD' else find_common_dir(git_dir)
+    value = _read_ref_file(ref_dir, ref)
+    if value is None:
+        return packed_refs.get(ref)
+    if value.startswith('ref:'):
+        return _resolve_full_ref(git_dir, value[len('ref:'):].strip(),
+                                 packed_refs, depth + 1)
+    if SHA_PATTERN.match(value):
+        return value
+    return None
+
+
+def resolve_ref(path, ref):
+    """
+    Resolve a ref like 'HEAD' or 'origin/master' to a sha
+
+    Uses the same search order as git rev-parse for short names
+    """
+    git_dir = find_git_dir(path)
+    if not git_dir:
+        return None
+    if ref == 'HEAD' or ref.startswith('refs/'):
+        candidates = [ref]
+    else:
+        candidates = [ref, 'refs/' + ref, 'refs/tags/' + ref,
+                      'refs/heads/' + ref, 'refs/remotes/' + ref,
+                      'refs/remotes/' + ref + '/HEAD']
+    packed_refs = read_packed_refs(find_common_dir(git_dir))
+    for candidate in candidates:
+        sha = _resolve_full_ref(git_dir, candidate, packed_refs)
+        if sha:
+            return sha
+    return None
+
+
+def get_head_ref(path):
+    """Ref checked out at path like 'refs/heads/master', None if detached"""
+    git_dir = find_git_dir(path)
+    head = _read_ref_file(git_dir, 'HEAD') if git_dir else None
+    if head and head.startswith('ref:'):
+        return head[len('ref:'):].strip()
+    return None
+
+
+SECTION_PATTERN = re.compile(
+    r'^\[\s*([A-Za-z0-9.-]+)(?:\s+"((?:[^"\\]|\\.)*)")?\s*\]\s*(.*)$'
+)
+KEY_PATTERN = re.compile(r'^([A-Za-z][A-Za-z0-9-]*)\s*(?:=\s*(.*))?$')
+
+
+def _parse_config_value(value):
+    """Strip quotes and trailing comments from a config value"""
+    result = ''
+    in_quotes = False
+    i = 0
+    while i < len(value):
+        char = value[i]
+        if char == '\\' and i + 1 < len(value):
+            i += 1
+            result += {'n': '\n', 't': '\t', 'b': '\b'}.get(
+                value[i], value[i]
+            )
+        elif char == '"':
+            in_quotes = not in_quotes
+        elif char in '#;' and not in_quotes:
+            break
+        else:
+            result += char
+        i += 1
+    if in_quotes:
+        raise ValueError('Unterminated quote')
+    return result.strip()
+
+
+def read_config(git_dir):
+    """
+    Parse the config file of a git folder
+
+    Returns:
+        {(section, subsection): {key: value}} with section and key names
+        lower cased, or None if the file uses includes or syntax this
+        reader doesn't handle
+    """
+    try:
+        with open(join(git_dir, 'config')) as f:
+            lines = f.read().split('\n')
+    except (OSError, UnicodeDecodeError):
+        return None
+    config = {}
+    section = None
+    for line in lines:
+        line = line.strip()
+        if not line or line[0] in '#;':
+            continue
+        if line.endswith('\\'):
+            return None
+        if line.startswith('['):
+            match = SECTION_PATTERN.match(line)
+            if not match:
+                return None
+            name, subsection, rest = match.groups()
+            name = name.lower()
+            if '.' in name or name in ('include', 'includeif'):
+                return None
+            section = config.setdefault((name, subsection), {})
+            line = rest.strip()
+            if not line or line[0] in '#;':
+                continue
+        if section is None:
+            return None
+        match = KEY_PATTERN.match(line)
+        if not match:
+            return None
+        key, value = match.groups()
+        try:
+            section[key.lower()] = 'true' if value is None \
+                else _parse_config_value(value)
+        except ValueError:
+            return None
+    return config
+
+
+def get_remote_url(path, remote='origin'):
+    """
+    Url of a remote of the repo at path
+
+    Returns:
+        the url, '' if the remote has no url or None if it couldn't be
+        read without running git
+    """
+    git_dir = find_git_dir(path)
+    if not git_dir:
+        return None
+    config = read_config(find_common_dir(git_dir))
+    if config is None:
+        return None
+    return config.get(('remote', remote), {}).get('url', '')
+
+
+def get_head_sha(path):
+    """Sha of the commit checked out at path"""
+    return resolve_ref(path, 'HEAD')
+
+
+def is_shallow(path):
+    """Whether the repo at path was cloned without its full history"""
+    git_dir = find_git_dir(path)
+    return bool(git_dir) and isfile(join(find_common_dir(git_dir), 'shallow'))
@@ -20,30 +20,49 @@
 # specific language governing permissions and limitations
 # under the License.
 import logging
-from glob import glob
+from collections import namedtuple
+from contextlib import contextmanager
 from itertools import chain
-from multiprocessing.pool import ThreadPool
-from os.path import expanduser, join, dirname, isdir
+from os.path import expanduser, isdir
 from functools import wraps
 import time
+from threading import Lock
 
 from typing import Dict, List
 
 from msm import GitException
+from msm.artifacts import ArtifactSource, BUNDLE, export_artifact
+from msm.dependency_graph import DependencyGraph
 from msm.exceptions import (MsmException, SkillNotFound, MultipleSkillMatches,
-                            AlreadyInstalled)
+                            AlreadyInstalled, SkillRequirementsException)
+from msm.object_store import ObjectStore
+from msm.git_reader import get_head_sha
+from msm.pip_batch import PipBatch
+from msm.platforms import SKILL_GROUPS
+from msm.scan_cache import ScanCache
+from msm.search_index import MIN_MATCH_SCORE
+from msm.skill_catalog import SkillCatalog, get_dir_state
 from msm.skill_entry import SkillEntry
 from msm.skill_repo import SkillRepo
+from msm.stage_limits import StageLimits
 from msm.skills_data import (build_skill_entry, get_skill_entry,
                              write_skills_data, load_skills_data,
-                             skills_data_hash)
+                             mark_installed, merge_skills_data,
+                             SkillsDataStore)
 
 from msm.util import MsmProcessLock
+from msm.wheelhouse import Wheelhouse
 
 LOG = logging.getLogger(__name__)
 
 CURRENT_SKILLS_DATA_VERSION = 1
 
+# Skills scoring this fraction of the best match are ambiguous with it
+CLOSE_MATCH_RATIO = 0.7
+
+# Local skills split by whether they need to be fetched to update them
+UpdatePlan = namedtuple('UpdatePlan', 'outdated current')
+
 
 def save_skills_data(func):
     @wraps(func)
@@ -67,31 +86,92 @@ def save_skills_data(func):
 
 
 class MycroftSkillsManager(object):
-    SKILL_GROUPS = {'default', 'mycroft_mark_1', 'picroft', 'kde'}
+    SKILL_GROUPS = SKILL_GROUPS
     DEFAULT_SKILLS_DIR = "/opt/mycroft/skills"
+    # Seconds a catalog snapshot is used before the repo is checked again
+    DEFAULT_CATALOG_TTL = 60
+    # Write skills.json without indentation
+    compact_skills_data = False
+    # Run requirements.sh and pip even if they seem to be installed
+    force_deps = False
+    # Download skills without their full git history
+    shallow_clones = False
 
     def __init__(self, platform='default', skills_dir=None, repo=None,
-                 versioned=True):
+                 versioned=True, catalog_ttl=DEFAULT_CATALOG_TTL,
+                 stage_limits=None, wheelhouse=None, object_store=None,
+                 artifacts=None, scan_cache=None):
         self.platform = platform
         self.skills_dir = expanduser(skills_dir or '') \
                           or self.DEFAULT_SKILLS_DIR
         self.repo = repo or SkillRepo()
         self.versioned = versioned
-        self.lock = MsmProcessLock()
-
-        self.skills_data = None
+        self.catalog_ttl = catalog_ttl
+        self.stage_limits = stage_limits or StageLimits()
+        self.wheelhouse = Wheelhouse(wheelhouse)
+        # Skills are cloned from local mirrors if this is set
+        self.object_store = ObjectStore(object_store) \
+            if object_store else None  # type: ObjectStore
+        # Folder or url with skill bundles to install from
+        self.artifacts = ArtifactSource(artifacts) \
+            if artifacts else None  # type: ArtifactSource
+        # File remembering the git urls of unchanged skill folders
+        self.scan_cache = ScanCache(scan_cache)
+        self._lock = None  # type: MsmProcessLock
+
+        self._catalog = None  # type: SkillCatalog
+        # Collects pip installs while apply() runs
+        self.pip_batch = None  # type: PipBatch
+        self.dependency_graph = None  # type: DependencyGraph
+
+        # Loaded on first use, see skills_data
+        self._skills_data = None  # type: SkillsDataStore
+        self._skills_data_lock = Lock()
         self.saving_handled = False
-        with self.lock:
-            self.sync_skills_data()
+
+    @property
+    def lock(self):  # type: () -> MsmProcessLock
+        """Lock shared by all msm processes, see MsmProcessLock"""
+        if self._lock is None:
+            self._lock = MsmProcessLock()
+        return self._lock
+
+    @property
+    def skills_data(self):  # type: () -> SkillsDataStore
+        """
+        Data of the installed skills, loaded when first used
+
+        Loading it lists the skills to curate the data, which builds the
+        catalog and can update the skills repo.
+        """
+        if self._skills_data is None:
+            with self._skills_data_lock:
+                if self._skills_data is None:
+                    with self.lock.read_lock():
+                        self.sync_skills_data()
+        return self._skills_data
+
+    @skills_data.setter
+    def skills_data(self, skills_data):
+        self._skills_data = skills_data
+
+    def warm(self):
+        """
+        Build the catalog and load the skills data now instead of on
+        first use, returning the manager
+        """
+        self.catalog
+        self.skills_data
+        return self
 
     def __upgrade_skills_data(self, skills_data):
-        new = {}
+        new = SkillsDataStore()
         if skills_data.get('version', 0) == 0:
             new['blacklist'] = []
             new['version'] = 1
             new['skills'] = []
             local_skills = [s for s in self.list() if s.is_local]
-            default_skills = [s.name for s in self.list_defaults()]
+            default_skills = {s.name for s in self.list_defaults()}
             for skill in local_skills:
                 if 'origin' in skills_data.get(skill.name, {}):
                     origin = skills_data[skill.name]['origin']
@@ -111,16 +191,18 @@ class MycroftSkillsManager(object):
                 entry['update'] = \
                     skills_data.get(skill.name, {}).get('updated') or 0
 
-                new['skills'].append(entry)
+                new.add_entry(entry)
             new['upgraded'] = True
         return new
 
     def curate_skills_data(self, skills_data):
         """ Sync skills_data with actual skills on disk. """
+        if not isinstance(skills_data, SkillsDataStore):
+            skills_data = SkillsDataStore(skills_data)
         local_skills = [s for s in self.list() if s.is_local]
-        default_skills = [s.name for s in self.list_defaults()]
-        local_skill_names = [s.name for s in local_skills]
-        skills_data_skills = [s['name'] for s in skills_data['skills']]
+        default_skills = {s.name for s in self.list_defaults()}
+        local_skill_names = {s.name for s in local_skills}
+        skills_data_skills = skills_data.names()
 
         # Check for skills that aren't in the list
         for skill in local_skills:
@@ -132,16 +214,16 @@ class MycroftSkillsManager(object):
                 else:
                     origin = 'non-msm'
                 entry = build_skill_entry(skill.name, origin, False)
-                skills_data['skills'].append(entry)
+                skills_data.add_entry(entry)
 
         # Check for skills in the list that doesn't exist in the filesystem
-        remove_list = []
-        for s in skills_data.get('skills', []):
-            if (s['name'] not in local_skill_names and
-                    s['installation'] == 'installed'):
-                remove_list.append(s)
-        for skill in remove_list:
-            skills_data['skills'].remove(skill)
+        skills = [
+            s for s in skills_data.get('skills', [])
+            if s['name'] in local_skill_names or
+            s['installation'] != 'installed'
+        ]
+        if len(skills) != len(skills_data.get('skills', [])):
+            skills_data['skills'] = skills
         return skills_data
 
     def load_skills_data(self) -> dict:
@@ -156,16 +238,27 @@ class MycroftSkillsManager(object):
         """ Update internal skill_data_structure from disk. """
         self.skills_data = self.load_skills_data()
         if 'upgraded' in self.skills_data:
+            # Leave the upgraded data dirty so it gets written
             self.skills_data.pop('upgraded')
-            self.skills_data_hash = ''
         else:
-            self.skills_data_hash = skills_data_hash(self.skills_data)
+            self.skills_data.mark_clean()
 
     def write_skills_data(self, data=None):
-        """ Write skills data hash if it has been modified. """
-        data = data or self.skills_data
-        if skills_data_hash(data) != self.skills_data_hash:
-            write_skills_data(data)
+        """
+        Write skills data if it has been modified
+
+        The changes are merged into the data on disk under the exclusive
+        lock, keeping the changes other processes saved meanwhile.
+        """
+        data = self._skills_data if data is None else data
+        if data is None:
+            return  # Never loaded so nothing changed
+        if not isinstance(data, SkillsDataStore) or data.dirty:
+            with self.lock.write_lock():
+                merged = merge_skills_data(load_skills_data(), data)
+                write_skills_data(merged, self.compact_skills_data)
+            if isinstance(data, SkillsDataStore):
+                data.mark_clean()
 
     @save_skills_data
     def install(self, param, author=None, constraints=None, origin=''):
@@ -174,12 +267,28 @@ class MycroftSkillsManager(object):
             skill = param
         else:
             skill = self.find_skill(param, author)
+        if self.dependency_graph is not None:
+            # Skills required by several others are installed once
+            self.dependency_graph.install_once(
+                skill, lambda s: self._install_skill(s, constraints, origin)
+            )
+        else:
+            self._install_skill(skill, constraints, origin)
+
+    def _install_skill(self, skill, constraints=None, origin=''):
+        # Loaded after the install the skill would be found on disk and
+        # get an entry before this one
+        skills_data = self.skills_data
         entry = build_skill_entry(skill.name, origin, skill.is_beta)
         try:
-            skill.install(constraints)
-            entry['installed'] = time.time()
-            entry['installation'] = 'installed'
-            entry['status'] = 'active'
+            skill.install(constraints, entry)
+            if skill.requirements_queued:
+                # Marked installed once the batch installed requirements
+                entry['installation'] = 'installing'
+                entry['status'] = 'inactive'
+                self.pip_batch.installs[skill.path] = entry
+            else:
+                mark_installed(entry)
         except AlreadyInstalled:
             entry = None
             raise
@@ -191,7 +300,60 @@ class MycroftSkillsManager(object):
         finally:
             # Store the entry in the list
             if entry:
-                self.skills_data['skills'].append(entry)
+                skills_data.add_entry(entry)
+
+    @contextmanager
+    def dependency_scope(self):
+        """
+        Share one dependency graph with everything run inside
+
+        Nested scopes, like installs run by apply(), use the graph of
+        the outermost one.
+        """
+        if self.dependency_graph is not None:
+            yield self.dependency_graph
+            return
+        self.dependency_graph = DependencyGraph(self.find_skill)
+        try:
+            yield self.dependency_graph
+        finally:
+            self.dependency_graph = None
+
+    def install_dependencies(self, skill):  # type: (SkillEntry) -> None
+        """
+        Install the skills required by skill_requirements.txt
+
+        The whole dependency graph is resolved before installing
+        anything. Dependencies are installed in parallel waves, each
+        wave only needing skills of earlier waves.
+        """
+        from multiprocessing.pool import ThreadPool
+
+        def install_dependency(dep):
+            LOG.info("Installing skill dependency: {}".format(dep.name))
+            try:
+                self.install(dep)
+            except AlreadyInstalled:
+                pass
+            except MsmException as e:
+                return e
+
+        with self.dependency_scope() as graph:
+            graph.add(skill)
+            for wave in graph.waves(skill.name)[:-1]:
+                wave = [dep for dep in wave if not dep.is_local]
+                if not wave:
+                    continue
+                workers = min(len(wave), self.stage_limits.workers)
+                with ThreadPool(workers) as tp:
+                    errors = tp.map(install_dependency, wave)
+                for dep, error in zip(wave, errors):
+                    if error:
+                        raise SkillRequirementsException(
+                            'Failed to install {}: {}'.format(
+                                dep.name, repr(error)
+                            )
+                        ) from error
 
     @save_skills_data
     def remove(self, param, author=None):
@@ -201,23 +363,57 @@ class MycroftSkillsManager(object):
         else:
             skill = self.find_skill(param, author)
         skill.remove()
-        skills = [s for s in self.skills_data['skills']
-                  if s['name'] != skill.name]
-        self.skills_data['skills'] = skills
+        self.skills_data.remove_entry(skill.name)
         return
 
+    def plan_updates(self, skills=None):
+        # type: (List[SkillEntry]) -> UpdatePlan
+        """
+        Find the local skills that are behind their catalog commit
+
+        Skills pinned to a sha are compared with their checked out commit
+        without using the network. Beta skills are always outdated since
+        only fetching tells whether they changed.
+        """
+        skills = [s for s in (skills or self.list()) if s.is_local]
+        outdated, current = [], []
+        for skill in skills:
+            if not skill.is_beta and get_head_sha(skill.path) == skill.sha:
+                current.append(skill)
+            else:
+                outdated.append(skill)
+        return UpdatePlan(outdated, current)
+
+    def record_update_plan(self, plan):  # type: (UpdatePlan) -> None
+        """Report the fetches avoided and update entries of current skills"""
+        LOG.info('{} of {} skills may need updating, skipped fetching {} '
+                 'skills at their catalog commit'.format(
+                     len(plan.outdated), len(plan.outdated + plan.current),
+                     len(plan.current)
+                 ))
+        for skill in plan.current:
+            entry = get_skill_entry(skill.name, self.skills_data)
+            if entry:
+                entry['beta'] = skill.is_beta
+
     def update_all(self):
         local_skills = [skill for skill in self.list() if skill.is_local]
+        plan = self.plan_updates(local_skills)
+        self.record_update_plan(plan)
 
         def update_skill(skill):
             entry = get_skill_entry(skill.name, self.skills_data)
             if entry:
                 entry['beta'] = skill.is_beta
-            if skill.update():
+            if skill.update(entry):
                 if entry:
                     entry['updated'] = time.time()
 
-        return self.apply(update_skill, local_skills)
+        results = dict(zip(
+            (skill.name for skill in plan.outdated),
+            self.apply(update_skill, plan.outdated)
+        ))
+        return [results.get(skill.name, True) for skill in local_skills]
 
     @save_skills_data
     def update(self, skill=None, author=None):
@@ -230,14 +426,25 @@ class MycroftSkillsManager(object):
             entry = get_skill_entry(skill.name, self.skills_data)
             if entry:
                 entry['beta'] = skill.is_beta
-            if skill.update():
+            if skill.update(entry):
                 # On successful update update the update value
                 if entry:
                     entry['updated'] = time.time()
 
     @save_skills_data
     def apply(self, func, skills):
-        """Run a function on all skills in parallel"""
+        """
+        Run a function on all skills in parallel
+
+        Enough threads are used to keep every stage of stage_limits
+        busy, so one skill can download while another installs its
+        requirements. The stage limits cap the work actually done.
+
+        The requirements.txt files of all skills are installed with one
+        pip run after func finished on every skill.
+        """
+        from multiprocessing.pool import ThreadPool
+        skills = list(skills)
 
         def run_item(skill):
             try:
@@ -253,8 +460,34 @@ class MycroftSkillsManager(object):
                     func.__name__, skill.name
                 ))
 
-        with ThreadPool(100) as tp:
-            return (tp.map(run_item, skills))
+        workers = max(1, min(len(skills), self.stage_limits.workers))
+        if self.pip_batch is not None:
+            # Requirements are installed by the outer apply()
+            with ThreadPool(workers) as tp:
+                return tp.map(run_item, skills)
+
+        self.pip_batch = PipBatch(self.stage_limits, self.wheelhouse)
+        try:
+            with self.dependency_scope(), ThreadPool(workers) as tp:
+                results = tp.map(run_item, skills)
+        finally:
+            batch, self.pip_batch = self.pip_batch, None
+
+        failures = batch.install()
+        for skill, error in failures.items():
+            LOG.error('Error installing requirements of {}: {}'.format(
+                skill.name, repr(error)
+            ))
+            entry = get_skill_entry(skill.name, self.skills_data)
+            if entry:
+                entry['installation'] = 'failed'
+                entry['status'] = 'error'
+                entry['failure_message'] = repr(error)
+        failed_names = {skill.name for skill in failures}
+        return [
+            False if skill.name in failed_names else result
+            for skill, result in zip(skills, results)
+        ]
 
     @save_skills_data
     def install_defaults(self):
@@ -267,22 +500,27 @@ class MycroftSkillsManager(object):
 
         return self.apply(install_or_update_skill, self.list_defaults())
 
+    def export_bundles(self, output_dir, fmt=BUNDLE):
+        """
+        Write artifacts of the default skills of the platform
+
+        Devices with the folder as their artifacts source install these
+        skills without cloning them.
+        """
+        def export(skill):
+            export_artifact(skill, output_dir, fmt, self.stage_limits)
+
+        return all(self.apply(export, self.list_defaults()))
+
+    def build_wheelhouse(self, constraints=None):
+        """Build wheels for the requirements of all skills in the catalog"""
+        failures = self.wheelhouse.build(self.list(), constraints,
+                                         self.stage_limits)
+        return not failures
+
     def list_all_defaults(self):  # type: () -> Dict[str, List[SkillEntry]]
         """Returns {'skill_group': [SkillEntry('name')]}"""
-        skills = self.list()
-        name_to_skill = {skill.name: skill for skill in skills}
-        defaults = {group: [] for group in self.SKILL_GROUPS}
-
-        for section_name, skill_names in self.repo.get_default_skill_names():
-            section_skills = []
-            for skill_name in skill_names:
-                if skill_name in name_to_skill:
-                    section_skills.append(name_to_skill[skill_name])
-                else:
-                    LOG.warning('No such default skill: ' + skill_name)
-                defaults[section_name] = section_skills
-
-        return defaults
+        return self.catalog.all_defaults(self.SKILL_GROUPS)
 
     def list_defaults(self):
         skill_groups = self.list_all_defaults()
@@ -292,40 +530,58 @@ class MycroftSkillsManager(object):
         return skill_groups.get(self.platform,
                                 skill_groups.get('default', []))
 
-    def list(self):
+    def invalidate_catalog(self):
+        """Force the next query to rebuild the catalog snapshot"""
+        self._catalog = None
+
+    @property
+    def catalog(self):  # type: () -> SkillCatalog
         """
-        Load a list of SkillEntry objects from both local and
-        remote skills
+        Snapshot of the skills shared by all queries
 
-        It is necessary to load both local and remote skills at
-        the same time to correctly associate local skills with the name
-        in the repo and remote skills with any custom path that they
-        have been downloaded to
+        It is reused until catalog_ttl runs out, after which the repo is
+        updated and the snapshot is only rebuilt if the repo commit
+        changed. Changes to the skills folder always cause a rebuild.
         """
+        catalog = self._catalog
+        dir_state = get_dir_state(self.skills_dir)
+        if catalog and not catalog.is_expired(self.catalog_ttl):
+            if catalog.dir_state != dir_state:
+                catalog = self._catalog = catalog.rebuild(self, dir_state)
+            return catalog
+
         try:
             self.repo.update()
         except GitException as e:
             if not isdir(self.repo.path):
                 raise
             LOG.warning('Failed to update repo: {}'.format(repr(e)))
-        remote_skill_list = (
-            SkillEntry(
-                name, SkillEntry.create_path(self.skills_dir, url, name),
-                url, sha if self.versioned else '', msm=self
-            )
-            for name, path, url, sha in self.repo.get_skill_data()
+        repo_sha = self.repo.get_sha()
+
+        if catalog and catalog.repo_sha == repo_sha and \
+                catalog.dir_state == dir_state:
+            catalog.touch()
+            return catalog
+
+        self._catalog = SkillCatalog.build(
+            self, repo_sha, list(self.repo.get_skill_data()),
+            list(self.repo.get_default_skill_names()), dir_state
         )
-        remote_skills = {
-            skill.id: skill for skill in remote_skill_list
-        }
-        all_skills = []
-        for skill_file in glob(join(self.skills_dir, '*', '__init__.py')):
-            skill = SkillEntry.from_folder(dirname(skill_file), msm=self)
-            if skill.id in remote_skills:
-                skill.attach(remote_skills.pop(skill.id))
-            all_skills.append(skill)
-        all_skills += list(remote_skills.values())
-        return all_skills
+        return self._catalog
+
+    def list(self):
+        """
+        Load a list of SkillEntry objects from both local and
+        remote skills
+
+        The list comes from the current catalog snapshot
+        """
+        return list(self.catalog.skills)
+
+    def search(self, query, author=None):
+        # type: (str, str) -> List[SkillEntry]
+        """Skills matching the query by name and optionally author"""
+        return self.catalog.search_index.search(query, author)
 
     def find_skill(self, param, author=None, skills=None):
         # type: (str, str, List[SkillEntry]) -> SkillEntry
@@ -339,17 +595,26 @@ class MycroftSkillsManager(object):
             path = SkillEntry.create_path(self.skills_dir, param)
             return SkillEntry(name, path, param, msm=self)
         else:
-            skill_confs = {
-                skill: skill.match(param, author)
-                for skill in skills or self.list()
-            }
+            if skills:
+                skill_confs = {
+                    skill: skill.match(param, author) for skill in skills
+                }
+            else:
+                # Rivals close to a barely matching skill score below
+                # MIN_MATCH_SCORE but still make the match ambiguous
+                skill_confs = self.catalog.search_index.score(
+                    param, author, close_ratio=CLOSE_MATCH_RATIO,
+                    threshold=MIN_MATCH_SCORE * CLOSE_MATCH_RATIO
+                )
+                if not skill_confs:
+                    raise SkillNotFound(param)
             best_skill, score = max(skill_confs.items(), key=lambda x: x[1])
             LOG.info('Best match ({}): {} by {}'.format(
                 round(score, 2), best_skill.name, best_skill.author)
             )
-            if score < 0.3:
+            if score < MIN_MATCH_SCORE:
                 raise SkillNotFound(param)
-            low_bound = (score * 0.7) if score != 1.0 else 1.0
+            low_bound = (score * CLOSE_MATCH_RATIO) if score != 1.0 else 1.0
 
             close_skills = [
                 skill for skill, conf in skill_confs.items()
@@ -0,0 +1,132 @@
+# Copyright (c) 2018 Mycroft AI, Inc.
+#
+# This file is part of Mycroft Skills Manager
+# (see https://github.com/MatthewScholefield/mycroft-light).
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""
+    Local mirrors shared by all clones of a skill on this host
+
+    Each skill url gets a bare mirror in the object store. Skills are
+    cloned from the mirror with git alternates, so their objects are
+    stored once no matter how many skills folders contain the skill, and
+    a removed skill can be installed again without network access.
+
+    Mirrors never prune objects since skill clones depend on them.
+"""
+import hashlib
+import logging
+import os
+from os.path import dirname, expanduser, isdir, join
+
+from msm.skill_entry import SkillEntry
+from msm.stage_limits import DEFAULT_LIMITS, GIT, NETWORK
+from msm.util import FileLock, Git
+
+LOG = logging.getLogger(__name__)
+
+DEFAULT_OBJECT_STORE = expanduser('~/.mycroft/msm-objects')
+
+# Fetched into skill clones from the mirror
+MIRROR_REFSPEC = '+refs/heads/*:refs/remotes/origin/*'
+
+
+class ObjectStore(object):
+    def __init__(self, path=None):
+        self.path = path or DEFAULT_OBJECT_STORE
+
+    def mirror_path(self, url):
+        url = url.rstrip('/')
+        return join(self.path, '{}-{}-{}.git'.format(
+            SkillEntry.extract_author(url), SkillEntry.extract_repo_name(url),
+            hashlib.sha1(url.encode()).hexdigest()[:8]
+        ).lower())
+
+    def has_mirror(self, url):
+        return isdir(self.mirror_path(url))
+
+    @staticmethod
+    def has_commit(mirror, sha):
+        from git import GitError
+        try:
+            Git(mirror).cat_file('-e', sha + '^{commit}')
+            return True
+        except GitError:
+            return False
+
+    def read_file(self, url, sha, filename):
+        """Contents of a file at sha of the mirror of url or None"""
+        from git import GitError
+        try:
+            return Git(self.mirror_path(url)).show(
+                '{}:{}'.format(sha, filename)
+            )
+        except GitError:
+            return None
+
+    def get_mirror(self, url, sha=None, stage_limits=None):
+        """
+        Path of the mirror of url, downloading it if needed
+
+        Existing mirrors are only fetched if they lack sha, or always for
+        beta skills without a sha. Failing to fetch an existing mirror
+        only logs a warning so installs keep working offline.
+        """
+        from git import GitError
+        stage_limits = stage_limits or DEFAULT_LIMITS
+        mirror = self.mirror_path(url)
+        os.makedirs(self.path, exist_ok=True)
+        with FileLock(mirror + '.lock'):
+            if not isdir(mirror):
+                LOG.info('Creating mirror of ' + url)
+                with stage_limits.stage(NETWORK):
+                    Git(self.path).clone(url, mirror, mirror=True)
+                Git(mirror).config('gc.auto', '0')
+            elif not sha or sha == 'HEAD' or not self.has_commit(mirror, sha):
+                try:
+                    with stage_limits.stage(NETWORK):
+                        self._fetch(mirror, sha)
+                except GitError as e:
+                    LOG.warning('Failed to update mirror of {}: {}'.format(
+                        url, e
+                    ))
+        return mirror
+
+    def clone(self, url, sha, path, stage_limits=None):
+        """Clone the skill at url to path using objects of the mirror"""
+        stage_limits = stage_limits or DEFAULT_LIMITS
+        mirror = self.get_mirror(url, sha, stage_limits)
+        with stage_limits.stage(GIT):
+            Git(dirname(path) or '.').clone(mirror, path, shared=True)
+            git = Git(path)
+            git.remote('set-url', 'origin', url)
+            git.reset(sha or 'HEAD', hard=True)
+
+    def fetch_into(self, url, sha, path, stage_limits=None):
+        """Update the remote branches of a clone from the mirror"""
+        stage_limits = stage_limits or DEFAULT_LIMITS
+        mirror = self.get_mirror(url, sha, stage_limits)
+        with stage_limits.stage(GIT):
+            Git(path).fetch(mirror, MIRROR_REFSPEC)
+
+    def _fetch(self, mirror, sha):
+        git = Git(mirror)
+        git.fetch('origin')
+        if sha and sha != 'HEAD' and not self.has_commit(mirror, sha):
+            # Commits no longer on a branch can only be fetched directly
+            git.fetch('origin', sha)
@@ -0,0 +1,182 @@
+# Copyright (c) 2018 Mycroft AI, Inc.
+#
+# This file is part of Mycroft Skills Manager
+# (see https://github.com/MatthewScholefield/mycroft-light).
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""
+Installs the requirements.txt of many skills with a single pip run
+
+Bulk operations collect the skills needing pip into a PipBatch while
+they run. The batch then installs all requirements at once, which
+resolves the dependencies once instead of once per skill. If that fails,
+the skills named in the pip output are installed one by one and the rest
+are retried together.
+"""
+import logging
+import re
+from collections import OrderedDict
+from os.path import exists
+
+from typing import Dict, List
+
+from msm.exceptions import PipRequirementsException
+from msm.requirements import normalize_package_name, read_requirement_names
+from msm.skill_entry import SkillEntry, build_pip_args, call_pip
+from msm.skills_data import mark_installed
+from msm.stage_limits import DEFAULT_LIMITS, PIP
+
+LOG = logging.getLogger(__name__)
+
+
+def find_failed_skills(output, skills):
+    # type: (str, List[SkillEntry]) -> List[SkillEntry]
+    """
+    Skills responsible for a failed pip run
+
+    pip names the requirements file of a requirement it can't resolve.
+    Otherwise skills are matched by the packages named in error lines.
+    """
+    failed = [s for s in skills if s.requirements_file in output]
+    if failed:
+        return failed
+
+    error_words = set()
+    for line in output.split('\n'):
+        if 'error' in line.lower():
+            error_words.update(
+                normalize_package_name(word)
+                for word in re.findall(r'[A-Za-z0-9._-]+', line)
+            )
+    return [
+        s for s in skills
+        if read_requirement_names(s.requirements_file) & error_words
+    ]
+
+
+class PipBatch(object):
+    """
+    Requirements of skills to install together
+
+    Arguments:
+        stage_limits: limits of the manager running the batch
+        wheelhouse: Wheelhouse to install from if available
+    """
+
+    def __init__(self, stage_limits=None, wheelhouse=None):
+        self.stage_limits = stage_limits or DEFAULT_LIMITS
+        self.wheelhouse = wheelhouse
+        # {constraints: {path: skill}}
+        self.groups = OrderedDict()  # type: Dict[str, Dict[str, SkillEntry]]
+        # {path: skills_data entry} to record installed requirements in
+        self.entries = {}
+        # {path: skills_data entry} of installs finished by the batch
+        self.installs = {}
+        # Paths of updated skills to reload after the batch
+        self.updates = set()
+
+    def __contains__(self, skill):
+        return any(skill.path in group for group in self.groups.values())
+
+    def add(self, skill, constraints=None, entry=None):
+        """Queue the requirements of a skill, False if there is nothing
+        to install"""
+        if not exists(skill.requirements_file):
+            return False
+        constraints = SkillEntry.find_constraints(constraints)
+        if constraints is False:
+            return False
+        if skill.requirements_installed(constraints, entry):
+            LOG.info('Requirements of {} are already installed'.format(
+                skill.name
+            ))
+            skill.record_requirements(constraints, entry)
+            return False
+        group = self.groups.setdefault(constraints, OrderedDict())
+        group[skill.path] = skill
+        if entry is not None:
+            self.entries[skill.path] = entry
+        return True
+
+    def install(self):  # type: () -> Dict[SkillEntry, Exception]
+        """
+        Install everything added, returning {skill: error} of failures
+
+        Skills installed while the batch ran get their __init__.py back
+        and their skills_data entry marked installed or failed. Skills
+        updated meanwhile are marked updated to reload them.
+        """
+        failures = {}
+        for constraints, group in self.groups.items():
+            skills = sorted(group.values(), key=lambda s: s.name)
+            failures.update(self._install_group(skills, constraints))
+            for skill in skills:
+                skill.restore_init()
+                entry = self.installs.pop(skill.path, None)
+                if entry is not None and skill not in failures:
+                    mark_installed(entry)
+                if skill.path in self.updates and skill not in failures:
+                    skill.mark_updated()
+                self.updates.discard(skill.path)
+        self.groups.clear()
+        self.entries.clear()
+        return failures
+
+    def _install_group(self, skills, constraints):
+        LOG.info('Installing requirements of {} skills'.format(len(skills)))
+        try:
+            self._run_pip(skills, constraints)
+            return {}
+        except PipRequirementsException as e:
+            failed = find_failed_skills(e.stdout + e.stderr, skills)
+            LOG.warning('Combined pip install failed, retrying {} '
+                        'separately'.format(
+                            ', '.join(s.name for s in failed) or 'all skills'
+                        ))
+        if not failed:
+            failed = skills
+
+        rest = [s for s in skills if s not in failed]
+        if rest:
+            try:
+                self._run_pip(rest, constraints)
+            except PipRequirementsException:
+                failed = skills
+
+        failures = {}
+        for skill in failed:
+            try:
+                self._run_pip([skill], constraints)
+            except PipRequirementsException as e:
+                failures[skill] = e
+        return failures
+
+    def _run_pip(self, skills, constraints):
+        self._run_pip_command(skills, constraints)
+        for skill in skills:
+            skill.record_requirements(constraints,
+                                      self.entries.get(skill.path))
+
+    def _run_pip_command(self, skills, constraints):
+        pip_args = build_pip_args(
+            [skill.requirements_file for skill in skills], constraints,
+            self.wheelhouse
+        )
+        with self.stage_limits.stage(PIP):
+            result = call_pip(pip_args)
+        SkillEntry.check_pip_result(pip_args, *result)
@@ -0,0 +1,183 @@
+# Copyright (c) 2018 Mycroft AI, Inc.
+#
+# This file is part of Mycroft Skills Manager
+# (see https://github.com/MatthewScholefield/mycroft-light).
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""
+    Checks requirements.txt files against the installed distributions
+"""
+import hashlib
+import importlib
+import re
+from os.path import exists
+
+# Set by load_checkers(), they are slow to import and only needed once
+# requirements are checked
+metadata = None
+Requirement = InvalidRequirement = None
+checkers_loaded = False
+
+REQUIREMENT_NAME = re.compile(r'^\s*([A-Za-z0-9][A-Za-z0-9._-]*)')
+BARE_NAME = re.compile(r'^[A-Za-z0-9][A-Za-z0-9._-]*$')
+
+
+def load_checkers():
+    """Import importlib.metadata and packaging if they are available"""
+    global metadata, Requirement, InvalidRequirement, checkers_loaded
+    if checkers_loaded:
+        return
+    try:
+        from importlib import metadata
+    except ImportError:  # Python < 3.8
+        metadata = None
+
+    try:
+        from packaging.requirements import InvalidRequirement, Requirement
+    except ImportError:
+        Requirement = None
+    checkers_loaded = True
+
+
+def normalize_package_name(name):
+    return re.sub(r'[-_.]+', '-', name).lower()
+
+
+def read_requirement_lines(requirements_file):
+    """Requirement lines of a file without comments and blank lines"""
+    lines = []
+    if not requirements_file or not exists(requirements_file):
+        return lines
+    with open(requirements_file) as f:
+        for line in f:
+            line = re.sub(r'(^|\s)#.*', '', line).strip()
+            if line:
+                lines.append(line)
+    return lines
+
+
+def read_requirement_names(requirements_file):
+    """Package names listed in a requirements.txt file"""
+    names = set()
+    for line in read_requirement_lines(requirements_file):
+        match = REQUIREMENT_NAME.match(line)
+        if match:
+            names.add(normalize_package_name(match.group(1)))
+    return names
+
+
+def hash_requirements(requirements_file, constraints=None):
+    """Hash of the contents of a requirements file and its constraints"""
+    sha = hashlib.sha256()
+    for filename in [requirements_file, constraints]:
+        sha.update(b'\0')
+        if filename and exists(filename):
+            with open(filename, 'rb') as f:
+                sha.update(f.read())
+    return sha.hexdigest()
+
+
+def parse_requirement(line):
+    """Requirement object of a line or None if it can't be checked"""
+    load_checkers()
+    if line.startswith('-') or line.endswith('\\'):
+        return None
+    if Requirement is None:
+        return line if BARE_NAME.match(line) else None
+    try:
+        requirement = Requirement(line)
+    except InvalidRequirement:
+        return None
+    if requirement.url or requirement.extras:
+        return None
+    return requirement
+
+
+def get_requirement_name(requirement):
+    return normalize_package_name(
+        requirement if isinstance(requirement, str) else requirement.name
+    )
+
+
+def installed_version(name):
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def check_requirement(requirement, constraints):
+    """
+    Whether a parsed requirement is installed
+
+    Returns:
+        True or False, None if it can't be checked
+    """
+    if requirement is None:
+        return None
+    if not isinstance(requirement, str) and requirement.marker is not None \
+            and not requirement.marker.evaluate():
+        return True
+    name = get_requirement_name(requirement)
+    version = installed_version(name)
+    if version is None:
+        return False
+
+    specs = [requirement] + constraints.get(name, [])
+    if any(spec is None for spec in specs):
+        return None
+    if Requirement is None:
+        # Without packaging only unversioned requirements can be checked
+        return True if all(isinstance(spec, str) for spec in specs) else None
+    return all(
+        spec.specifier.contains(version, prereleases=True)
+        for spec in specs if not isinstance(spec, str)
+    )
+
+
+def check_requirements(requirements_file, constraints=None):
+    """
+    Whether all requirements of a file are installed
+
+    Only direct requirements are checked, restricted by the constraints
+    file if given.
+
+    Returns:
+        True or False, None if some requirements can't be checked
+    """
+    load_checkers()
+    if metadata is None:
+        return None
+    importlib.invalidate_caches()
+
+    constraint_specs = {}
+    for line in read_requirement_lines(constraints):
+        spec = parse_requirement(line)
+        match = REQUIREMENT_NAME.match(line)
+        if match:
+            name = normalize_package_name(match.group(1))
+            constraint_specs.setdefault(name, []).append(spec)
+
+    result = True
+    for line in read_requirement_lines(requirements_file):
+        status = check_requirement(parse_requirement(line), constraint_specs)
+        if status is False:
+            return False
+        if status is None:
+            result = None
+    return result
@@ -0,0 +1,128 @@
+# Copyright (c) 2018 Mycroft AI, Inc.
+#
+# This file is part of Mycroft Skills Manager
+# (see https://github.com/MatthewScholefield/mycroft-light).
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""
+    Persistent cache of the git metadata of local skill folders
+"""
+import json
+import logging
+import os
+from os.path import expanduser, join, dirname, abspath
+from tempfile import mkstemp
+from threading import Lock
+
+LOG = logging.getLogger(__name__)
+
+
+def get_folder_mtimes(folder):
+    """
+    Modification times identifying the state of a skill folder
+
+    Git replaces files like index and HEAD inside .git when commits are
+    checked out or the config changes, updating the mtime of .git
+    """
+    try:
+        folder_mtime = os.stat(folder).st_mtime_ns
+    except OSError:
+        return None
+    try:
+        git_mtime = os.stat(join(folder, '.git')).st_mtime_ns
+    except OSError:
+        git_mtime = None
+    return [folder_mtime, git_mtime]
+
+
+class ScanCache(object):
+    """
+    Remembers the git url of skill folders
+
+    Entries are only used while the mtimes of the folder and its .git
+    match the ones recorded when the folder was read.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or expanduser('~/.mycroft/msm_scan_cache.json')
+        self.folders = None
+        self.dirty = False
+        self.lock = Lock()
+
+    def load(self):
+        with self.lock:
+            if self.folders is not None:
+                return
+            try:
+                with open(self.path) as f:
+                    folders = json.load(f)
+            except (OSError, ValueError):
+                folders = {}
+            self.folders = folders if isinstance(folders, dict) else {}
+
+    def save(self):
+        """
+        Write the cache to disk if it changed
+
+        Catalogs can be rebuilt by several threads at once, so a copy
+        taken under the lock is written to a file of its own.
+        """
+        with self.lock:
+            if not self.dirty:
+                return
+            folders = dict(self.folders)
+            self.dirty = False
+        try:
+            os.makedirs(dirname(self.path), exist_ok=True)
+            fd, tmp_file = mkstemp(dir=dirname(self.path), suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(folders, f, separators=(',', ':'))
+                os.replace(tmp_file, self.path)
+            except BaseException:
+                os.remove(tmp_file)
+                raise
+        except OSError as e:
+            LOG.warning('Failed to save scan cache: {}'.format(repr(e)))
+            with self.lock:
+                self.dirty = True
+
+    def get(self, folder, mtimes):
+        """Returns the cached entry of folder if it is still valid"""
+        self.load()
+        entry = self.folders.get(abspath(folder))
+        if entry and mtimes and entry['mtimes'] == mtimes:
+            return entry
+        return None
+
+    def put(self, folder, mtimes, url):
+        self.load()
+        with self.lock:
+            self.folders[abspath(folder)] = {'mtimes': mtimes, 'url': url}
+            self.dirty = True
+
+    def prune(self, skills_dir, folders):
+        """Forget folders of skills_dir that are not in folders"""
+        self.load()
+        skills_dir = abspath(skills_dir)
+        keep = {abspath(i) for i in folders}
+        with self.lock:
+            for folder in list(self.folders):
+                if dirname(folder) == skills_dir and folder not in keep:
+                    del self.folders[folder]
+                    self.dirty = True
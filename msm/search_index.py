@@ -0,0 +1,166 @@
+# Copyright (c) 2018 Mycroft AI, Inc.
+#
+# This file is part of Mycroft Skills Manager
+# (see https://github.com/MatthewScholefield/mycroft-light).
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+from collections import Counter, defaultdict
+
+from typing import Dict, List
+
+from msm.skill_entry import SkillEntry, COMMON_NAME_TOKENS
+
+# Lowest score SkillEntry.match can return for a skill to be a result
+MIN_MATCH_SCORE = 0.3
+
+
+def normalize_name(name):
+    """Name in the form SkillEntry.match compares it"""
+    return SkillEntry._extract_tokens(name, COMMON_NAME_TOKENS)[0]
+
+
+def get_trigrams(text):
+    """Trigrams of text, padded so short words and word starts count"""
+    text = '  ' + text.lower() + ' '
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _ratio(matches, length):
+    """Same formula as SequenceMatcher.ratio"""
+    return 2.0 * matches / length if length else 1.0
+
+
+def _overlap(a, b):
+    """Size of the intersection of two Counters"""
+    return sum(min(count, b[item]) for item, count in a.items() if item in b)
+
+
+class SkillSearchIndex(object):
+    """
+    Trigram index over normalized skill names and authors
+
+    Skills sharing a trigram with the query are scored with
+    SkillEntry.match first. Every other skill is only scored if an upper
+    bound of its score, computed from precomputed letter and word
+    counts, can still reach the threshold. Results are therefore the
+    same as scoring every skill.
+    """
+
+    def __init__(self, skills):
+        self.skills = skills  # type: List[SkillEntry]
+        self.name_trigrams = defaultdict(list)
+        self.author_trigrams = defaultdict(list)
+        self.features = []
+        for i, skill in enumerate(skills):
+            name, tokens, common = SkillEntry._extract_tokens(
+                skill.name, COMMON_NAME_TOKENS
+            )
+            words = name.split(' ')
+            self.features.append((
+                len(name), Counter(name), len(words), Counter(words),
+                tuple(common)
+            ))
+            for trigram in get_trigrams(name):
+                self.name_trigrams[trigram].append(i)
+            for trigram in get_trigrams(skill.author):
+                self.author_trigrams[trigram].append(i)
+
+    def candidates(self, query, author=None):
+        # type: (str, str) -> List[SkillEntry]
+        """Skills sharing at least one trigram with the query"""
+        return [self.skills[i] for i in self._candidate_ids(query, author)]
+
+    def _candidate_ids(self, query, author):
+        found = set()
+        for trigram in get_trigrams(normalize_name(query)):
+            found.update(self.name_trigrams.get(trigram, ()))
+        if author:
+            for trigram in get_trigrams(author):
+                found.update(self.author_trigrams.get(trigram, ()))
+        return sorted(found)
+
+    def score(self, query, author=None, threshold=MIN_MATCH_SCORE,
+              close_ratio=None):
+        # type: (str, str, float, float) -> Dict[SkillEntry, float]
+        """
+        Score skills that can match the query
+
+        Arguments:
+            threshold: skills that can't reach this score are left out
+            close_ratio: also leave out skills scoring below this
+                         fraction of the best score found
+        Returns:
+            {skill: confidence} ordered like the indexed skills
+        """
+        search, search_tokens, search_common = SkillEntry._extract_tokens(
+            query, COMMON_NAME_TOKENS
+        )
+        search_len = len(search)
+        search_chars = Counter(search)
+        search_words = Counter(search_tokens)
+        common_ratios = {}
+        author_ratios = {}
+
+        def upper_bound(i):
+            name_len, name_chars, num_words, words, common = self.features[i]
+            if common not in common_ratios:
+                common_ratios[common] = SkillEntry._compare(
+                    list(common), search_common
+                )
+            if author:
+                skill_author = self.skills[i].author
+                if skill_author not in author_ratios:
+                    author_ratios[skill_author] = SkillEntry._compare(
+                        skill_author, author
+                    )
+                author_ratio = author_ratios[skill_author]
+
+            def bound(name_ratio):
+                total = 9 * name_ratio + 9 * _ratio(
+                    _overlap(search_words, words),
+                    num_words + len(search_tokens)
+                ) + 2 * common_ratios[common]
+                if author:
+                    return author_ratio * ((total + 5 * author_ratio) / 25)
+                return total / 20
+
+            length = name_len + search_len
+            if bound(_ratio(min(name_len, search_len), length)) < threshold:
+                return 0.0
+            return bound(_ratio(_overlap(search_chars, name_chars), length))
+
+        scores = {}
+        candidates = self._candidate_ids(query, author)
+        for i in candidates:
+            scores[i] = self.skills[i].match(query, author)
+            if close_ratio:
+                threshold = max(threshold, scores[i] * close_ratio)
+        for i in range(len(self.skills)):
+            if i not in scores and upper_bound(i) >= threshold:
+                scores[i] = self.skills[i].match(query, author)
+                if close_ratio:
+                    threshold = max(threshold, scores[i] * close_ratio)
+        return {self.skills[i]: scores[i] for i in sorted(scores)}
+
+    def search(self, query, author=None):
+        # type: (str, str) -> List[SkillEntry]
+        """Skills matching the query well enough, in catalog order"""
+        return [
+            skill for skill, score in self.score(query, author).items()
+            if score >= MIN_MATCH_SCORE
+        ]
@@ -0,0 +1,179 @@
+# Copyright (c) 2018 Mycroft AI, Inc.
+#
+# This file is part of Mycroft Skills Manager
+# (see https://github.com/MatthewScholefield/mycroft-light).
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+import logging
+import os
+import time
+from glob import glob
+from os.path import join, dirname, basename
+
+from typing import Dict, List
+
+from msm.scan_cache import get_folder_mtimes
+from msm.search_index import SkillSearchIndex
+from msm.skill_entry import SkillEntry
+
+LOG = logging.getLogger(__name__)
+
+# Number of threads reading the metadata of local skills
+SCAN_THREADS = 8
+
+
+def get_dir_state(skills_dir):
+    """
+    Cheap fingerprint of the skills folder
+
+    The mtime of a folder changes whenever an entry is added, removed
+    or renamed inside it, which covers installing and removing skills
+    """
+    try:
+        return os.stat(skills_dir).st_mtime_ns, tuple(sorted(
+            os.listdir(skills_dir)
+        ))
+    except OSError:
+        return None
+
+
+class SkillCatalog(object):
+    """
+    Snapshot of all remote and local skills
+
+    Built from one state of the skills repo and the skills folder so
+    repeated queries within a single operation share the same work.
+    """
+
+    def __init__(self, repo_sha, remote_data, default_names, dir_state,
+                 skills):
+        self.repo_sha = repo_sha
+        self.remote_data = remote_data
+        self.default_names = default_names
+        self.dir_state = dir_state
+        self.skills = skills  # type: List[SkillEntry]
+        self.created = time.time()
+        self._search_index = None
+
+    @property
+    def search_index(self):  # type: () -> SkillSearchIndex
+        if self._search_index is None:
+            self._search_index = SkillSearchIndex(self.skills)
+        return self._search_index
+
+    @classmethod
+    def build(cls, msm, repo_sha, remote_data, default_names, dir_state):
+        """
+        Load a list of SkillEntry objects from both local and
+        remote skills
+
+        It is necessary to load both local and remote skills at
+        the same time to correctly associate local skills with the name
+        in the repo and remote skills with any custom path that they
+        have been downloaded to
+        """
+        remote_skill_list = (
+            SkillEntry(
+                name, SkillEntry.create_path(msm.skills_dir, url, name),
+                url, sha if msm.versioned else '', msm=msm
+            )
+            for name, path, url, sha in remote_data
+        )
+        remote_skills = {
+            skill.id: skill for skill in remote_skill_list
+        }
+        all_skills = []
+        for skill in cls.scan_folders(msm):
+            if skill.id in remote_skills:
+                skill.attach(remote_skills.pop(skill.id))
+            all_skills.append(skill)
+        all_skills += list(remote_skills.values())
+        return cls(repo_sha, remote_data, default_names, dir_state,
+                   all_skills)
+
+    @staticmethod
+    def scan_folders(msm):  # type: (...) -> List[SkillEntry]
+        """
+        Create entries for the skills in the skills folder
+
+        Only folders changed since they were last read are read again,
+        the others come from the scan cache of msm
+        """
+        folders = [
+            dirname(skill_file)
+            for skill_file in glob(join(msm.skills_dir, '*', '__init__.py'))
+        ]
+        cache = msm.scan_cache
+        cache.prune(msm.skills_dir, folders)
+
+        skills = [None] * len(folders)
+        to_read = []
+        for i, folder in enumerate(folders):
+            mtimes = get_folder_mtimes(folder)
+            entry = cache.get(folder, mtimes)
+            if entry:
+                skills[i] = SkillEntry(basename(folder), folder,
+                                       entry['url'], msm=msm)
+            else:
+                to_read.append((i, folder, mtimes))
+
+        def read_folder(item):
+            i, folder, mtimes = item
+            skill = SkillEntry.from_folder(folder, msm=msm)
+            cache.put(folder, mtimes, skill.url)
+            return i, skill
+
+        if len(to_read) < 2:
+            results = [read_folder(item) for item in to_read]
+        else:
+            from multiprocessing.pool import ThreadPool
+            with ThreadPool(min(len(to_read), SCAN_THREADS)) as tp:
+                results = tp.map(read_folder, to_read)
+        for i, skill in results:
+            skills[i] = skill
+        cache.save()
+        return skills
+
+    def rebuild(self, msm, dir_state):
+        """Create a new snapshot reusing the remote data of this one"""
+        return self.build(msm, self.repo_sha, self.remote_data,
+                          self.default_names, dir_state)
+
+    def is_expired(self, ttl):
+        return time.time() - self.created >= ttl
+
+    def touch(self):
+        """Mark the snapshot as verified against the current repo"""
+        self.created = time.time()
+
+    def all_defaults(self, skill_groups):
+        # type: (set) -> Dict[str, List[SkillEntry]]
+        """Returns {'skill_group': [SkillEntry('name')]}"""
+        name_to_skill = {skill.name: skill for skill in self.skills}
+        defaults = {group: [] for group in skill_groups}
+
+        for section_name, skill_names in self.default_names:
+            section_skills = []
+            for skill_name in skill_names:
+                if skill_name in name_to_skill:
+                    section_skills.append(name_to_skill[skill_name])
+                else:
+                    LOG.warning('No such default skill: ' + skill_name)
+                defaults[section_name] = section_skills
+
+        return defaults
@@ -23,22 +23,22 @@ import logging
 import os
 import subprocess
 import sys
+import time
 from contextlib import contextmanager
-from difflib import SequenceMatcher
-from os.path import exists, join, basename, dirname, isfile
+from os.path import exists, join, basename, dirname, isdir, isfile
 from shutil import rmtree, move
 from subprocess import PIPE, Popen
 from tempfile import mktemp
 
-from git import Repo, GitError
-from git.exc import GitCommandError
-from threading import Lock
-
 from msm import SkillRequirementsException, git_to_msm_exceptions
 from msm.exceptions import PipRequirementsException, \
     SystemRequirementsException, AlreadyInstalled, SkillModified, \
-    AlreadyRemoved, RemoveException, CloneException, NotInstalled
-from msm.util import Git
+    AlreadyRemoved, RemoveException, CloneException, NotInstalled, \
+    ArtifactException
+from msm.git_reader import get_remote_url, is_shallow
+from msm.requirements import check_requirements, hash_requirements
+from msm.stage_limits import DEFAULT_LIMITS, NETWORK, GIT, PIP, SHELL
+from msm.util import Git, SkillLock
 
 LOG = logging.getLogger(__name__)
 
@@ -49,6 +49,48 @@ SWITCHABLE_BRANCHES = ['master']
 # default constraints to use if no are given
 DEFAULT_CONSTRAINTS = '/etc/mycroft/constraints.txt'
 
+# Commits of history downloaded by shallow clones of beta skills
+SHALLOW_DEPTH = 1
+
+# Words in skill names that are scored separately when searching
+COMMON_NAME_TOKENS = ['skill', 'fallback', 'mycroft']
+
+# Option making pip install only from a wheelhouse
+PIP_NO_INDEX = '--no-index'
+
+
+def build_pip_args(requirements_files, constraints=None, wheelhouse=None):
+    """Command installing the given requirements.txt files"""
+    can_pip = os.access(dirname(sys.executable), os.W_OK | os.X_OK)
+    pip_args = [sys.executable, '-m', 'pip', 'install']
+    for requirements_file in requirements_files:
+        pip_args += ['-r', requirements_file]
+    if constraints:
+        pip_args += ['-c', constraints]
+    if wheelhouse:
+        pip_args += wheelhouse.get_pip_args()
+
+    if not can_pip:
+        pip_args = ['sudo', '-n'] + pip_args
+    return pip_args
+
+
+def call_pip(pip_args):
+    """
+    Run pip and return (returncode, stdout, stderr)
+
+    Installs limited to a wheelhouse are retried with the package index
+    if the wheelhouse is missing some packages.
+    """
+    proc = Popen(pip_args, stdout=PIPE, stderr=PIPE)
+    stdout, stderr = proc.communicate()
+    if proc.returncode != 0 and PIP_NO_INDEX in pip_args:
+        LOG.warning('Installing from the wheelhouse failed, retrying with '
+                    'the package index')
+        return call_pip([arg for arg in pip_args if arg != PIP_NO_INDEX])
+    return proc.returncode, stdout.decode(), stderr.decode()
+
+
 @contextmanager
 def work_dir(directory):
     old_dir = os.getcwd()
@@ -60,18 +102,82 @@ def work_dir(directory):
 
 
 class SkillEntry(object):
-    pip_lock = Lock()
+    """
+    A skill from the catalog or the skills folder
+
+    The author, id and is_local attributes are computed on first use
+    since large catalogs create many entries that are never inspected.
+    """
+    __slots__ = ['name', 'path', 'url', 'sha', 'msm',
+                 '_author', '_id', '_is_local']
 
     def __init__(self, name, path, url='', sha='', msm=None):
-        url = url.rstrip('/')
         self.name = name
         self.path = path
-        self.url = url
+        self.url = url.rstrip('/')
         self.sha = sha
         self.msm = msm
-        self.author = self.extract_author(url) if url else ''
-        self.id = self.extract_repo_id(url) if url else name
-        self.is_local = exists(path)
+        self._author = None
+        self._id = None
+        self._is_local = None
+
+    @property
+    def author(self):
+        if self._author is None:
+            self._author = self.extract_author(self.url) if self.url else ''
+        return self._author
+
+    @author.setter
+    def author(self, value):
+        self._author = value
+
+    @property
+    def id(self):
+        if self._id is None:
+            self._id = self.extract_repo_id(self.url) if self.url \
+                else self.name
+        return self._id
+
+    @id.setter
+    def id(self, value):
+        self._id = value
+
+    @property
+    def is_local(self):
+        if self._is_local is None:
+            self._is_local = exists(self.path)
+        return self._is_local
+
+    @is_local.setter
+    def is_local(self, value):
+        self._is_local = value
+
+    def _stage(self, name):
+        """Wait until the stage limits of msm allow entering a stage"""
+        limits = self.msm.stage_limits if self.msm else DEFAULT_LIMITS
+        return limits.stage(name)
+
+    @property
+    def force_deps(self):
+        """Whether dependencies are installed even if they seem installed"""
+        return self.msm.force_deps if self.msm else False
+
+    @property
+    def shallow(self):
+        """Whether to download the skill without its full history"""
+        return self.msm.shallow_clones if self.msm else False
+
+    @property
+    def object_store(self):
+        return self.msm.object_store if self.msm else None
+
+    @property
+    def artifacts(self):
+        return self.msm.artifacts if self.msm else None
+
+    @property
+    def wheelhouse(self):
+        return self.msm.wheelhouse if self.msm else None
 
     @property
     def is_beta(self):
@@ -132,15 +238,16 @@ class SkillEntry(object):
 
     @classmethod
     def _compare(cls, a, b):
+        from difflib import SequenceMatcher
         return SequenceMatcher(a=a, b=b).ratio()
 
     def match(self, query, author=None):
         search, search_tokens, search_common = self._extract_tokens(
-            query, ['skill', 'fallback', 'mycroft']
+            query, COMMON_NAME_TOKENS
         )
 
         name, name_tokens, name_common = self._extract_tokens(
-            self.name, ['skill', 'fallback', 'mycroft']
+            self.name, COMMON_NAME_TOKENS
         )
 
         weights = [
@@ -159,175 +266,472 @@ class SkillEntry(object):
                 sum(weight for weight, val in weights)
         )
 
-    def run_pip(self, constraints):
-        requirements_file = join(self.path, "requirements.txt")
-        if not exists(requirements_file):
-            return False
+    @property
+    def requirements_file(self):
+        return join(self.path, "requirements.txt")
 
+    @staticmethod
+    def find_constraints(constraints):
+        """Constraints file to pass to pip, False if it doesn't exist"""
         # Use constraints to limit the installed versions
         if constraints and not exists(constraints):
             LOG.error('Couldn\'t find the constraints file')
             return False
         elif exists(DEFAULT_CONSTRAINTS):
             constraints = DEFAULT_CONSTRAINTS
+        return constraints
 
-        LOG.info('Installing requirements.txt for ' + self.name)
-        can_pip = os.access(dirname(sys.executable), os.W_OK | os.X_OK)
-        pip_args = [
-            sys.executable, '-m', 'pip', 'install', '-r', requirements_file
-        ]
-        if constraints:
-            pip_args += ['-c', constraints]
-
-        if not can_pip:
-            pip_args = ['sudo', '-n'] + pip_args
-
-        with self.pip_lock:
-            proc = Popen(pip_args, stdout=PIPE, stderr=PIPE)
-            pip_code = proc.wait()
-        if pip_code != 0:
-            stderr = proc.stderr.read().decode()
-            if pip_code == 1 and 'sudo:' in stderr and pip_args[0] == 'sudo':
-                raise PipRequirementsException(
-                    2, '', 'Permission denied while installing pip '
-                           'dependencies. Please run in virtualenv or use sudo'
-                )
+    def requirements_installed(self, constraints, entry=None):
+        """
+        Whether the installed packages satisfy requirements.txt
+
+        Requirements that can't be checked, like urls, count as
+        installed if the requirement files are unchanged since they were
+        recorded in the skills_data entry.
+        """
+        if self.force_deps:
+            return False
+        installed = check_requirements(self.requirements_file, constraints)
+        if installed is None and entry:
+            return entry.get('requirements_hash') == hash_requirements(
+                self.requirements_file, constraints
+            )
+        return bool(installed)
+
+    def record_requirements(self, constraints, entry):
+        """Remember installed requirements in the skills_data entry"""
+        if entry is not None:
+            entry['requirements_hash'] = hash_requirements(
+                self.requirements_file, self.find_constraints(constraints)
+            )
+
+    def get_pip_args(self, constraints, entry=None):
+        """Command installing requirements.txt or None if there is nothing
+        to install"""
+        if not exists(self.requirements_file):
+            return None
+        constraints = self.find_constraints(constraints)
+        if constraints is False:
+            return None
+        if self.requirements_installed(constraints, entry):
+            LOG.info('Requirements of {} are already installed'.format(
+                self.name
+            ))
+            self.record_requirements(constraints, entry)
+            return None
+        return build_pip_args([self.requirements_file], constraints,
+                              self.wheelhouse)
+
+    @staticmethod
+    def check_pip_result(pip_args, pip_code, stdout, stderr):
+        """Raise PipRequirementsException if pip failed"""
+        if pip_code == 0:
+            return
+        if pip_code == 1 and 'sudo:' in stderr and pip_args[0] == 'sudo':
             raise PipRequirementsException(
-                pip_code, proc.stdout.read().decode(), stderr
+                2, '', 'Permission denied while installing pip '
+                       'dependencies. Please run in virtualenv or use sudo'
             )
+        raise PipRequirementsException(pip_code, stdout, stderr)
+
+    def run_pip(self, constraints=None, entry=None):
+        """
+        Install requirements.txt unless it is already satisfied
+
+        Arguments:
+            constraints: pip constraints file
+            entry: skills_data entry recording the installed requirements
+        """
+        if self.msm and self.msm.pip_batch is not None:
+            # Installed together with other skills once the batch is done
+            return self.msm.pip_batch.add(self, constraints, entry)
+
+        pip_args = self.get_pip_args(constraints, entry)
+        if not pip_args:
+            return False
 
+        LOG.info('Installing requirements.txt for ' + self.name)
+        with self._stage(PIP):
+            result = call_pip(pip_args)
+        self.check_pip_result(pip_args, *result)
+        self.record_requirements(constraints, entry)
         return True
 
-    def run_requirements_sh(self):
+    def check_requirements_sh_result(self, rc):
+        """Raise SystemRequirementsException if requirements.sh failed"""
+        if rc != 0:
+            LOG.error("Requirements.sh failed with error code: " + str(rc))
+            raise SystemRequirementsException(rc)
+        LOG.info("Successfully ran requirements.sh for " + self.name)
+
+    def requirements_sh_needed(self, entry=None):
+        """
+        Whether requirements.sh has to run
+
+        Scripts identical to the last one that succeeded according to
+        the skills_data entry are skipped.
+        """
         setup_script = join(self.path, "requirements.sh")
         if not exists(setup_script):
             return False
+        if self.force_deps or not entry:
+            return True
+        if entry.get('requirements_sh_hash') == \
+                hash_requirements(setup_script):
+            LOG.info('requirements.sh of {} already ran'.format(self.name))
+            return False
+        return True
+
+    def record_requirements_sh(self, entry):
+        """Remember a successful requirements.sh in the skills_data entry"""
+        if entry is not None:
+            entry['requirements_sh_hash'] = hash_requirements(
+                join(self.path, "requirements.sh")
+            )
+            entry['requirements_sh_run'] = time.time()
 
-        with work_dir(self.path):
+    def run_requirements_sh(self, entry=None):
+        """
+        Run requirements.sh unless it already ran
+
+        Arguments:
+            entry: skills_data entry recording the scripts that ran
+        """
+        if not self.requirements_sh_needed(entry):
+            return False
+        setup_script = join(self.path, "requirements.sh")
+
+        with self._stage(SHELL), work_dir(self.path):
             rc = subprocess.call(["bash", setup_script])
 
-        if rc != 0:
-            LOG.error("Requirements.sh failed with error code: " + str(rc))
-            raise SystemRequirementsException(rc)
-        LOG.info("Successfully ran requirements.sh for " + self.name)
+        self.check_requirements_sh_result(rc)
+        self.record_requirements_sh(entry)
         return True
 
     def run_skill_requirements(self):
         if not self.msm:
             raise ValueError('Pass msm to SkillEntry to install skill deps')
         try:
-            for skill_dep in self.get_dependent_skills():
-                LOG.info("Installing skill dependency: {}".format(skill_dep))
-                try:
-                    self.msm.install(skill_dep)
-                except AlreadyInstalled:
-                    pass
+            self.msm.install_dependencies(self)
+        except SkillRequirementsException:
+            raise
         except Exception as e:
             raise SkillRequirementsException(e)
 
     def get_dependent_skills(self):
-        reqs = join(self.path, "skill_requirements.txt")
-        if not exists(reqs):
-            return []
+        """
+        Names or urls in skill_requirements.txt
 
-        with open(reqs, "r") as f:
-            return [i.strip() for i in f.readlines() if i.strip()]
+        Skills that aren't installed yet are read from their repo so
+        their dependencies can be installed first.
+        """
+        reqs = self.read_file("skill_requirements.txt") or ''
+        return [i.strip() for i in reqs.splitlines() if i.strip()]
 
-    def install(self, constraints=None):
+    def install(self, constraints=None, entry=None):
         if self.is_local:
             raise AlreadyInstalled(self.name)
 
         if self.msm:
             self.run_skill_requirements()
 
-        LOG.info("Downloading skill: " + self.url)
-        try:
-            tmp_location = mktemp()
-            Repo.clone_from(self.url, tmp_location)
-            self.is_local = True
-            Git(tmp_location).reset(self.sha or 'HEAD', hard=True)
-        except GitCommandError as e:
-            raise CloneException(e.stderr)
+        from git.exc import GitCommandError
+        with SkillLock(self.name):
+            # Another process could have installed it meanwhile
+            if exists(self.path):
+                self.is_local = True
+                raise AlreadyInstalled(self.name)
+
+            LOG.info("Downloading skill: " + self.url)
+            try:
+                tmp_location = mktemp()
+                self._clone(tmp_location)
+                self.is_local = True
+            except GitCommandError as e:
+                raise CloneException(e.stderr)
+
+            with self.moved_into_place(tmp_location):
+                self.run_requirements_sh(entry)
+                self.run_pip(constraints, entry)
+
+        LOG.info('Successfully installed ' + self.name)
 
+    @property
+    def requirements_queued(self):
+        """Whether requirements.txt waits in the pip batch of the manager"""
+        return bool(self.msm and self.msm.pip_batch is not None and
+                    self in self.msm.pip_batch)
+
+    @contextmanager
+    def moved_into_place(self, tmp_location):
+        """
+        Move a downloaded skill to its path while its dependencies are
+        installed, hiding __init__.py until they are done so the skill
+        isn't loaded early
+
+        If requirements.txt was queued in a pip batch, __init__.py stays
+        hidden until the batch installed it.
+        """
         if isfile(join(tmp_location, '__init__.py')):
             move(join(tmp_location, '__init__.py'),
                  join(tmp_location, '__init__'))
 
         try:
             move(tmp_location, self.path)
-
-            self.run_requirements_sh()
-            self.run_pip(constraints)
+            yield
         finally:
-            if isfile(join(self.path, '__init__')):
-                move(join(self.path, '__init__'),
-                     join(self.path, '__init__.py'))
+            if not self.requirements_queued:
+                self.restore_init()
+
+    def restore_init(self):
+        """Bring back __init__.py hidden by moved_into_place"""
+        if isfile(join(self.path, '__init__')):
+            move(join(self.path, '__init__'),
+                 join(self.path, '__init__.py'))
+
+    def _clone(self, tmp_location):
+        import tarfile
+        from git import GitError, Repo
+        from git.exc import GitCommandError
+        if self.artifacts and not self.is_beta:
+            try:
+                if self.artifacts.install(self.sha, self.url, tmp_location,
+                                          self.msm.stage_limits):
+                    return
+            except (GitError, OSError, tarfile.TarError,
+                    ArtifactException) as e:
+                LOG.warning('Installing {} from its artifact failed: '
+                            '{}'.format(self.name, e))
+                rmtree(tmp_location, ignore_errors=True)
+
+        if self.object_store:
+            try:
+                self.object_store.clone(self.url, self.sha, tmp_location,
+                                        self.msm.stage_limits)
+                return
+            except GitError as e:
+                LOG.warning('Cloning {} from the object store failed: '
+                            '{}'.format(self.name, e))
+                rmtree(tmp_location, ignore_errors=True)
+
+        if self.shallow:
+            try:
+                self._shallow_clone(tmp_location)
+                return
+            except GitCommandError as e:
+                LOG.warning('Shallow clone of {} failed, downloading full '
+                            'history: {}'.format(self.name, e.stderr))
+                rmtree(tmp_location, ignore_errors=True)
+
+        with self._stage(NETWORK):
+            Repo.clone_from(self.url, tmp_location)
+        with self._stage(GIT):
+            Git(tmp_location).reset(self.sha or 'HEAD', hard=True)
 
-        LOG.info('Successfully installed ' + self.name)
+    def _shallow_clone(self, tmp_location):
+        """
+        Download only the pinned commit, or the latest commits of the
+        branch for beta skills
+        """
+        if self.is_beta:
+            from git import Repo
+            with self._stage(NETWORK):
+                Repo.clone_from(self.url, tmp_location, depth=SHALLOW_DEPTH)
+            return
+
+        os.makedirs(tmp_location)
+        git = Git(tmp_location)
+        with self._stage(GIT):
+            git.init()
+            git.remote('add', 'origin', self.url)
+        with self._stage(NETWORK):
+            git.fetch('origin', self.sha, depth=1)
+        with self._stage(GIT):
+            git.checkout(self.sha)
+
+    def _fetch(self, git):
+        """Fetch the commits needed to update, avoiding full history in
+        shallow clones"""
+        from git.exc import GitCommandError
+        store = self.object_store
+        if store and store.has_mirror(self.url):
+            store.fetch_into(self.url, self.sha, self.path,
+                             self.msm.stage_limits)
+            return
+        with self._stage(NETWORK):
+            if is_shallow(self.path) and not self.is_beta:
+                try:
+                    git.fetch('origin', self.sha)
+                    return
+                except GitCommandError:
+                    LOG.debug('Failed to fetch {} by sha'.format(self.name))
+            git.fetch()
 
-    def update_deps(self, constraints=None):
+    def _merge(self, git):
+        from git.exc import GitCommandError
+        target = self.sha or 'origin/HEAD'
+        try:
+            git.merge(target, ff_only=True)
+        except GitCommandError:
+            if not is_shallow(self.path):
+                raise
+            LOG.info('Fetching history of {} to update it'.format(self.name))
+            with self._stage(NETWORK):
+                git.fetch(unshallow=True)
+            git.merge(target, ff_only=True)
+
+    def update_deps(self, constraints=None, entry=None):
         if self.msm:
             self.run_skill_requirements()
-        self.run_requirements_sh()
-        self.run_pip(constraints)
+        self.run_requirements_sh(entry)
+        self.run_pip(constraints, entry)
 
     def _find_sha_branch(self):
         git = Git(self.path)
-        sha_branches = git.branch(
-            contains=self.sha, all=True
-        ).split('\n')
+        return self.parse_sha_branch(
+            git.branch(contains=self.sha, all=True), git.remote()
+        )
+
+    @staticmethod
+    def parse_sha_branch(branches, remotes):
+        """Branch name from the output of git branch --contains"""
+        sha_branches = branches.split('\n')
         sha_branch = [b for b in sha_branches if ' -> ' not in b][0]
         sha_branch = sha_branch.strip('* \n').replace('remotes/', '')
-        for remote in git.remote().split('\n'):
+        for remote in remotes.split('\n'):
             sha_branch = sha_branch.replace(remote + '/', '')
         return sha_branch
 
-    def update(self):
+    def update(self, entry=None):
         if not self.is_local:
             raise NotInstalled('{} is not installed'.format(self.name))
+        with SkillLock(self.name):
+            return self._update(entry)
+
+    def _update(self, entry=None):
         git = Git(self.path)
 
         with git_to_msm_exceptions():
-            sha_before = git.rev_parse('HEAD')
+            with self._stage(GIT):
+                sha_before = git.rev_parse('HEAD')
 
-            modified_files = git.status(porcelain=True, untracked='no')
+                modified_files = git.status(porcelain=True, untracked='no')
             if modified_files != '':
                 raise SkillModified('Uncommitted changes:\n' + modified_files)
 
-            git.fetch()
-            current_branch = git.rev_parse('--abbrev-ref', 'HEAD').strip()
-            if self.sha and current_branch in SWITCHABLE_BRANCHES:
-                # Check out correct branch
-                git.checkout(self._find_sha_branch())
+            self._fetch(git)
+            with self._stage(GIT):
+                current_branch = git.rev_parse(
+                    '--abbrev-ref', 'HEAD'
+                ).strip()
+                if self.sha and current_branch in SWITCHABLE_BRANCHES:
+                    # Check out correct branch
+                    git.checkout(self._find_sha_branch())
 
-            git.merge(self.sha or 'origin/HEAD', ff_only=True)
+                self._merge(git)
 
-        sha_after = git.rev_parse('HEAD')
+                sha_after = git.rev_parse('HEAD')
 
         if sha_before != sha_after:
-            self.update_deps()
-            LOG.info('Updated ' + self.name)
-            # Trigger reload by modifying the timestamp
-            os.utime(join(self.path, '__init__.py'))
+            self.update_deps(entry=entry)
+            if self.requirements_queued:
+                # Reloaded once the pip batch installed the requirements
+                self.msm.pip_batch.updates.add(self.path)
+            else:
+                self.mark_updated()
             return True
         else:
             LOG.info('Nothing new for ' + self.name)
             return False
 
+    def mark_updated(self):
+        LOG.info('Updated ' + self.name)
+        # Trigger reload by modifying the timestamp
+        os.utime(join(self.path, '__init__.py'))
+
     def remove(self):
         if not self.is_local:
             raise AlreadyRemoved(self.name)
         try:
-            rmtree(self.path)
+            with SkillLock(self.name):
+                rmtree(self.path)
         except OSError as e:
             raise RemoveException(str(e))
 
         LOG.info('Successfully removed ' + self.name)
         self.is_local = False
 
+    def read_file(self, filename):
+        """
+        Contents of a file of the skill or None if it doesn't exist
+
+        Skills that aren't installed are read from their mirror or local
+        artifact if there is one, else from their repo, which has to be
+        local or on GitHub.
+        """
+        if self.is_local:
+            file_path = join(self.path, filename)
+            if not isfile(file_path):
+                return None
+            with open(file_path) as f:
+                return f.read()
+
+        from git import GitError
+        if not self.is_beta:
+            store = self.object_store
+            if store and store.has_mirror(self.url) and store.has_commit(
+                    store.mirror_path(self.url), self.sha):
+                return store.read_file(self.url, self.sha, filename)
+            # Remote artifacts are only downloaded once to install them
+            if self.artifacts and not self.artifacts.is_remote:
+                artifact, fmt = self.artifacts.find(self.sha)
+                if artifact:
+                    import tarfile
+                    from msm.artifacts import read_artifact_file
+                    try:
+                        return read_artifact_file(artifact, fmt, self.sha,
+                                                  filename)
+                    except (GitError, OSError, tarfile.TarError) as e:
+                        LOG.warning('Failed to read {}: {}'.format(
+                            artifact, e
+                        ))
+
+        ref = self.sha or 'HEAD'
+        if isdir(self.url):
+            try:
+                return Git(self.url).show('{}:{}'.format(ref, filename))
+            except GitError:
+                return None
+        if self.url.startswith('https://github.com/'):
+            url = 'https://raw.githubusercontent.com/{}/{}/{}/{}'.format(
+                self.author, self.extract_repo_name(self.url), ref, filename
+            )
+            from urllib.error import HTTPError, URLError
+            from urllib.request import urlopen
+            try:
+                with urlopen(url, timeout=30) as response:
+                    return response.read().decode()
+            except HTTPError as e:
+                if e.code == 404:
+                    return None
+                LOG.warning('Failed to download {}: {}'.format(url, e))
+            except URLError as e:
+                LOG.warning('Failed to download {}: {}'.format(url, e))
+            return None
+        LOG.warning('Can\'t read {} of {} from {}'.format(
+            filename, self.name, self.url
+        ))
+        return None
+
     @staticmethod
     def find_git_url(path):
         """Get the git url from a folder"""
+        if not exists(join(path, '.git')):
+            return ''
+        url = get_remote_url(path)
+        if url is not None:
+            return url
+        from git import GitError
         try:
             return Git(path).config('remote.origin.url')
         except GitError:
@@ -335,6 +739,6 @@ class SkillEntry(object):
 
     def __repr__(self):
         return '<SkillEntry {}>'.format(' '.join(
-            '{}={}'.format(attr, self.__dict__[attr])
+            '{}={}'.format(attr, getattr(self, attr))
             for attr in ['name', 'author', 'is_local']
         ))
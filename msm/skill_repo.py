@@ -19,54 +19,124 @@
 # KIND, either express or implied.  See the License for the
 # specific language governing permissions and limitations
 # under the License.
+import json
+import os
+import time
 from glob import glob
 from os import makedirs
-from os.path import exists, join, isdir, dirname, basename
+from os.path import exists, join, isdir, isfile, dirname, basename, getmtime
 from shutil import rmtree
 
-from git import Repo
-from git.exc import GitCommandError, GitError
-
 from msm import git_to_msm_exceptions
 from msm.exceptions import MsmException
-from msm.util import Git
+from msm.git_reader import get_head_ref, get_remote_url, resolve_ref
+from msm.skill_entry import SkillEntry
+from msm.util import Git, RepoLock
 import logging
 
 LOG = logging.getLogger(__name__)
 
+# Bump when the layout of the catalog index changes
+INDEX_VERSION = 1
+
+# Seconds after a successful fetch during which the remote isn't checked
+DEFAULT_REFRESH_TTL = 5 * 60
+
 
 class SkillRepo(object):
-    def __init__(self, path=None, url=None, branch=None):
+    def __init__(self, path=None, url=None, branch=None,
+                 refresh_ttl=DEFAULT_REFRESH_TTL):
         self.path = path or "/opt/mycroft/.skills-repo"
         self.url = url or "https://github.com/MycroftAI/mycroft-skills"
         self.branch = branch or "18.08"
+        self.refresh_ttl = refresh_ttl
         self.repo_info = {}
+        self._index = None
+
+    @property
+    def index_file(self):
+        """Catalog index stored alongside the repo cache"""
+        return join(self.path, '.git', 'msm-index.json')
 
     def read_file(self, filename):
         with open(join(self.path, filename)) as f:
             return f.read()
 
+    @property
+    def refresh_file(self):
+        """Touched whenever the repo was found up to date with the remote"""
+        return join(self.path, '.git', 'msm-refreshed')
+
+    def _is_checked_out(self):
+        """Whether the branch is checked out at the fetched commit"""
+        sha = resolve_ref(self.path, 'origin/' + self.branch)
+        return bool(sha) and \
+            get_head_ref(self.path) == 'refs/heads/' + self.branch and \
+            resolve_ref(self.path, 'HEAD') == sha
+
+    def is_fresh(self):
+        """Whether the repo was refreshed less than refresh_ttl ago"""
+        return isfile(self.refresh_file) and \
+            time.time() - getmtime(self.refresh_file) < self.refresh_ttl and \
+            get_remote_url(self.path) == self.url and self._is_checked_out()
+
+    def _remote_changed(self, git):
+        """Compare the remote branch to the fetched one using ls-remote"""
+        remote = git.ls_remote('origin', 'refs/heads/' + self.branch)
+        remote_sha = remote.split()[0] if remote.strip() else None
+        return remote_sha != resolve_ref(self.path, 'origin/' + self.branch)
+
     def __prepare_repo(self):
         if not exists(dirname(self.path)):
             makedirs(dirname(self.path))
 
+        from git import Repo
+        from git.exc import GitCommandError
         if not isdir(self.path):
             Repo.clone_from(self.url, self.path)
+        else:
+            git = Git(self.path)
+            if get_remote_url(self.path) != self.url:
+                git.config('remote.origin.url', self.url)
+                git.fetch()
+            elif self._remote_changed(git):
+                git.fetch()
 
-        git = Git(self.path)
-        git.config('remote.origin.url', self.url)
-        git.fetch()
+        if not self._is_checked_out():
+            git = Git(self.path)
+            try:
+                git.checkout(self.branch)
+                git.reset('origin/' + self.branch, hard=True)
+            except GitCommandError:
+                raise MsmException('Invalid branch: ' + self.branch)
 
-        try:
-            git.checkout(self.branch)
-            git.reset('origin/' + self.branch, hard=True)
-        except GitCommandError:
-            raise MsmException('Invalid branch: ' + self.branch)
+        with open(self.refresh_file, 'w'):
+            pass
 
     def update(self):
+        """
+        Bring the repo in line with the remote branch
+
+        Nothing is done if the repo was refreshed within refresh_ttl.
+        Otherwise ls-remote decides whether a fetch is needed. If the
+        remote can't be reached the existing checkout is kept.
+        """
+        if self.is_fresh():
+            return
+        with RepoLock(self.path):
+            # Another process may have refreshed it while this one waited
+            if not self.is_fresh():
+                self.__update()
+
+    def __update(self):
+        from git import GitError
         try:
             self.__prepare_repo()
         except GitError as e:
+            if resolve_ref(self.path, 'origin/' + self.branch):
+                LOG.warning('Could not update repo ({}), using the existing '
+                            'copy'.format(repr(e)))
+                return
             LOG.warning('Could not prepare repo ({}), '
                         ' recreating repo...'
                         ' Creating temporary repo'.format(repr(e)))
@@ -81,6 +151,68 @@ class SkillRepo(object):
                     self.__prepare_repo()
 
     def get_skill_data(self):
+        """ generates tuples of name, path, url, sha """
+        for name, path, url, sha, author, repo_id in \
+                self.get_index()['skills']:
+            yield name, path, url, sha
+
+    def get_index(self):
+        """
+        Catalog of the repo at the current commit of the branch
+
+        Loaded from the index file when it was written for the same
+        commit, otherwise built from the repo and saved for later runs.
+        """
+        sha = self.get_sha()
+        if self._index and self._index['sha'] == sha:
+            return self._index
+        index = self._load_index()
+        if not index or index['sha'] != sha:
+            index = self._build_index(sha)
+            self._save_index(index)
+        self._index = index
+        return index
+
+    def _load_index(self):
+        try:
+            with open(self.index_file) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(index, dict) or \
+                index.get('version') != INDEX_VERSION:
+            return None
+        return index
+
+    def _save_index(self, index):
+        tmp_file = self.index_file + '.tmp'
+        try:
+            with open(tmp_file, 'w') as f:
+                json.dump(index, f, separators=(',', ':'))
+            os.replace(tmp_file, self.index_file)
+        except OSError as e:
+            LOG.warning('Failed to save catalog index: {}'.format(repr(e)))
+
+    def _build_index(self, sha):
+        skills = []
+        for name, path, url, skill_sha in self._parse_skill_data():
+            try:
+                author = SkillEntry.extract_author(url)
+                repo_id = SkillEntry.extract_repo_id(url)
+            except IndexError:
+                author, repo_id = '', name
+            skills.append([name, path, url, skill_sha, author, repo_id])
+        return {
+            'version': INDEX_VERSION,
+            'sha': sha,
+            'skills': skills,
+            'defaults': [
+                [platform, skills] for platform, skills in
+                self._read_default_skill_names()
+            ]
+        }
+
+    def _parse_skill_data(self):
         """ generates tuples of name, path, url, sha """
         path_to_sha = {
             folder: sha for folder, sha in self.get_shas()
@@ -100,6 +232,15 @@ class SkillRepo(object):
                     locals().get('name', ''), i, e
                 ))
 
+    def get_sha(self):
+        """Commit sha of the remote branch the catalog is read from"""
+        sha = resolve_ref(self.path, 'origin/' + self.branch)
+        if sha:
+            return sha
+        git = Git(self.path)
+        with git_to_msm_exceptions():
+            return git.rev_parse('origin/' + self.branch).strip()
+
     def get_shas(self):
         git = Git(self.path)
         with git_to_msm_exceptions():
@@ -111,6 +252,10 @@ class SkillRepo(object):
             yield folder, sha
 
     def get_default_skill_names(self):
+        for platform, skills in self.get_index()['defaults']:
+            yield platform, skills
+
+    def _read_default_skill_names(self):
         for defaults_file in glob(join(self.path, 'DEFAULT-SKILLS*')):
             with open(defaults_file) as f:
                 skills = list(filter(
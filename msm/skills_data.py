@@ -2,28 +2,332 @@
     Functions related to manipulating the skills_data.json
 """
 
-from os.path import expanduser, isfile
 import json
+import os
+import time
+from os.path import expanduser, isfile, dirname, exists
+from tempfile import mkstemp
 
-def load_skills_data() -> dict:
+
+class TrackedEntry(dict):
+    """ A skill entry reporting changed fields to the store holding it """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.store = None
+
+    def _changed(self, *keys):
+        if self.store is not None:
+            self.store.mark_changed(self, keys)
+
+    def __setitem__(self, key, value):
+        if key not in self or self[key] != value:
+            super().__setitem__(key, value)
+            self._changed(key)
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._changed(key)
+
+    def pop(self, key, *args):
+        if key in self:
+            self._changed(key)
+        return super().pop(key, *args)
+
+    def popitem(self):
+        key, value = super().popitem()
+        self._changed(key)
+        return key, value
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def clear(self):
+        keys = list(self)
+        super().clear()
+        self._changed(*keys)
+
+
+class SkillsDataStore(dict):
+    """
+    skills_data with an index of the skill entries by name
+
+    Behaves like the dict stored in skills.json. The index follows
+    entries added or removed through the methods of the store and is
+    rebuilt when the 'skills' list is replaced or changes length.
+
+    Changed fields of entries are recorded in changes, names of removed
+    skills in removed, so dirty tells whether there is anything to save.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._index = None
+        self._indexed_list = None
+        self._indexed_len = 0
+        self.changes = {}
+        self._get_index()
+        self.mark_clean()
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._dirty = True
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._dirty = True
+
+    def pop(self, key, *args):
+        if key in self:
+            self._dirty = True
+        return super().pop(key, *args)
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self._dirty = True
+
+    @property
+    def dirty(self) -> bool:
+        skills = self.get('skills')
+        return self._dirty or skills is not self._saved_list or \
+            len(skills or []) != self._saved_len
+
+    def mark_clean(self):
+        """ Forget all changes, called once the data is saved """
+        self._dirty = False
+        self.changes = {}
+        self.removed = set()
+        self._saved_list = self.get('skills')
+        self._saved_len = len(self._saved_list or [])
+
+    def mark_changed(self, entry, keys):
+        self.changes.setdefault(entry.get('name'), set()).update(keys)
+        self._dirty = True
+
+    @property
+    def entries(self) -> list:
+        return self.setdefault('skills', [])
+
+    def _track(self, entry) -> TrackedEntry:
+        if not isinstance(entry, TrackedEntry):
+            entry = TrackedEntry(entry)
+        entry.store = self
+        return entry
+
+    def _get_index(self) -> dict:
+        skills = self.get('skills', [])
+        if self._index is None or skills is not self._indexed_list or \
+                len(skills) != self._indexed_len:
+            index = {}
+            for i, entry in enumerate(skills):
+                if getattr(entry, 'store', None) is not self:
+                    # Appended to the list directly
+                    entry = skills[i] = self._track(entry)
+                    self.mark_changed(entry, entry.keys())
+                index.setdefault(entry.get('name'), entry)
+            self._index = index
+            self._indexed_list = skills
+            self._indexed_len = len(skills)
+        return self._index
+
+    def get_entry(self, name) -> dict:
+        """ Find a skill entry by name or return None """
+        return self._get_index().get(name)
+
+    def names(self) -> set:
+        return set(self._get_index())
+
+    def add_entry(self, entry: dict) -> dict:
+        """ Add an entry and return the tracked version stored """
+        index = self._get_index()
+        entry = self._track(entry)
+        self.entries.append(entry)
+        index.setdefault(entry.get('name'), entry)
+        self._indexed_len += 1
+        self.mark_changed(entry, entry.keys())
+        return entry
+
+    def remove_entry(self, name):
+        """ Remove all entries of a skill """
+        if name not in self._get_index():
+            return
+        self.entries[:] = [e for e in self.entries if e.get('name') != name]
+        self._index = None
+        self.changes.pop(name, None)
+        self.removed.add(name)
+        self._dirty = True
+
+
+# Set to "sqlite" to keep skills data in an SQLite database
+BACKEND_ENV = 'MSM_SKILLS_DATA_BACKEND'
+
+
+def get_skills_data_file():
+    return expanduser('~/.mycroft/skills.json')
+
+
+def _get_sqlite_backend():
+    """ The SQLite backend if it is enabled in the environment """
+    if os.environ.get(BACKEND_ENV, 'json') != 'sqlite':
+        return None
+    from msm.sqlite_skills_data import SqliteSkillsData
+    return SqliteSkillsData()
+
+
+def load_skills_data() -> SkillsDataStore:
     """Contains info on how skills should be updated"""
-    skills_data_file = expanduser('~/.mycroft/skills.json')
+    backend = _get_sqlite_backend()
+    if backend:
+        return backend.load()
+    return load_json_skills_data()
+
+
+def write_skills_data(data: dict, compact=False):
+    """
+    Save data to skills.json or the enabled backend
+
+    Arguments:
+        compact: skip indentation, which is slow to write on SD cards
+    """
+    backend = _get_sqlite_backend()
+    if backend:
+        backend.write(data, compact)
+    else:
+        write_json_skills_data(data, compact)
+
+
+def merge_skills_data(saved: dict, data: dict) -> dict:
+    """ Apply the changes recorded in data to the saved skills data
+
+    Other processes may have saved their changes since data was loaded.
+    Only the entries data changed or removed are applied so their
+    changes are kept. Data without a record of its changes, like a
+    plain dict or a store whose skills list was replaced, and data
+    upgraded from an older version are returned unchanged to be saved
+    as they are.
+    """
+    if not isinstance(data, SkillsDataStore) or (
+            data._saved_list is not None and
+            data.get('skills') is not data._saved_list
+    ) or saved.get('version', 0) < data.get('version', 0):
+        return data
+    if not isinstance(saved, SkillsDataStore):
+        saved = SkillsDataStore(saved)
+    data.names()  # Records entries appended to the list directly
+    for key, value in data.items():
+        if key != 'skills':
+            saved[key] = value
+    for name in data.removed:
+        saved.remove_entry(name)
+    for name, keys in data.changes.items():
+        entry = data.get_entry(name)
+        saved_entry = saved.get_entry(name)
+        if entry is None:
+            continue
+        if saved_entry is None:
+            saved.add_entry(dict(entry))
+            continue
+        for key in keys:
+            if key in entry:
+                saved_entry[key] = entry[key]
+            else:
+                saved_entry.pop(key, None)
+    return saved
+
+
+def load_json_skills_data() -> SkillsDataStore:
+    skills_data_file = get_skills_data_file()
     if isfile(skills_data_file):
         try:
             with open(skills_data_file) as f:
-                return json.load(f)
+                return SkillsDataStore(json.load(f))
         except json.JSONDecodeError:
-            return {}
+            return SkillsDataStore()
     else:
-        return {}
+        return SkillsDataStore()
+
+
+def write_json_skills_data(data: dict, compact=False):
+    """
+    Atomically replace skills.json with data
+
+    The file is written to a temporary file which is synced to disk and
+    renamed over the old one so a crash never leaves a partial file.
+    """
+    skills_data_file = get_skills_data_file()
+    folder = dirname(skills_data_file)
+    os.makedirs(folder, exist_ok=True)
+    fd, tmp_file = mkstemp(prefix='.skills.json.', dir=folder)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            if compact:
+                json.dump(data, f, separators=(',', ':'))
+            else:
+                json.dump(data, f, indent=4, separators=(',',':'))
+            f.flush()
+            os.fsync(f.fileno())
+        _copy_permissions(skills_data_file, tmp_file)
+        os.replace(tmp_file, skills_data_file)
+    except BaseException:
+        if exists(tmp_file):
+            os.remove(tmp_file)
+        raise
+    _fsync_dir(folder)
+    if isinstance(data, SkillsDataStore):
+        data.mark_clean()
+
+
+def _copy_permissions(src, dest):
+    """ Keep the mode and owner of the file being replaced """
+    try:
+        stat = os.stat(src)
+    except OSError:
+        os.chmod(dest, 0o644)
+        return
+    os.chmod(dest, stat.st_mode & 0o7777)
+    try:
+        os.chown(dest, stat.st_uid, stat.st_gid)
+    except OSError:
+        pass
+
 
-def write_skills_data(data: dict):
-    skills_data_file = expanduser('~/.mycroft/skills.json')
-    with open(skills_data_file, 'w') as f:
-        json.dump(data, f, indent=4, separators=(',',':'))
+def _fsync_dir(folder):
+    """ Persist a rename in folder, not supported on all platforms """
+    try:
+        fd = os.open(folder, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
 
-def get_skill_entry(name, skills_data) -> dict:
-    """ Find a skill entry in the skills_data and returns it. """
+def get_skill_entry(name, skills_data=None) -> dict:
+    """ Find a skill entry in the skills_data and returns it.
+
+    Without skills_data the entry is looked up in the SQLite backend
+    if it is enabled, otherwise in skills.json.
+    """
+    if skills_data is None:
+        backend = _get_sqlite_backend()
+        if backend:
+            return backend.get_entry(name)
+        skills_data = load_json_skills_data()
+    if isinstance(skills_data, SkillsDataStore):
+        return skills_data.get_entry(name)
     for e in skills_data.get('skills', []):
         if e.get('name') == name:
             return e
@@ -40,7 +344,7 @@ def build_skill_entry(name, origin, beta) -> dict:
     Returns:
         populated skills entry
     """
-    entry = {}
+    entry = TrackedEntry()
     entry['name'] = name
     entry['origin'] = origin
     entry['beta'] = beta
@@ -51,5 +355,8 @@ def build_skill_entry(name, origin, beta) -> dict:
     return entry
 
 
-def skills_data_hash(data):
-    return hash(json.dumps(data, sort_keys=True))
+def mark_installed(entry):
+    """ Record a successful installation in a skill entry """
+    entry['installed'] = time.time()
+    entry['installation'] = 'installed'
+    entry['status'] = 'active'
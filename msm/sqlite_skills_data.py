@@ -0,0 +1,126 @@
+"""
+    SQLite backend for the skills data
+
+    Enabled by setting MSM_SKILLS_DATA_BACKEND=sqlite. The database runs
+    in WAL mode so processes reading skill state are never blocked by a
+    writer. skills.json is imported when it changed since it was last
+    seen and exported after every write, so tools reading the file keep
+    working.
+"""
+import json
+import os
+import sqlite3
+from contextlib import closing
+from os.path import expanduser, getmtime, isfile
+
+from msm.skills_data import (SkillsDataStore, get_skills_data_file,
+                             load_json_skills_data, write_json_skills_data)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS skills (
+    position INTEGER NOT NULL,
+    name TEXT,
+    origin TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS skills_name ON skills (name);
+CREATE INDEX IF NOT EXISTS skills_origin ON skills (origin);
+"""
+
+# Meta key holding the mtime of skills.json when it was last synced
+JSON_MTIME_KEY = '.json_mtime'
+
+
+class SqliteSkillsData(object):
+    def __init__(self, db_file=None, json_file=None):
+        self.db_file = db_file or expanduser('~/.mycroft/skills.db')
+        self.json_file = json_file or get_skills_data_file()
+
+    def connect(self):
+        os.makedirs(os.path.dirname(self.db_file), exist_ok=True)
+        conn = sqlite3.connect(self.db_file, timeout=30,
+                               isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.executescript(SCHEMA)
+        return conn
+
+    def _json_mtime(self):
+        return repr(getmtime(self.json_file)) if isfile(self.json_file) \
+            else ''
+
+    def _import_json(self, conn):
+        """ Load skills.json if it changed since it was last synced """
+        json_mtime = self._json_mtime()
+        row = conn.execute('SELECT value FROM meta WHERE key = ?',
+                           (JSON_MTIME_KEY,)).fetchone()
+        if not json_mtime or (row and row[0] == json_mtime):
+            return
+        self._store(conn, load_json_skills_data(), json_mtime)
+
+    def _store(self, conn, data, json_mtime):
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute('DELETE FROM meta')
+            conn.execute('DELETE FROM skills')
+            conn.executemany('INSERT INTO meta VALUES (?, ?)', [
+                (key, json.dumps(value)) for key, value in data.items()
+                if key != 'skills'
+            ] + [(JSON_MTIME_KEY, json_mtime)])
+            conn.executemany('INSERT INTO skills VALUES (?, ?, ?, ?)', [
+                (i, entry.get('name'), entry.get('origin'),
+                 json.dumps(entry))
+                for i, entry in enumerate(data.get('skills', []))
+            ])
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def load(self) -> SkillsDataStore:
+        with closing(self.connect()) as conn:
+            self._import_json(conn)
+            data = {
+                key: json.loads(value) for key, value in conn.execute(
+                    'SELECT key, value FROM meta WHERE key != ?',
+                    (JSON_MTIME_KEY,)
+                )
+            }
+            skills = [
+                json.loads(value) for value, in conn.execute(
+                    'SELECT data FROM skills ORDER BY position'
+                )
+            ]
+        if skills or 'version' in data:
+            data['skills'] = skills
+        return SkillsDataStore(data)
+
+    def write(self, data: dict, compact=False):
+        """ Save data to the database and export it to skills.json """
+        write_json_skills_data(data, compact)
+        with closing(self.connect()) as conn:
+            self._store(conn, data, self._json_mtime())
+
+    def get_entry(self, name) -> dict:
+        """ Look up an entry by name without loading all skills """
+        with closing(self.connect()) as conn:
+            self._import_json(conn)
+            row = conn.execute(
+                'SELECT data FROM skills WHERE name = ? '
+                'ORDER BY position LIMIT 1', (name,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_entries_by_origin(self, origin) -> list:
+        with closing(self.connect()) as conn:
+            self._import_json(conn)
+            return [
+                json.loads(value) for value, in conn.execute(
+                    'SELECT data FROM skills WHERE origin = ? '
+                    'ORDER BY position', (origin,)
+                )
+            ]
@@ -0,0 +1,83 @@
+# Copyright (c) 2018 Mycroft AI, Inc.
+#
+# This file is part of Mycroft Skills Manager
+# (see https://github.com/MatthewScholefield/mycroft-light).
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+import os
+from contextlib import contextmanager
+from threading import BoundedSemaphore
+
+# Stages of installing or updating a skill
+NETWORK = 'network'  # git clone and fetch
+GIT = 'git'  # git commands working on the local repo
+PIP = 'pip'  # pip install of requirements.txt
+SHELL = 'shell'  # requirements.sh
+
+STAGES = (NETWORK, GIT, PIP, SHELL)
+
+
+def default_limits(cpu_count=None):
+    """
+    Concurrency of each stage for a machine with cpu_count cores
+
+    Network operations mostly wait so they can exceed the core count.
+    pip and requirements.sh (usually apt) modify shared system state and
+    lock it themselves, so they run one at a time.
+    """
+    cpu_count = cpu_count or os.cpu_count() or 1
+    return {
+        NETWORK: max(4, 2 * cpu_count),
+        GIT: cpu_count,
+        PIP: 1,
+        SHELL: 1
+    }
+
+
+class StageLimits(object):
+    """
+    Limits how many skills can be in each stage at the same time
+
+    Arguments:
+        **limits: overrides of default_limits(), ie. network=2
+    """
+
+    def __init__(self, **limits):
+        unknown = set(limits) - set(STAGES)
+        if unknown:
+            raise ValueError('Unknown stages: ' + ', '.join(sorted(unknown)))
+        self.limits = default_limits()
+        self.limits.update(limits)
+        self.semaphores = {
+            stage: BoundedSemaphore(max(1, limit))
+            for stage, limit in self.limits.items()
+        }
+
+    @contextmanager
+    def stage(self, name):
+        with self.semaphores[name]:
+            yield
+
+    @property
+    def workers(self):
+        """Threads needed to keep every stage busy"""
+        return sum(max(1, limit) for limit in self.limits.values())
+
+
+# Used by skill entries not attached to a MycroftSkillsManager
+DEFAULT_LIMITS = StageLimits()
@@ -19,28 +19,214 @@
 # KIND, either express or implied.  See the License for the
 # specific language governing permissions and limitations
 # under the License.
-import git
-from os.path import exists
-from os import chmod
-from fasteners.process_lock import InterProcessLock
+from contextlib import contextmanager
+from hashlib import sha1
+from os.path import abspath, exists, join
+from os import chmod, makedirs
+from threading import Lock, RLock, local
 
-class Git(git.cmd.Git):
-    """Prevents asking for password for private repos"""
+# Folder of the locks of single skills and skill repos
+LOCKS_DIR = '/tmp/msm_locks'
+
+# {lock file: lock of this process}, see get_thread_lock
+_thread_locks = {}
+_thread_locks_lock = Lock()
+
+
+class Git(object):
+    """
+    git command runner that prevents asking for password for private repos
+
+    GitPython is imported when the first runner is created since importing
+    it is slow and queries rarely need git.
+    """
     env = {'GIT_ASKPASS': 'echo'}
 
+    def __init__(self, working_dir=None):
+        import git
+        self.git = git.cmd.Git(working_dir)
+
     def __getattr__(self, item):
         def wrapper(*args, **kwargs):
             env = kwargs.pop('env', {})
             env.update(self.env)
-            return super(Git, self).__getattr__(item)(*args, env=env, **kwargs)
+            return getattr(self.git, item)(*args, env=env, **kwargs)
         return wrapper
 
 
-class MsmProcessLock(InterProcessLock):
+def create_lock_file(lock_path):
+    """Create a lock file every user can lock"""
+    if not exists(lock_path):
+        lock_file = open(lock_path, '+w')
+        lock_file.close()
+        chmod(lock_path, 0o777)
+
+
+def get_thread_lock(lock_path, lock_type=Lock):
+    """
+    Lock shared by the threads of this process locking lock_path
+
+    File locks don't exclude threads of the same process, and releasing
+    one handle of a file unlocks every handle of the process, so threads
+    take this lock before the file lock.
+    """
+    with _thread_locks_lock:
+        if lock_path not in _thread_locks:
+            _thread_locks[lock_path] = lock_type()
+        return _thread_locks[lock_path]
+
+
+class MsmProcessLock(object):
+    """
+    Reader/writer lock shared by all msm processes
+
+    Queries hold it shared so they can run while skills are installed,
+    commits of skills.json hold it exclusively. Entering it with a
+    with statement takes it exclusively like the old process lock.
+
+    The lock is reentrant per thread: taking it again while holding it
+    exclusively only counts the hold, so manager calls can run inside
+    with msm.lock. Taking it exclusively while holding it shared raises
+    a RuntimeError since that can deadlock with other processes.
+    """
+    # Hold of each thread, shared by all instances since they lock the
+    # same file and releasing any handle of it unlocks the process
+    _hold = local()
+
     def __init__(self):
+        from fasteners.process_lock import InterProcessReaderWriterLock
         lock_path = '/tmp/msm_lock'
-        if not exists(lock_path):
-            lock_file = open(lock_path, '+w')
-            lock_file.close()
-            chmod(lock_path, 0o777)
-        super().__init__(lock_path)
+        create_lock_file(lock_path)
+        self.process_lock = InterProcessReaderWriterLock(lock_path)
+        # The file lock is per process so threads are serialized here
+        self.thread_lock = get_thread_lock(lock_path, RLock)
+
+    def acquire_read_lock(self, *args, **kwargs):
+        return self.process_lock.acquire_read_lock(*args, **kwargs)
+
+    def release_read_lock(self):
+        self.process_lock.release_read_lock()
+
+    def acquire_write_lock(self, *args, **kwargs):
+        return self.process_lock.acquire_write_lock(*args, **kwargs)
+
+    def release_write_lock(self):
+        self.process_lock.release_write_lock()
+
+    def _acquire(self, write):
+        hold = self._hold
+        if getattr(hold, 'count', 0):
+            if write and not hold.write:
+                raise RuntimeError('The msm lock is held shared by this '
+                                   'thread and can\'t be taken exclusively')
+            hold.count += 1
+            return
+        self.thread_lock.acquire()
+        try:
+            if write:
+                self.process_lock.acquire_write_lock()
+            else:
+                self.process_lock.acquire_read_lock()
+        except BaseException:
+            self.thread_lock.release()
+            raise
+        hold.count, hold.write, hold.process_lock = 1, write, \
+            self.process_lock
+
+    def _release(self):
+        hold = self._hold
+        hold.count -= 1
+        if hold.count:
+            return
+        try:
+            if hold.write:
+                hold.process_lock.release_write_lock()
+            else:
+                hold.process_lock.release_read_lock()
+        finally:
+            hold.process_lock = None
+            self.thread_lock.release()
+
+    @contextmanager
+    def read_lock(self):
+        self._acquire(write=False)
+        try:
+            yield
+        finally:
+            self._release()
+
+    @contextmanager
+    def write_lock(self):
+        self._acquire(write=True)
+        try:
+            yield
+        finally:
+            self._release()
+
+    def __enter__(self):
+        self._acquire(write=True)
+        return self
+
+    def __exit__(self, *args):
+        self._release()
+
+
+class FileLock(object):
+    """Exclusive lock of a file shared by all processes and threads"""
+    def __init__(self, path):
+        from fasteners.process_lock import InterProcessLock
+        self.process_lock = InterProcessLock(path)
+        # Not reentrant so it can be released by another thread
+        self.thread_lock = get_thread_lock(path)
+
+    def acquire(self, blocking=True, timeout=None):
+        thread_timeout = -1 if timeout is None or not blocking else timeout
+        if not self.thread_lock.acquire(blocking, thread_timeout):
+            return False
+        try:
+            if self.process_lock.acquire(blocking=blocking,
+                                         timeout=timeout):
+                return True
+        except BaseException:
+            self.thread_lock.release()
+            raise
+        self.thread_lock.release()
+        return False
+
+    def release(self):
+        try:
+            self.process_lock.release()
+        finally:
+            self.thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *args):
+        self.release()
+
+
+def get_lock_file(name):
+    """Path of a lock file in LOCKS_DIR every user can lock"""
+    makedirs(LOCKS_DIR, exist_ok=True)
+    try:
+        chmod(LOCKS_DIR, 0o777)
+    except OSError:
+        pass
+    lock_path = join(LOCKS_DIR, name + '.lock')
+    create_lock_file(lock_path)
+    return lock_path
+
+
+class SkillLock(FileLock):
+    """Lock held by processes installing, updating or removing a skill"""
+    def __init__(self, name):
+        super().__init__(get_lock_file(name))
+
+
+class RepoLock(FileLock):
+    """Lock held by processes updating the skills repo at path"""
+    def __init__(self, path):
+        path_hash = sha1(abspath(path).encode()).hexdigest()[:16]
+        super().__init__(get_lock_file('repo-' + path_hash))
@@ -0,0 +1,131 @@
+# Copyright (c) 2018 Mycroft AI, Inc.
+#
+# This file is part of Mycroft Skills Manager
+# (see https://github.com/MatthewScholefield/mycroft-light).
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""
+    Local directory of prebuilt wheels for skill requirements
+
+    Built with "msm wheelhouse build". While it contains wheels, pip
+    installs skill requirements from it without contacting the package
+    index and only falls back to the index if something is missing.
+"""
+import logging
+import os
+import sys
+from os.path import expanduser, isdir, join
+from subprocess import PIPE, Popen
+
+from typing import Dict, List
+
+from msm.exceptions import PipRequirementsException
+from msm.skill_entry import PIP_NO_INDEX, SkillEntry
+from msm.stage_limits import DEFAULT_LIMITS, NETWORK, PIP
+
+LOG = logging.getLogger(__name__)
+
+DEFAULT_WHEELHOUSE = expanduser('~/.mycroft/wheelhouse')
+
+
+class Wheelhouse(object):
+    def __init__(self, path=None):
+        self.path = path or DEFAULT_WHEELHOUSE
+
+    @property
+    def requirements_dir(self):
+        """Folder with the requirements.txt of every skill"""
+        return join(self.path, 'requirements')
+
+    def is_available(self):
+        return isdir(self.path) and any(
+            filename.endswith('.whl') for filename in os.listdir(self.path)
+        )
+
+    def get_pip_args(self):
+        """Options to add to pip install when the wheelhouse exists"""
+        if not self.is_available():
+            return []
+        return ['--find-links', self.path, PIP_NO_INDEX]
+
+    def _write_requirements(self, skill):
+        requirements = skill.read_file('requirements.txt')
+        if not requirements or not requirements.strip():
+            return None
+        filename = join(self.requirements_dir, skill.name + '.txt')
+        with open(filename, 'w') as f:
+            f.write(requirements)
+        return filename
+
+    def build(self, skills, constraints=None, stage_limits=None):
+        # type: (List[SkillEntry], str, object) -> Dict[str, Exception]
+        """
+        Build wheels for the requirements.txt of all skills
+
+        Returns:
+            {skill_name: error} of skills whose wheels couldn't be built
+        """
+        from multiprocessing.pool import ThreadPool
+        stage_limits = stage_limits or DEFAULT_LIMITS
+        constraints = SkillEntry.find_constraints(constraints)
+        if constraints is False:
+            raise PipRequirementsException(
+                2, '', 'Constraints file not found'
+            )
+        os.makedirs(self.requirements_dir, exist_ok=True)
+
+        def write_requirements(skill):
+            with stage_limits.stage(NETWORK):
+                return skill.name, self._write_requirements(skill)
+
+        with ThreadPool(stage_limits.limits[NETWORK]) as tp:
+            files = [(name, filename) for name, filename in
+                     tp.map(write_requirements, skills) if filename]
+
+        LOG.info('Building wheels for {} skills'.format(len(files)))
+        with stage_limits.stage(PIP):
+            try:
+                self._run_pip_wheel([f for _, f in files], constraints)
+                return {}
+            except PipRequirementsException:
+                LOG.warning('Building all wheels together failed, building '
+                            'them by skill')
+            failures = {}
+            for name, filename in files:
+                try:
+                    self._run_pip_wheel([filename], constraints)
+                except PipRequirementsException as e:
+                    LOG.error('Failed to build wheels for {}: {}'.format(
+                        name, repr(e)
+                    ))
+                    failures[name] = e
+        return failures
+
+    def _run_pip_wheel(self, requirements_files, constraints):
+        if not requirements_files:
+            return
+        pip_args = [sys.executable, '-m', 'pip', 'wheel',
+                    '--wheel-dir', self.path, '--find-links', self.path]
+        for requirements_file in requirements_files:
+            pip_args += ['-r', requirements_file]
+        if constraints:
+            pip_args += ['-c', constraints]
+        proc = Popen(pip_args, stdout=PIPE, stderr=PIPE)
+        stdout, stderr = proc.communicate()
+        SkillEntry.check_pip_result(pip_args, proc.returncode,
+                                    stdout.decode(), stderr.decode())
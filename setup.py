@@ -25,7 +25,7 @@ setup(
     name='msm',
     version='0.6.2',
     packages=['msm'],
-    install_requires=['GitPython', 'typing', 'fasteners'],
+    install_requires=['GitPython', 'typing', 'fasteners>=0.16'],
     url='https://github.com/MycroftAI/mycroft-skills-manager',
     license='Apache-2.0',
     author='jarbasAI, Matthew Scholefield',
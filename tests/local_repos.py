@@ -0,0 +1,174 @@
+# Copyright (c) 2018 Mycroft AI, Inc.
+#
+# This file is part of Mycroft Skills Manager
+# (see https://github.com/MatthewScholefield/mycroft-light).
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""
+    Helpers creating local git repos so tests can run without network
+"""
+import os
+import subprocess
+from os import makedirs
+from os.path import join, dirname
+from shutil import rmtree
+from tempfile import mkdtemp
+from zipfile import ZipFile
+
+from msm import MycroftSkillsManager, SkillRepo
+
+GIT_IDENTITY = ['-c', 'user.name=msm', '-c', 'user.email=msm@localhost']
+
+
+def git(path, *args):
+    return subprocess.check_output(
+        ['git'] + GIT_IDENTITY + list(args), cwd=path
+    ).decode().strip()
+
+
+def write_files(path, files):
+    for filename, content in files.items():
+        file_path = join(path, filename)
+        makedirs(dirname(file_path), exist_ok=True)
+        with open(file_path, 'w') as f:
+            f.write(content)
+
+
+def commit(path, files, message='update'):
+    """Commit the given {filename: content} and return the new sha"""
+    write_files(path, files)
+    git(path, 'add', *files)
+    git(path, 'commit', '-q', '-m', message)
+    return git(path, 'rev-parse', 'HEAD')
+
+
+def create_skill_repo(path, files=None):
+    """Create a skill repo at path and return the sha of its commit"""
+    makedirs(path)
+    git(path, 'init', '-q', '-b', 'master')
+    return commit(path, dict({'__init__.py': ''}, **(files or {})))
+
+
+def create_catalog_repo(path, skills, defaults=None, branch='test-repo'):
+    """
+    Create a repo laid out like mycroft-skills
+
+    Arguments:
+        skills: {name: (url, sha)} of submodules to add
+        defaults: {platform: [names]} written to DEFAULT-SKILLS files
+    """
+    makedirs(path)
+    git(path, 'init', '-q', '-b', branch)
+    modules = ''
+    for name, (url, sha) in sorted(skills.items()):
+        modules += '[submodule "{0}"]\n\tpath = {0}\n\turl = {1}\n'.format(
+            name, url
+        )
+        git(path, 'update-index', '--add', '--cacheinfo',
+            '160000,{},{}'.format(sha, name))
+    files = {'.gitmodules': modules}
+    for platform, names in (defaults or {}).items():
+        filename = 'DEFAULT-SKILLS'
+        if platform != 'default':
+            filename += '.' + platform
+        files[filename] = '\n'.join(names) + '\n'
+    return commit(path, files)
+
+
+def create_wheel(folder, name, version='1.0'):
+    """Create a pure python wheel of an empty package, returning its path"""
+    module = name.replace('-', '_')
+    dist_info = '{}-{}.dist-info/'.format(module, version)
+    path = join(folder, '{}-{}-py3-none-any.whl'.format(module, version))
+    makedirs(folder, exist_ok=True)
+    with ZipFile(path, 'w') as wheel:
+        wheel.writestr(module + '/__init__.py', '')
+        wheel.writestr(dist_info + 'METADATA', 'Metadata-Version: 2.1\n'
+                       'Name: {}\nVersion: {}\n'.format(name, version))
+        wheel.writestr(dist_info + 'WHEEL', 'Wheel-Version: 1.0\n'
+                       'Root-Is-Purelib: true\nTag: py3-none-any\n')
+        wheel.writestr(dist_info + 'RECORD', '')
+    return path
+
+
+class CountingRepo(SkillRepo):
+    """Skill repo serving fixed data that counts repo updates"""
+    def __init__(self, path):
+        super().__init__(path)
+        self.sha = 'a' * 40
+        self.updates = 0
+
+    def update(self):
+        self.updates += 1
+
+    def get_sha(self):
+        return self.sha
+
+    def get_skill_data(self):
+        yield ('skill-a', 'skill-a', 'https://github.com/user/skill-a',
+               'b' * 40)
+        yield ('skill-b', 'skill-b', 'https://github.com/user/skill-b',
+               'c' * 40)
+
+    def get_default_skill_names(self):
+        yield 'default', ['skill-a']
+
+
+class TempHomeTest(object):
+    """
+    Base of tests run in a temporary folder that is also used as HOME,
+    so skills.json, caches and sockets stay out of the real home folder
+    """
+    def setup(self):
+        self.root = mkdtemp()
+        self.home = os.environ.get('HOME')
+        os.environ['HOME'] = self.root
+
+    def teardown(self):
+        if self.home is None:
+            del os.environ['HOME']
+        else:
+            os.environ['HOME'] = self.home
+        rmtree(self.root)
+
+    def create_skills(self, skills):
+        """
+        Create skill repos in the testuser folder
+
+        Arguments:
+            skills: {name: files} passed to create_skill_repo
+        Returns:
+            {name: (url, sha)} as taken by create_catalog
+        """
+        created = {}
+        for name, files in skills.items():
+            url = join(self.root, 'testuser', name)
+            created[name] = (url, create_skill_repo(url, files))
+        return created
+
+    def create_catalog(self, skills, defaults=None):
+        """Create the catalog repo used by create_msm"""
+        create_catalog_repo(join(self.root, 'catalog'), skills, defaults)
+
+    def create_msm(self, skills_dir='skills', **kwargs):
+        """Skills manager using the catalog repo and a folder of root"""
+        kwargs.setdefault('repo', SkillRepo(
+            join(self.root, 'repo'), join(self.root, 'catalog'), 'test-repo'
+        ))
+        return MycroftSkillsManager(skills_dir=join(self.root, skills_dir),
+                                    **kwargs)
@@ -0,0 +1,99 @@
+# Copyright (c) 2018 Mycroft AI, Inc.
+#
+# This file is part of Mycroft Skills Manager
+# (see https://github.com/MatthewScholefield/mycroft-light).
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+import os
+from functools import partial
+from http.server import HTTPServer, SimpleHTTPRequestHandler
+from os.path import join, exists
+from shutil import move
+from threading import Thread
+
+from msm.git_reader import get_head_sha, get_remote_url
+from local_repos import TempHomeTest
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class TestArtifacts(TempHomeTest):
+    def setup(self):
+        super().setup()
+        skills = self.create_skills({'skill-a': {'README.md': 'Skill A'}})
+        self.url, self.sha = skills['skill-a']
+        self.create_catalog(skills, {'default': ['skill-a']})
+        self.artifacts = join(self.root, 'artifacts')
+
+    def install_offline(self, artifacts):
+        move(self.url, self.url + '.offline')
+        msm = self.create_msm('device', artifacts=artifacts)
+        msm.install('skill-a')
+        skill = msm.find_skill('skill-a')
+        assert get_head_sha(skill.path) == self.sha
+        assert get_remote_url(skill.path) == self.url
+
+    def read_offline(self, artifacts):
+        move(self.url, self.url + '.offline')
+        msm = self.create_msm('device', artifacts=artifacts)
+        skill = msm.find_skill('skill-a')
+        assert skill.read_file('README.md') == 'Skill A'
+        assert skill.read_file('missing.txt') is None
+
+    def test_bundle(self):
+        assert self.create_msm('builder').export_bundles(self.artifacts)
+        assert exists(join(self.artifacts, self.sha + '.bundle'))
+        self.install_offline(self.artifacts)
+
+    def test_tarball(self):
+        builder = self.create_msm('builder')
+        builder.install('skill-a')
+        assert builder.export_bundles(self.artifacts, 'tar.gz')
+        assert exists(join(self.artifacts, self.sha + '.tar.gz'))
+        self.install_offline(self.artifacts)
+
+    def test_read_bundle(self):
+        self.create_msm('builder').export_bundles(self.artifacts)
+        self.read_offline(self.artifacts)
+
+    def test_read_tarball(self):
+        self.create_msm('builder').export_bundles(self.artifacts, 'tar.gz')
+        self.read_offline(self.artifacts)
+
+    def test_http(self):
+        self.create_msm('builder').export_bundles(self.artifacts)
+        server = HTTPServer(('127.0.0.1', 0), partial(
+            QuietHandler, directory=self.artifacts
+        ))
+        Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            self.install_offline('http://127.0.0.1:{}/'.format(
+                server.server_port
+            ))
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_falls_back_to_clone(self):
+        os.makedirs(self.artifacts)
+        msm = self.create_msm('device', artifacts=self.artifacts)
+        msm.install('skill-a')
+        assert msm.find_skill('skill-a').is_local
@@ -0,0 +1,148 @@
+# Copyright (c) 2018 Mycroft AI, Inc.
+#
+# This file is part of Mycroft Skills Manager
+# (see https://github.com/MatthewScholefield/mycroft-light).
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+import asyncio
+import threading
+import time
+from os.path import join, exists
+
+import pytest
+
+from msm import AsyncMycroftSkillsManager
+from msm.async_skills_manager import run_process
+from msm.exceptions import AlreadyInstalled, SkillModified
+from msm.util import SkillLock
+from local_repos import TempHomeTest
+
+
+class TestAsyncMycroftSkillsManager(TempHomeTest):
+    def setup(self):
+        super().setup()
+        script = {'requirements.sh': 'touch installed\n'}
+        self.create_catalog(self.create_skills({
+            'skill-a': script, 'skill-b': script
+        }), {'default': ['skill-a']})
+        self.msm = self.create_msm()
+        self.amsm = AsyncMycroftSkillsManager(self.msm)
+        self.loop = asyncio.new_event_loop()
+
+    def teardown(self):
+        self.loop.close()
+        super().teardown()
+
+    def run(self, coro):
+        return self.loop.run_until_complete(coro)
+
+    def test_install_defaults(self):
+        assert self.run(self.amsm.install_defaults()) == [True]
+        skill = self.msm.find_skill('skill-a')
+        assert skill.is_local
+        assert exists(join(skill.path, 'installed'))
+        assert exists(join(skill.path, '__init__.py'))
+        entry = self.msm.skills_data.get_entry('skill-a')
+        assert entry['origin'] == 'default'
+        assert entry['installation'] == 'installed'
+        assert not self.msm.find_skill('skill-b').is_local
+
+    def test_install_and_update(self):
+        self.run(self.amsm.install('skill-b'))
+        with pytest.raises(AlreadyInstalled):
+            self.run(self.amsm.install('skill-b'))
+        assert self.run(self.amsm.update('skill-b')) is False
+        assert self.run(self.amsm.update_all()) == [True]
+
+        skill = self.msm.find_skill('skill-b')
+        with open(join(skill.path, '__init__.py'), 'w') as f:
+            f.write('# Changed')
+        with pytest.raises(SkillModified):
+            self.run(self.amsm.update(skill))
+
+    def test_writes_skills_data_off_loop(self):
+        threads = []
+        write_skills_data = self.msm.write_skills_data
+
+        def write():
+            threads.append(threading.current_thread())
+            write_skills_data()
+        self.msm.write_skills_data = write
+        self.run(self.amsm.install('skill-b'))
+        self.run(self.amsm.update('skill-b'))
+        self.run(self.amsm.update_all())
+        assert len(threads) == 3
+        assert threading.main_thread() not in threads
+
+    def test_cancel_waiting_for_lock(self):
+        lock = SkillLock('skill-a')
+        assert lock.acquire(blocking=False)
+        try:
+            async def run():
+                task = asyncio.ensure_future(self.amsm._lock_skill(
+                    self.msm.find_skill('skill-a')
+                ))
+                await asyncio.sleep(0.05)
+                task.cancel()
+                with pytest.raises(asyncio.CancelledError):
+                    await task
+            self.run(run())
+        finally:
+            lock.release()
+        assert lock.acquire(blocking=False)
+        lock.release()
+
+    def test_loads_skills_data_off_loop(self):
+        threads = []
+        sync_skills_data = self.msm.sync_skills_data
+
+        def sync():
+            threads.append(threading.current_thread())
+            sync_skills_data()
+        self.msm.sync_skills_data = sync
+        self.run(self.amsm.install('skill-b'))
+        self.msm.skills_data = None
+        self.run(self.amsm.update('skill-b'))
+        self.msm.skills_data = None
+        self.run(self.amsm.update_all())
+        assert len(threads) == 3
+        assert threading.main_thread() not in threads
+
+    def test_cancel_single_skill(self):
+        async def wait(skill):
+            await asyncio.sleep(0.5 if skill.name == 'skill-a' else 0)
+            return skill.name
+
+        async def run():
+            tasks = self.amsm.schedule(wait, await self.amsm.list())
+            tasks['skill-a'].cancel()
+            assert await tasks['skill-b'] == 'skill-b'
+            with pytest.raises(asyncio.CancelledError):
+                await tasks['skill-a']
+        self.run(run())
+
+    def test_cancel_kills_process(self):
+        async def run():
+            task = asyncio.ensure_future(run_process('sleep', '10'))
+            await asyncio.sleep(0.1)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+        start = time.time()
+        self.run(run())
+        assert time.time() - start < 5
@@ -0,0 +1,107 @@
+# Copyright (c) 2018 Mycroft AI, Inc.
+#
+# This file is part of Mycroft Skills Manager
+# (see https://github.com/MatthewScholefield/mycroft-light).
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+import os
+from os.path import exists, join
+from threading import Thread
+
+import pytest
+
+from msm.__main__ import (create_daemon, create_msm, create_parser, main,
+                          run_action)
+from msm.daemon import MsmDaemon, send_command
+from msm.exceptions import MsmException
+from local_repos import TempHomeTest
+
+
+class TestDaemon(TempHomeTest):
+    def setup(self):
+        super().setup()
+        self.socket = join(self.root, 'msm.sock')
+        self.daemon = None
+        self.cwd = os.getcwd()
+
+    def teardown(self):
+        if self.daemon:
+            self.daemon.shutdown()
+            self.daemon.server_close()
+        os.chdir(self.cwd)
+        super().teardown()
+
+    def start(self, daemon):
+        self.daemon = daemon
+        Thread(target=daemon.serve_forever, daemon=True).start()
+
+    def test_protocol(self):
+        def run_command(args, cwd, printer):
+            printer(' '.join(args))
+            printer(cwd)
+            return 3
+        self.start(MsmDaemon(self.socket, run_command))
+
+        lines = []
+        assert send_command(self.socket, ['a', 'b'], lines.append,
+                            cwd='/work') == 3
+        assert lines == ['a b', '/work']
+        with pytest.raises(MsmException):
+            MsmDaemon(self.socket, run_command)
+
+    def test_no_daemon(self):
+        assert send_command(self.socket, ['list']) is None
+        open(self.socket, 'w').close()
+        assert send_command(self.socket, ['list']) is None
+        MsmDaemon(self.socket, None).server_close()
+        assert not exists(self.socket)
+
+    def test_commands(self):
+        self.create_catalog(self.create_skills({
+            'skill-a': None, 'skill-b': None
+        }))
+        self.start(create_daemon(self.socket))
+
+        def msm(*args):
+            lines = []
+            code = main(['-s', self.socket, '-u', join(self.root, 'catalog'),
+                         '-b', 'test-repo', '-c', 'repo', '-d', 'skills',
+                         '-r'] + list(args), lines.append)
+            return code, '\n'.join(lines)
+
+        os.chdir(self.root)
+        assert msm('list') == (0, 'skill-a\nskill-b')
+        assert msm('install', 'skill-a')[0] == 0
+        assert os.listdir(join(self.root, 'skills')) == ['skill-a.testuser']
+        assert msm('list', '-i') == (0, 'skill-a')
+        code, output = msm('install', 'skill-a')
+        assert output.startswith('AlreadyInstalled')
+        code, output = msm('serve')
+        assert output.startswith('MsmException: msm daemon already running')
+
+    def test_queries_keep_manager_options(self):
+        self.create_catalog(self.create_skills({'skill-a': None}))
+        options = ['-u', join(self.root, 'catalog'), '-b', 'test-repo',
+                   '-c', join(self.root, 'repo'),
+                   '-d', join(self.root, 'skills')]
+        msm = create_msm(create_parser().parse_args(options + ['list']))
+        msm.force_deps = msm.shallow_clones = True
+        assert run_action(msm, create_parser().parse_args(
+            options + ['list']
+        ), lambda line: None) == 0
+        assert msm.force_deps and msm.shallow_clones
@@ -0,0 +1,148 @@
+# Copyright (c) 2018 Mycroft AI, Inc.
+#
+# This file is part of Mycroft Skills Manager
+# (see https://github.com/MatthewScholefield/mycroft-light).
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+import asyncio
+
+import pytest
+
+from msm import (AsyncMycroftSkillsManager, DependencyCycle, SkillEntry,
+                 SkillRequirementsException)
+from msm.dependency_graph import DependencyGraph
+from local_repos import TempHomeTest
+
+
+class FakeSkill(object):
+    def __init__(self, name, deps):
+        self.name, self.deps = name, deps
+
+    def get_dependent_skills(self):
+        return self.deps
+
+
+class TestDependencyGraph(object):
+    def setup(self):
+        self.skills = {}
+        self.graph = DependencyGraph(lambda name: self.skills[name])
+
+    def add_skills(self, requirements):
+        for name, deps in requirements.items():
+            self.skills[name] = FakeSkill(name, deps)
+
+    def test_waves(self):
+        self.add_skills({
+            'a': ['b', 'c'], 'b': ['d'], 'c': ['d'], 'd': [], 'e': []
+        })
+        self.graph.add(self.skills['a'])
+        self.graph.add(self.skills['e'])
+        names = [[s.name for s in wave] for wave in self.graph.waves()]
+        assert names == [['d', 'e'], ['b', 'c'], ['a']]
+        names = [[s.name for s in wave] for wave in self.graph.waves('b')]
+        assert names == [['d'], ['b']]
+
+    def test_cycle(self):
+        self.add_skills({'a': ['b'], 'b': ['c'], 'c': ['a'], 'd': []})
+        self.graph.add(self.skills['d'])
+        with pytest.raises(DependencyCycle) as e:
+            self.graph.add(self.skills['a'])
+        assert e.value.cycle == ['a', 'b', 'c', 'a']
+        assert list(self.graph.skills) == ['d']
+
+    def test_reads_outside_lock(self):
+        self.add_skills({'a': ['b'], 'b': []})
+        get_dependent_skills = FakeSkill.get_dependent_skills
+
+        def read(skill):
+            assert not self.graph._lock.locked()
+            return get_dependent_skills(skill)
+        FakeSkill.get_dependent_skills = read
+        try:
+            self.graph.add(self.skills['a'])
+        finally:
+            FakeSkill.get_dependent_skills = get_dependent_skills
+        assert self.graph.dependencies == {'a': ['b'], 'b': []}
+
+    def test_install_once(self):
+        self.add_skills({'a': []})
+        installed = []
+        for _ in range(2):
+            self.graph.install_once(self.skills['a'], installed.append)
+        assert installed == [self.skills['a']]
+
+
+class TestInstallDependencies(TempHomeTest):
+    def setup(self):
+        super().setup()
+        self.install = SkillEntry.install
+        requirements = {
+            'skill-a': 'skill-b\nskill-c\n', 'skill-b': 'skill-d',
+            'skill-c': 'skill-d', 'skill-d': '',
+            'skill-x': 'skill-y', 'skill-y': 'skill-x'
+        }
+        self.create_catalog(self.create_skills({
+            name: {'skill_requirements.txt': reqs} if reqs else None
+            for name, reqs in requirements.items()
+        }), {'default': ['skill-a', 'skill-b']})
+        self.msm = self.create_msm()
+
+    def teardown(self):
+        SkillEntry.install = self.install
+        super().teardown()
+
+    def count_installs(self):
+        installs = []
+
+        def install(skill, *args, **kwargs):
+            installs.append(skill.name)
+            return self.install(skill, *args, **kwargs)
+        SkillEntry.install = install
+        return installs
+
+    def test_installs_each_dependency_once(self):
+        installs = self.count_installs()
+        self.msm.install('skill-a')
+        assert installs[:2] == ['skill-a', 'skill-d']
+        assert sorted(installs[2:]) == ['skill-b', 'skill-c']
+        assert all(s.is_local for s in self.msm.list()
+                   if s.name in ('skill-a', 'skill-b', 'skill-d'))
+
+    def test_install_defaults(self):
+        installs = self.count_installs()
+        assert all(self.msm.install_defaults())
+        assert sorted(installs) == ['skill-a', 'skill-b', 'skill-c',
+                                    'skill-d']
+
+    def test_cycle(self):
+        with pytest.raises(SkillRequirementsException):
+            self.msm.install('skill-x')
+        assert not self.msm.find_skill('skill-x').is_local
+
+    def test_async_install(self):
+        installs = self.count_installs()
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(
+                AsyncMycroftSkillsManager(self.msm).install('skill-a')
+            )
+        finally:
+            loop.close()
+        assert not installs
+        assert all(s.is_local for s in self.msm.list()
+                   if s.name in ('skill-a', 'skill-b', 'skill-c', 'skill-d'))
@@ -0,0 +1,75 @@
+# Copyright (c) 2018 Mycroft AI, Inc.
+#
+# This file is part of Mycroft Skills Manager
+# (see https://github.com/MatthewScholefield/mycroft-light).
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+from os.path import join
+from shutil import rmtree
+from tempfile import mkdtemp
+
+from msm import SkillEntry
+from msm.git_reader import get_remote_url, get_head_sha, resolve_ref
+from local_repos import create_skill_repo, git
+
+
+class TestGitReader(object):
+    def setup(self):
+        self.root = mkdtemp()
+        self.path = join(self.root, 'skill')
+        self.sha = create_skill_repo(self.path)
+        git(self.path, 'remote', 'add', 'origin',
+            'https://github.com/user/skill.git')
+
+    def teardown(self):
+        rmtree(self.root)
+
+    def test_get_remote_url(self):
+        assert get_remote_url(self.path) == \
+            'https://github.com/user/skill.git'
+        assert get_remote_url(self.path, 'upstream') == ''
+        assert get_remote_url(self.root) is None
+
+    def test_quoted_config(self):
+        git(self.path, 'config', 'remote.origin.url', 'a "quoted" #url')
+        assert get_remote_url(self.path) == 'a "quoted" #url'
+
+    def test_includes_are_not_parsed(self):
+        git(self.path, 'config', 'include.path', 'other-config')
+        assert get_remote_url(self.path) is None
+        assert SkillEntry.find_git_url(self.path) == \
+            'https://github.com/user/skill.git'
+
+    def test_get_head_sha(self):
+        assert get_head_sha(self.path) == self.sha
+        git(self.path, 'checkout', '-q', '--detach')
+        assert get_head_sha(self.path) == self.sha
+
+    def test_packed_refs(self):
+        git(self.path, 'update-ref', 'refs/remotes/origin/master', self.sha)
+        git(self.path, 'pack-refs', '--all')
+        assert resolve_ref(self.path, 'origin/master') == self.sha
+        assert resolve_ref(self.path, 'master') == self.sha
+        assert resolve_ref(self.path, 'missing') is None
+
+    def test_worktree(self):
+        worktree = join(self.root, 'worktree')
+        git(self.path, 'worktree', 'add', '-q', '--detach', worktree)
+        assert get_head_sha(worktree) == self.sha
+        assert get_remote_url(worktree) == \
+            'https://github.com/user/skill.git'
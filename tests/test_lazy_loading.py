@@ -0,0 +1,84 @@
+# Copyright (c) 2018 Mycroft AI, Inc.
+#
+# This file is part of Mycroft Skills Manager
+# (see https://github.com/MatthewScholefield/mycroft-light).
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+import os
+import subprocess
+import sys
+from os.path import dirname, join
+
+from msm.skills_data import get_skill_entry
+from local_repos import CountingRepo, TempHomeTest
+
+
+class TestLazyLoading(TempHomeTest):
+    def setup(self):
+        super().setup()
+        self.repo = CountingRepo(join(self.root, 'repo'))
+        self.msm = self.create_msm(repo=self.repo)
+
+    def test_construction_does_no_work(self):
+        assert self.repo.updates == 0
+        assert self.msm._catalog is None
+        assert self.msm._skills_data is None
+        self.msm.write_skills_data()
+        assert not os.path.exists(join(self.root, '.mycroft'))
+
+    def test_loads_on_first_use(self):
+        assert self.msm.skills_data.get('version') == 1
+        assert self.repo.updates == 1
+        assert self.msm.skills_data is self.msm.skills_data
+
+    def test_warm(self):
+        assert self.msm.warm() is self.msm
+        assert self.msm._catalog is not None
+        assert self.msm._skills_data is not None
+        assert self.repo.updates == 1
+
+    def test_install_keeps_its_entry(self):
+        self.create_catalog(self.create_skills({'skill-c': None}))
+        msm = self.create_msm('device')
+        msm.install('skill-c', origin='voice')
+        assert get_skill_entry('skill-c', msm.skills_data)['origin'] == \
+            'voice'
+
+
+class TestDeferredImports(object):
+    def imported(self, code, modules):
+        """Which of modules are imported after running code"""
+        check = '{}\nimport sys\nprint(" ".join(m for m in {!r} ' \
+                'if m in sys.modules))'.format(code, modules)
+        output = subprocess.check_output(
+            [sys.executable, '-c', check],
+            cwd=dirname(dirname(os.path.abspath(__file__)))
+        )
+        return output.decode().split()
+
+    def test_cli_imports_no_heavy_modules(self):
+        assert self.imported('import msm.__main__', [
+            'git', 'fasteners', 'asyncio', 'multiprocessing.pool',
+            'difflib', 'packaging.requirements', 'urllib.request',
+            'msm.mycroft_skills_manager'
+        ]) == []
+
+    def test_manager_imports_no_git(self):
+        assert self.imported('from msm import MycroftSkillsManager', [
+            'git', 'fasteners', 'asyncio', 'difflib'
+        ]) == []
@@ -0,0 +1,153 @@
+# Copyright (c) 2018 Mycroft AI, Inc.
+#
+# This file is part of Mycroft Skills Manager
+# (see https://github.com/MatthewScholefield/mycroft-light).
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+import subprocess
+import sys
+from os.path import abspath, dirname
+from threading import Thread
+
+import pytest
+
+from msm.util import MsmProcessLock, SkillLock
+from local_repos import TempHomeTest
+
+HOLD_LOCK = '''
+import sys
+from msm.util import MsmProcessLock, SkillLock
+lock = {lock}
+with {context}:
+    print('locked', flush=True)
+    sys.stdin.read()
+'''
+
+PROBE_LOCK = '''
+from msm.util import MsmProcessLock
+print(MsmProcessLock().acquire_read_lock(blocking=False))
+'''
+
+
+def probe_read_lock():
+    """Whether another process can take the msm lock shared"""
+    output = subprocess.check_output(
+        [sys.executable, '-c', PROBE_LOCK],
+        cwd=dirname(dirname(abspath(__file__)))
+    )
+    return output.strip() == b'True'
+
+
+class TestLocks(object):
+    def hold(self, lock, context='lock'):
+        """Start a process holding a lock until its stdin is closed"""
+        process = subprocess.Popen(
+            [sys.executable, '-c', HOLD_LOCK.format(lock=lock,
+                                                    context=context)],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            cwd=dirname(dirname(abspath(__file__)))
+        )
+        assert process.stdout.readline() == b'locked\n'
+        return process
+
+    @staticmethod
+    def release(process):
+        process.stdin.close()
+        process.wait()
+
+    def test_queries_share_the_lock(self):
+        process = self.hold('MsmProcessLock()', 'lock.read_lock()')
+        lock = MsmProcessLock()
+        try:
+            assert lock.acquire_read_lock(blocking=False)
+            lock.release_read_lock()
+            assert not lock.acquire_write_lock(blocking=False)
+        finally:
+            self.release(process)
+        assert lock.acquire_write_lock(blocking=False)
+        lock.release_write_lock()
+
+    def test_commits_are_exclusive(self):
+        process = self.hold('MsmProcessLock()')
+        lock = MsmProcessLock()
+        try:
+            assert not lock.acquire_read_lock(blocking=False)
+        finally:
+            self.release(process)
+
+    def test_skill_locks_are_independent(self):
+        process = self.hold('SkillLock("skill-a")')
+        try:
+            assert not SkillLock('skill-a').acquire(blocking=False)
+            lock = SkillLock('skill-b')
+            assert lock.acquire(blocking=False)
+            lock.release()
+        finally:
+            self.release(process)
+
+    def test_skill_locks_exclude_threads(self):
+        first, second = SkillLock('skill-c'), SkillLock('skill-c')
+        assert first.acquire(blocking=False)
+        try:
+            acquired = []
+            thread = Thread(target=lambda: acquired.append(
+                second.acquire(blocking=False)
+            ))
+            thread.start()
+            thread.join()
+            assert acquired == [False]
+        finally:
+            first.release()
+        assert second.acquire(blocking=False)
+        second.release()
+
+    def test_lock_nests_in_lock(self):
+        lock = MsmProcessLock()
+        with lock, MsmProcessLock().read_lock():
+            with MsmProcessLock().write_lock():
+                pass
+            assert not probe_read_lock()
+        assert probe_read_lock()
+        with lock.read_lock():
+            with pytest.raises(RuntimeError):
+                with lock.write_lock():
+                    pass
+
+
+class TestConcurrentManagers(TempHomeTest):
+    def setup(self):
+        super().setup()
+        self.create_catalog(self.create_skills({
+            'skill-a': None, 'skill-b': None
+        }))
+
+    def test_keeps_changes_of_other_managers(self):
+        first, second = self.create_msm(), self.create_msm()
+        first.install('skill-a')
+        second.install('skill-b')
+        assert self.create_msm().skills_data.names() == {
+            'skill-a', 'skill-b'
+        }
+
+    def test_install_inside_lock(self):
+        msm = self.create_msm()
+        with msm.lock:
+            msm.install('skill-a')
+            assert not probe_read_lock()
+        assert probe_read_lock()
+        assert self.create_msm().skills_data.names() == {'skill-a'}
@@ -0,0 +1,88 @@
+# Copyright (c) 2018 Mycroft AI, Inc.
+#
+# This file is part of Mycroft Skills Manager
+# (see https://github.com/MatthewScholefield/mycroft-light).
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+import os
+from os.path import join, exists
+from shutil import move
+
+from msm import SkillEntry
+from msm.git_reader import get_head_sha, get_remote_url
+from local_repos import CountingRepo, TempHomeTest, commit
+
+
+class TestObjectStore(TempHomeTest):
+    def setup(self):
+        super().setup()
+        self.repo_path, self.sha = self.create_skills({
+            'skill-a': None
+        })['skill-a']
+        self.url = 'file://' + self.repo_path
+        self.store_path = join(self.root, 'objects')
+
+    def create_skill(self, skills_dir='skills'):
+        msm = self.create_msm(skills_dir,
+                              repo=CountingRepo(join(self.root, 'repo')),
+                              object_store=self.store_path)
+        return SkillEntry('skill-a', join(msm.skills_dir, 'skill-a'),
+                          self.url, self.sha, msm=msm)
+
+    def test_clone_uses_mirror(self):
+        skill = self.create_skill()
+        skill.install()
+        mirror = skill.object_store.mirror_path(self.url)
+        with open(join(skill.path, '.git', 'objects', 'info',
+                       'alternates')) as f:
+            assert f.read().strip() == join(mirror, 'objects')
+        assert get_remote_url(skill.path) == self.url
+        assert get_head_sha(skill.path) == self.sha
+
+    def test_shared_between_skills_dirs(self):
+        self.create_skill('skills-1').install()
+        self.create_skill('skills-2').install()
+        mirrors = [f for f in os.listdir(self.store_path)
+                   if f.endswith('.git')]
+        assert len(mirrors) == 1
+        assert mirrors[0].startswith('testuser-skill-a-')
+
+    def test_reinstall_offline(self):
+        skill = self.create_skill()
+        skill.install()
+        skill.remove()
+        move(self.repo_path, self.repo_path + '.offline')
+        skill.install()
+        assert get_head_sha(skill.path) == self.sha
+
+    def test_read_file_offline(self):
+        skill = self.create_skill()
+        skill.sha = commit(self.repo_path, {'README.md': 'Skill A'})
+        skill.install()
+        skill.remove()
+        move(self.repo_path, self.repo_path + '.offline')
+        assert skill.read_file('README.md') == 'Skill A'
+        assert skill.read_file('missing.txt') is None
+
+    def test_update_through_mirror(self):
+        skill = self.create_skill()
+        skill.install()
+        skill.sha = commit(self.repo_path, {'f': 'new'})
+        assert skill.update()
+        assert get_head_sha(skill.path) == skill.sha
+        assert exists(join(skill.path, 'f'))
@@ -0,0 +1,181 @@
+# Copyright (c) 2018 Mycroft AI, Inc.
+#
+# This file is part of Mycroft Skills Manager
+# (see https://github.com/MatthewScholefield/mycroft-light).
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+from os import makedirs
+from os.path import exists, join
+from shutil import rmtree
+from tempfile import mkdtemp
+
+from msm import SkillEntry
+from msm.exceptions import PipRequirementsException
+from msm.pip_batch import PipBatch, find_failed_skills
+from msm.skills_data import get_skill_entry
+from local_repos import CountingRepo, TempHomeTest, commit, write_files
+
+
+class FakePipBatch(PipBatch):
+    """Fails any run including a requirement named broken"""
+    def __init__(self):
+        super().__init__()
+        self.runs = []
+
+    def _run_pip_command(self, skills, constraints):
+        self.runs.append([skill.name for skill in skills])
+        for skill in skills:
+            with open(skill.requirements_file) as f:
+                if 'broken' in f.read().lower():
+                    raise PipRequirementsException(
+                        1, '', 'ERROR: No matching distribution found for '
+                               'broken-package'
+                    )
+
+
+class TestPipBatch(object):
+    def setup(self):
+        self.root = mkdtemp()
+        self.batch = FakePipBatch()
+        self.skills = {}
+        for name, requirements in [('skill-a', 'requests\n'),
+                                   ('skill-b', 'Broken_Package>=1.0\n'),
+                                   ('skill-c', 'six # comment\n'),
+                                   ('skill-d', None)]:
+            path = join(self.root, name)
+            makedirs(path)
+            if requirements:
+                write_files(path, {'requirements.txt': requirements})
+            self.skills[name] = SkillEntry(name, path)
+
+    def teardown(self):
+        rmtree(self.root)
+
+    def test_single_run(self):
+        for name in ['skill-a', 'skill-c', 'skill-d']:
+            self.batch.add(self.skills[name])
+        assert self.batch.add(self.skills['skill-a'])
+        assert not self.batch.add(self.skills['skill-d'])
+        assert self.batch.install() == {}
+        assert self.batch.runs == [['skill-a', 'skill-c']]
+
+    def test_failed_skill_installed_separately(self):
+        for skill in self.skills.values():
+            self.batch.add(skill)
+        failures = self.batch.install()
+        assert list(failures) == [self.skills['skill-b']]
+        assert self.batch.runs == [
+            ['skill-a', 'skill-b', 'skill-c'], ['skill-a', 'skill-c'],
+            ['skill-b']
+        ]
+
+    def test_find_failed_skills(self):
+        skills = [self.skills['skill-a'], self.skills['skill-b']]
+        output = 'Could not find a version that satisfies the requirement ' \
+                 'x (from -r {} (line 1))'.format(skills[1].requirements_file)
+        assert find_failed_skills(output, skills) == [skills[1]]
+        assert find_failed_skills('ERROR: Failed building wheel for '
+                                  'requests', skills) == [skills[0]]
+        assert find_failed_skills('Killed', skills) == []
+
+
+class TestApplyPipBatch(TempHomeTest):
+    def setup(self):
+        super().setup()
+        self.msm = self.create_msm(repo=CountingRepo(join(self.root, 'repo')))
+        self.batches = []
+
+    @staticmethod
+    def apply(msm, batch_class, func, skills):
+        """Run msm.apply with batch_class as its PipBatch"""
+        import msm.mycroft_skills_manager as module
+        old_batch = module.PipBatch
+        module.PipBatch = lambda *args: batch_class()
+        try:
+            return msm.apply(func, skills)
+        finally:
+            module.PipBatch = old_batch
+
+    def test_apply_installs_requirements_once(self):
+        skills = []
+        for name in ['skill-a', 'skill-b']:
+            path = join(self.root, name)
+            makedirs(path)
+            write_files(path, {'requirements.txt': name + '-package\n'})
+            skills.append(SkillEntry(name, path, msm=self.msm))
+
+        def run(skill):
+            self.batches.append(self.msm.pip_batch)
+            assert skill.run_pip(None)
+
+        assert self.apply(self.msm, FakePipBatch, run, skills) == \
+            [True, True]
+        batch = self.batches[0]
+        assert self.batches == [batch, batch]
+        assert batch.runs == [['skill-a', 'skill-b']]
+        assert self.msm.pip_batch is None
+
+    def test_installs_finish_after_batch(self):
+        self.create_catalog(self.create_skills({
+            'skill-c': {'requirements.txt': 'six\n'}
+        }))
+        msm = self.create_msm('device')
+        states = []
+
+        class CheckingPipBatch(FakePipBatch):
+            def _run_pip_command(self, skills, constraints):
+                for skill in skills:
+                    entry = get_skill_entry(skill.name, msm.skills_data)
+                    states.append((
+                        exists(join(skill.path, '__init__.py')),
+                        entry['installation'], entry['status']
+                    ))
+                super()._run_pip_command(skills, constraints)
+
+        skill = msm.find_skill('skill-c')
+        assert self.apply(msm, CheckingPipBatch, msm.install, [skill]) == \
+            [True]
+        assert states == [(False, 'installing', 'inactive')]
+        assert exists(join(skill.path, '__init__.py'))
+        entry = get_skill_entry('skill-c', msm.skills_data)
+        assert (entry['installation'], entry['status']) == \
+            ('installed', 'active')
+
+    def test_updates_reload_after_batch(self):
+        skills = self.create_skills({'skill-d': None})
+        self.create_catalog(skills)
+        url = skills['skill-d'][0]
+        msm = self.create_msm('device')
+        skill = msm.find_skill('skill-d')
+        msm.install(skill)
+        skill.sha = commit(url, {'requirements.txt': 'six\n'})
+        events = []
+
+        class RecordingPipBatch(FakePipBatch):
+            def _run_pip_command(self, skills, constraints):
+                events.append(('pip', [s.name for s in skills]))
+                super()._run_pip_command(skills, constraints)
+
+        mark_updated = SkillEntry.mark_updated
+        SkillEntry.mark_updated = lambda s: events.append(('reload', s.name))
+        try:
+            assert self.apply(msm, RecordingPipBatch, msm.update,
+                              [skill]) == [True]
+        finally:
+            SkillEntry.mark_updated = mark_updated
+        assert events == [('pip', ['skill-d']), ('reload', 'skill-d')]
@@ -0,0 +1,133 @@
+# Copyright (c) 2018 Mycroft AI, Inc.
+#
+# This file is part of Mycroft Skills Manager
+# (see https://github.com/MatthewScholefield/mycroft-light).
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+from os.path import join
+from shutil import rmtree
+from tempfile import mkdtemp
+from types import SimpleNamespace
+
+import pytest
+
+from msm import SkillEntry
+from msm.exceptions import SystemRequirementsException
+from msm.requirements import (check_requirements, hash_requirements,
+                              read_requirement_names)
+from msm.stage_limits import DEFAULT_LIMITS
+from local_repos import write_files
+
+
+class TestRequirements(object):
+    def setup(self):
+        self.root = mkdtemp()
+        self.requirements = join(self.root, 'requirements.txt')
+        self.constraints = join(self.root, 'constraints.txt')
+
+    def teardown(self):
+        rmtree(self.root)
+
+    def check(self, requirements, constraints=None):
+        write_files(self.root, {'requirements.txt': requirements})
+        if constraints is not None:
+            write_files(self.root, {'constraints.txt': constraints})
+            return check_requirements(self.requirements, self.constraints)
+        return check_requirements(self.requirements)
+
+    def test_installed(self):
+        assert self.check('# Comment\n\nGitPython>=1.0 # Comment\n') is True
+        assert self.check('fasteners\npytest\n') is True
+        assert self.check('pytest; python_version < "3"\n') is True
+
+    def test_missing(self):
+        assert self.check('pytest<1.0\n') is False
+        assert self.check('msm-missing-package\nhttp://x/y.zip\n') is False
+        assert self.check('pytest\n', 'pytest<1.0\n') is False
+
+    def test_unknown(self):
+        assert self.check('git+https://github.com/user/repo\n') is None
+        assert self.check('-e .\npytest\n') is None
+
+    def test_names(self):
+        write_files(self.root, {'requirements.txt': 'Py_Yaml>=1\n-e .\n'})
+        assert read_requirement_names(self.requirements) == {'py-yaml'}
+
+    def test_hash(self):
+        write_files(self.root, {'requirements.txt': 'pytest\n'})
+        requirements_hash = hash_requirements(self.requirements)
+        assert hash_requirements(self.requirements) == requirements_hash
+        write_files(self.root, {'constraints.txt': 'pytest\n'})
+        assert hash_requirements(self.requirements, self.constraints) != \
+            requirements_hash
+
+    def test_skill_requirements_installed(self):
+        skill = SkillEntry('skill', self.root)
+        write_files(self.root, {'requirements.txt': 'pytest\n'})
+        assert skill.get_pip_args(None) is None
+
+        write_files(self.root, {'requirements.txt': 'git+https://x/y\n'})
+        entry = {}
+        assert skill.get_pip_args(None, entry)
+        skill.record_requirements(None, entry)
+        assert skill.get_pip_args(None, entry) is None
+        write_files(self.root, {'requirements.txt': 'git+https://x/z\n'})
+        assert skill.get_pip_args(None, entry)
+
+
+class TestRequirementsSh(object):
+    def setup(self):
+        self.root = mkdtemp()
+        self.skill = SkillEntry('skill', self.root)
+        self.entry = {}
+        self.write_script('echo run >> runs\n')
+
+    def teardown(self):
+        rmtree(self.root)
+
+    def write_script(self, content):
+        write_files(self.root, {'requirements.sh': content})
+
+    def count_runs(self):
+        with open(join(self.root, 'runs')) as f:
+            return len(f.readlines())
+
+    def test_runs_once(self):
+        assert self.skill.run_requirements_sh(self.entry)
+        assert not self.skill.run_requirements_sh(self.entry)
+        assert self.count_runs() == 1
+        assert self.entry['requirements_sh_run'] > 0
+
+    def test_runs_after_change(self):
+        self.skill.run_requirements_sh(self.entry)
+        self.write_script('echo run >> runs\necho run >> runs\n')
+        assert self.skill.run_requirements_sh(self.entry)
+        assert self.count_runs() == 3
+
+    def test_force_deps(self):
+        self.skill.run_requirements_sh(self.entry)
+        self.skill.msm = SimpleNamespace(force_deps=True,
+                                         stage_limits=DEFAULT_LIMITS)
+        assert self.skill.run_requirements_sh(self.entry)
+        assert self.count_runs() == 2
+
+    def test_failure_not_recorded(self):
+        self.write_script('exit 1\n')
+        with pytest.raises(SystemRequirementsException):
+            self.skill.run_requirements_sh(self.entry)
+        assert 'requirements_sh_hash' not in self.entry
@@ -0,0 +1,107 @@
+# Copyright (c) 2018 Mycroft AI, Inc.
+#
+# This file is part of Mycroft Skills Manager
+# (see https://github.com/MatthewScholefield/mycroft-light).
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+from os.path import join
+from shutil import rmtree
+from tempfile import mkdtemp
+
+from msm import MycroftSkillsManager, SkillEntry
+from msm.scan_cache import ScanCache
+from local_repos import CountingRepo, create_skill_repo, git
+
+
+class TestScanCache(object):
+    def setup(self):
+        self.root = mkdtemp()
+        self.skills_dir = join(self.root, 'skills')
+        for name in ['skill-a.user', 'skill-c.user']:
+            folder = join(self.skills_dir, name)
+            create_skill_repo(folder)
+            git(folder, 'remote', 'add', 'origin',
+                'https://github.com/user/' + name.split('.')[0])
+        self.cache_file = join(self.root, 'scan_cache.json')
+        self.find_git_url = SkillEntry.find_git_url
+
+    def teardown(self):
+        SkillEntry.find_git_url = self.find_git_url
+        rmtree(self.root)
+
+    def create_msm(self):
+        msm = MycroftSkillsManager(skills_dir=self.skills_dir,
+                                   repo=CountingRepo(join(self.root, 'repo')),
+                                   scan_cache=self.cache_file)
+        msm.invalidate_catalog()
+        return msm
+
+    def local_skills(self):
+        return {
+            skill.name: skill.url for skill in self.create_msm().list()
+            if skill.is_local
+        }
+
+    def test_unchanged_folders_are_not_read(self):
+        expected = self.local_skills()
+        assert expected['skill-c.user'] == 'https://github.com/user/skill-c'
+
+        def fail(path):
+            raise AssertionError('Read ' + path)
+        SkillEntry.find_git_url = staticmethod(fail)
+        assert self.local_skills() == expected
+
+    def test_changed_folders_are_read(self):
+        self.local_skills()
+        git(join(self.skills_dir, 'skill-c.user'), 'remote', 'set-url',
+            'origin', 'https://github.com/other/skill-c')
+        assert self.local_skills()['skill-c.user'] == \
+            'https://github.com/other/skill-c'
+
+    def test_removed_folders_are_forgotten(self):
+        self.local_skills()
+        rmtree(join(self.skills_dir, 'skill-c.user'))
+        assert 'skill-c.user' not in self.local_skills()
+        cache = ScanCache(self.cache_file)
+        cache.load()
+        assert len(cache.folders) == 1
+
+    def test_put_while_saving(self):
+        import json
+        import msm.scan_cache as module
+        cache = ScanCache(self.cache_file)
+        cache.put('a', [1, 2], 'url-a')
+
+        class PuttingJson(object):
+            @staticmethod
+            def dump(obj, *args, **kwargs):
+                cache.put('b', [1, 2], 'url-b')
+                json.dump(obj, *args, **kwargs)
+        module.json = PuttingJson
+        try:
+            cache.save()
+        finally:
+            module.json = json
+        saved = ScanCache(self.cache_file)
+        saved.load()
+        assert len(saved.folders) == 1
+        assert cache.dirty
+        cache.save()
+        saved = ScanCache(self.cache_file)
+        saved.load()
+        assert len(saved.folders) == 2
@@ -0,0 +1,130 @@
+# Copyright (c) 2018 Mycroft AI, Inc.
+#
+# This file is part of Mycroft Skills Manager
+# (see https://github.com/MatthewScholefield/mycroft-light).
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+from os.path import join
+from random import Random
+
+from msm import SkillEntry
+from msm.exceptions import MultipleSkillMatches, SkillNotFound
+from msm.search_index import SkillSearchIndex, MIN_MATCH_SCORE
+from local_repos import CountingRepo, TempHomeTest
+
+SKILL_NAMES = [
+    'skill-weather', 'mycroft-weather', 'skill-joke', 'fallback-wolfram',
+    'skill-alarm', 'mycroft-alarm', 'skill-hello-world', 'skill-ip',
+    'mycroft-timer', 'skill-stephen-hawking', 'skill-bitcoin-price',
+    'fallback-aiml', 'skill-news', 'skill-npr-news', 'skill-volume'
+]
+QUERIES = [
+    'weather', 'mycroft weather', 'joke', 'wolfram', 'alarm', 'hello',
+    'ip', 'timer', 'hawking', 'bitcoin price', 'aiml', 'news', 'volume',
+    'skill', 'xyzzy', 'wether', 'alrm'
+]
+
+
+class TestSkillSearchIndex(object):
+    def setup(self):
+        self.skills = [
+            SkillEntry(name, name, 'https://github.com/author/' + name)
+            for name in SKILL_NAMES
+        ]
+        self.index = SkillSearchIndex(self.skills)
+
+    def test_candidates(self):
+        candidates = self.index.candidates('weather')
+        assert len(candidates) < len(self.skills)
+        assert {'skill-weather', 'mycroft-weather'} <= {
+            skill.name for skill in candidates
+        }
+
+    def test_search_matches_full_scan(self):
+        for query in QUERIES:
+            for author in [None, 'author', 'someone']:
+                expected = [
+                    skill for skill in self.skills
+                    if skill.match(query, author) >= MIN_MATCH_SCORE
+                ]
+                assert self.index.search(query, author) == expected, query
+
+    def test_close_matches_match_full_scan(self):
+        for query in QUERIES:
+            for author in [None, 'author', 'someone']:
+                scores = self.index.score(query, author, threshold=0,
+                                          close_ratio=0.7)
+                best = max(scores.values())
+                expected = [
+                    skill for skill in self.skills
+                    if skill.match(query, author) >= best * 0.7
+                ]
+                assert [
+                    skill for skill, score in scores.items()
+                    if score >= best * 0.7
+                ] == expected, query
+                assert best == max(s.match(query, author)
+                                   for s in self.skills)
+
+    def test_prunes_unlikely_skills(self):
+        assert len(self.index.score('weather')) < len(self.skills)
+
+
+class RandomCatalogRepo(CountingRepo):
+    """Skill repo serving a catalog of random skill names"""
+    def __init__(self, path, num_skills):
+        super().__init__(path)
+        words = ['music', 'weather', 'news', 'timer', 'alarm', 'joke',
+                 'one', 'zoo', 'tube', 'radio', 'light', 'home', 'us',
+                 'date', 'time', 'pandora', 'spotify', 'wiki', 'iot']
+        rand = Random(0)
+        self.names = sorted({
+            '-'.join(rand.sample(words, rand.randint(1, 3)))
+            for _ in range(num_skills)
+        })
+
+    def get_skill_data(self):
+        for i, name in enumerate(self.names):
+            yield (name, name, 'https://github.com/author{}/{}'.format(
+                i % 7, name
+            ), '{:040x}'.format(i))
+
+
+class TestFindSkill(TempHomeTest):
+    def setup(self):
+        super().setup()
+        self.msm = self.create_msm(
+            repo=RandomCatalogRepo(join(self.root, 'repo'), 800)
+        )
+
+    @staticmethod
+    def outcome(find_skill, *args, **kwargs):
+        try:
+            return find_skill(*args, **kwargs)
+        except MultipleSkillMatches as e:
+            return sorted(skill.name for skill in e.skills)
+        except SkillNotFound:
+            return None
+
+    def test_matches_full_scan(self):
+        skills = self.msm.list()
+        for query in ['us', 'e', 'ztu', 'music', 'wether', 'tim', 'zoo-one',
+                      'pandora radio', 'xyzzy']:
+            assert self.outcome(self.msm.find_skill, query) == \
+                self.outcome(self.msm.find_skill, query, skills=skills), \
+                query
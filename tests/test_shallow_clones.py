@@ -0,0 +1,90 @@
+# Copyright (c) 2018 Mycroft AI, Inc.
+#
+# This file is part of Mycroft Skills Manager
+# (see https://github.com/MatthewScholefield/mycroft-light).
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+import asyncio
+from os.path import join
+
+from msm import AsyncMycroftSkillsManager, SkillEntry
+from msm.git_reader import get_head_sha, is_shallow
+from local_repos import CountingRepo, TempHomeTest, commit, git
+
+
+class TestShallowClones(TempHomeTest):
+    def setup(self):
+        super().setup()
+        self.repo_path, sha = self.create_skills({
+            'skill-a': None
+        })['skill-a']
+        self.shas = [sha]
+        for i in range(3):
+            self.shas.append(commit(self.repo_path, {'f': str(i)}))
+        self.msm = self.create_msm(repo=CountingRepo(join(self.root, 'repo')))
+        self.msm.shallow_clones = True
+
+    def create_skill(self, sha=''):
+        return SkillEntry('skill-a', join(self.root, 'skills', 'skill-a'),
+                          'file://' + self.repo_path, sha, msm=self.msm)
+
+    def count_commits(self, skill):
+        return int(git(skill.path, 'rev-list', '--count', 'HEAD'))
+
+    def test_pinned(self):
+        skill = self.create_skill(self.shas[1])
+        skill.install()
+        assert is_shallow(skill.path)
+        assert get_head_sha(skill.path) == self.shas[1]
+        assert self.count_commits(skill) == 1
+
+        skill.sha = self.shas[3]
+        assert skill.update()
+        assert get_head_sha(skill.path) == self.shas[3]
+        assert self.count_commits(skill) == 3
+        assert is_shallow(skill.path)
+
+    def test_beta(self):
+        skill = self.create_skill()
+        skill.install()
+        assert get_head_sha(skill.path) == self.shas[3]
+        assert self.count_commits(skill) == 1
+
+        new_sha = commit(self.repo_path, {'f': 'new'})
+        assert skill.update()
+        assert get_head_sha(skill.path) == new_sha
+
+    def test_full_clone_by_default(self):
+        self.msm.shallow_clones = False
+        skill = self.create_skill(self.shas[1])
+        skill.install()
+        assert not is_shallow(skill.path)
+        assert get_head_sha(skill.path) == self.shas[1]
+
+    def test_async(self):
+        skill = self.create_skill(self.shas[1])
+        loop = asyncio.new_event_loop()
+        try:
+            amsm = AsyncMycroftSkillsManager(self.msm)
+            loop.run_until_complete(amsm.install(skill))
+            assert self.count_commits(skill) == 1
+            skill.sha = self.shas[2]
+            assert loop.run_until_complete(amsm.update(skill))
+        finally:
+            loop.close()
+        assert get_head_sha(skill.path) == self.shas[2]
@@ -0,0 +1,62 @@
+# Copyright (c) 2018 Mycroft AI, Inc.
+#
+# This file is part of Mycroft Skills Manager
+# (see https://github.com/MatthewScholefield/mycroft-light).
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+from os import makedirs
+from os.path import join
+
+from local_repos import CountingRepo, TempHomeTest
+
+
+class TestSkillCatalog(TempHomeTest):
+    def setup(self):
+        super().setup()
+        self.repo = CountingRepo(join(self.root, 'repo'))
+        self.msm = self.create_msm(repo=self.repo)
+
+    def test_reused_between_queries(self):
+        catalog = self.msm.catalog
+        updates = self.repo.updates
+        self.msm.list()
+        self.msm.list_defaults()
+        self.msm.find_skill('skill-a')
+        assert self.msm.catalog is catalog
+        assert self.repo.updates == updates
+
+    def test_invalidate(self):
+        updates = self.repo.updates
+        self.msm.invalidate_catalog()
+        self.msm.list()
+        assert self.repo.updates == updates + 1
+
+    def test_ttl(self):
+        catalog = self.msm.catalog
+        self.msm.catalog_ttl = 0
+        assert self.msm.catalog is catalog
+        self.repo.sha = 'd' * 40
+        assert self.msm.catalog is not catalog
+
+    def test_skills_dir_change(self):
+        catalog = self.msm.catalog
+        skill_dir = join(self.msm.skills_dir, 'skill-a.user')
+        makedirs(skill_dir)
+        open(join(skill_dir, '__init__.py'), 'w').close()
+        assert self.msm.catalog is not catalog
+        assert self.msm.find_skill('skill-a').is_local
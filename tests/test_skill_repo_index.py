@@ -0,0 +1,67 @@
+# Copyright (c) 2018 Mycroft AI, Inc.
+#
+# This file is part of Mycroft Skills Manager
+# (see https://github.com/MatthewScholefield/mycroft-light).
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+from os.path import join, exists
+
+from msm import SkillRepo
+from local_repos import TempHomeTest, commit
+
+
+class TestSkillRepoIndex(TempHomeTest):
+    def setup(self):
+        super().setup()
+        skills = self.create_skills({'skill-a': None})
+        self.skill_url, self.skill_sha = skills['skill-a']
+        self.create_catalog(skills, {'default': ['skill-a']})
+        self.catalog_path = join(self.root, 'catalog')
+        self.repo = SkillRepo(join(self.root, 'repo-instance'),
+                              self.catalog_path, 'test-repo')
+        self.repo.update()
+
+    def test_get_index(self):
+        index = self.repo.get_index()
+        assert index['sha'] == self.repo.get_sha()
+        assert index['skills'] == [[
+            'skill-a', 'skill-a', self.skill_url, self.skill_sha,
+            'testuser', 'testuser:skill-a'
+        ]]
+        assert exists(self.repo.index_file)
+
+    def test_index_reused_from_disk(self):
+        self.repo.get_index()
+        fresh_repo = SkillRepo(self.repo.path, self.repo.url,
+                               self.repo.branch)
+        fresh_repo.get_shas = None  # Must not need git to load the index
+        assert list(fresh_repo.get_skill_data()) == [
+            ('skill-a', 'skill-a', self.skill_url, self.skill_sha)
+        ]
+        assert dict(fresh_repo.get_default_skill_names()) == {
+            'default': ['skill-a']
+        }
+
+    def test_index_rebuilt_on_new_commit(self):
+        old_sha = self.repo.get_index()['sha']
+        commit(self.catalog_path, {'DEFAULT-SKILLS': ''})
+        self.repo.refresh_ttl = 0
+        self.repo.update()
+        index = self.repo.get_index()
+        assert index['sha'] != old_sha
+        assert index['defaults'] == [['default', []]]
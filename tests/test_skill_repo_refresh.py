@@ -0,0 +1,63 @@
+# Copyright (c) 2018 Mycroft AI, Inc.
+#
+# This file is part of Mycroft Skills Manager
+# (see https://github.com/MatthewScholefield/mycroft-light).
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+from os.path import join, exists
+from shutil import move
+
+from msm import SkillRepo
+from local_repos import TempHomeTest, commit
+
+
+class TestSkillRepoRefresh(TempHomeTest):
+    def setup(self):
+        super().setup()
+        self.create_catalog({})
+        self.catalog_path = join(self.root, 'catalog')
+        self.repo = SkillRepo(join(self.root, 'repo-instance'),
+                              self.catalog_path, 'test-repo')
+        self.repo.update()
+        self.sha = self.repo.get_sha()
+
+    def git_file(self, name):
+        return join(self.repo.path, '.git', name)
+
+    def test_skipped_within_ttl(self):
+        commit(self.catalog_path, {'DEFAULT-SKILLS': ''})
+        self.repo.update()
+        assert self.repo.get_sha() == self.sha
+
+    def test_fetch_only_when_remote_changed(self):
+        self.repo.refresh_ttl = 0
+        self.repo.update()
+        assert not exists(self.git_file('FETCH_HEAD'))
+        assert not exists(self.git_file('ORIG_HEAD'))
+
+        new_sha = commit(self.catalog_path, {'DEFAULT-SKILLS': ''})
+        self.repo.update()
+        assert self.repo.get_sha() == new_sha
+        assert exists(join(self.repo.path, 'DEFAULT-SKILLS'))
+
+    def test_unreachable_remote_keeps_repo(self):
+        self.repo.refresh_ttl = 0
+        move(self.catalog_path, self.catalog_path + '.offline')
+        self.repo.update()
+        assert self.repo.get_sha() == self.sha
+        assert exists(join(self.repo.path, '.gitmodules'))
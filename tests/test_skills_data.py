@@ -0,0 +1,144 @@
+# Copyright (c) 2018 Mycroft AI, Inc.
+#
+# This file is part of Mycroft Skills Manager
+# (see https://github.com/MatthewScholefield/mycroft-light).
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+import json
+import os
+from os import makedirs
+from os.path import join
+
+from msm.skills_data import (SkillsDataStore, build_skill_entry,
+                             get_skill_entry, load_skills_data,
+                             merge_skills_data, write_skills_data)
+from local_repos import CountingRepo, TempHomeTest
+
+
+class TestSkillsDataStore(object):
+    def setup(self):
+        self.store = SkillsDataStore({
+            'version': 1, 'blacklist': [],
+            'skills': [build_skill_entry('skill-a', 'default', False),
+                       build_skill_entry('skill-b', 'cli', True)]
+        })
+
+    def test_get_entry(self):
+        assert self.store.get_entry('skill-b')['origin'] == 'cli'
+        assert self.store.get_entry('skill-c') is None
+        assert get_skill_entry('skill-a', self.store) is \
+            self.store['skills'][0]
+
+    def test_add_and_remove(self):
+        self.store.add_entry(build_skill_entry('skill-c', 'cli', False))
+        assert self.store.names() == {'skill-a', 'skill-b', 'skill-c'}
+        self.store.remove_entry('skill-a')
+        assert self.store.get_entry('skill-a') is None
+        assert [e['name'] for e in self.store['skills']] == [
+            'skill-b', 'skill-c'
+        ]
+
+    def test_follows_direct_changes(self):
+        self.store['skills'].append(build_skill_entry('skill-d', '', False))
+        assert self.store.get_entry('skill-d')
+        self.store['skills'] = []
+        assert self.store.get_entry('skill-a') is None
+
+    def test_first_entry_wins(self):
+        self.store.add_entry(build_skill_entry('skill-a', 'cli', False))
+        assert self.store.get_entry('skill-a')['origin'] == 'default'
+
+    def test_merge(self):
+        saved = SkillsDataStore(json.loads(json.dumps(self.store)))
+        saved.get_entry('skill-a')['updated'] = 5
+        saved.add_entry(build_skill_entry('skill-c', 'cli', False))
+
+        self.store.get_entry('skill-b')['status'] = 'error'
+        self.store.remove_entry('skill-a')
+        self.store['skills'].append(build_skill_entry('skill-d', '', False))
+        merged = merge_skills_data(saved, self.store)
+        assert [e['name'] for e in merged['skills']] == [
+            'skill-b', 'skill-c', 'skill-d'
+        ]
+        assert merged.get_entry('skill-b')['status'] == 'error'
+
+    def test_merge_upgraded(self):
+        assert merge_skills_data({'skill-a': {}}, self.store) is self.store
+
+    def test_merge_replaced_list(self):
+        self.store['skills'] = []
+        assert merge_skills_data({'version': 1}, self.store) is self.store
+
+    def test_serializes_like_dict(self):
+        assert json.loads(json.dumps(self.store)) == dict(self.store)
+
+    def test_dirty_tracking(self):
+        assert not self.store.dirty
+        self.store.get_entry('skill-a')['beta'] = False
+        assert not self.store.dirty
+        self.store.get_entry('skill-a')['updated'] = 10
+        assert self.store.dirty
+        assert self.store.changes == {'skill-a': {'updated'}}
+        self.store.mark_clean()
+        self.store.remove_entry('skill-b')
+        assert self.store.dirty
+        assert self.store.removed == {'skill-b'}
+        self.store.mark_clean()
+        self.store['skills'].append(build_skill_entry('skill-c', '', False))
+        assert self.store.dirty
+
+
+class TestWriteSkillsData(TempHomeTest):
+    def setup(self):
+        super().setup()
+        self.skills_file = join(self.root, '.mycroft', 'skills.json')
+
+    def test_write_and_load(self):
+        store = SkillsDataStore({'version': 1, 'skills': []})
+        store.add_entry(build_skill_entry('skill-a', 'cli', False))
+        write_skills_data(store)
+        assert not store.dirty
+        assert load_skills_data() == store
+        assert os.listdir(join(self.root, '.mycroft')) == ['skills.json']
+
+    def test_compact(self):
+        write_skills_data({'version': 1, 'skills': []}, compact=True)
+        with open(self.skills_file) as f:
+            assert f.read() == '{"version":1,"skills":[]}'
+
+    def test_keeps_old_file_on_failure(self):
+        write_skills_data({'version': 1})
+        try:
+            write_skills_data({'version': object()})
+        except TypeError:
+            pass
+        assert load_skills_data() == {'version': 1}
+        assert os.listdir(join(self.root, '.mycroft')) == ['skills.json']
+
+
+class TestUpgradeSkillsData(TempHomeTest):
+    def test_writes_only_upgraded_data(self):
+        makedirs(join(self.root, '.mycroft'))
+        with open(join(self.root, '.mycroft', 'skills.json'), 'w') as f:
+            json.dump({'skill-a': {'origin': 'cli', 'installed': 5}}, f)
+        msm = self.create_msm(repo=CountingRepo(join(self.root, 'repo')))
+        assert msm.skills_data['version'] == 1
+        msm.write_skills_data()
+        assert load_skills_data() == {
+            'version': 1, 'blacklist': [], 'skills': []
+        }
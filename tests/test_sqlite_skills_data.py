@@ -0,0 +1,78 @@
+# Copyright (c) 2018 Mycroft AI, Inc.
+#
+# This file is part of Mycroft Skills Manager
+# (see https://github.com/MatthewScholefield/mycroft-light).
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+import json
+import os
+from os.path import join
+
+from msm.skills_data import (BACKEND_ENV, build_skill_entry,
+                             get_skill_entry, load_skills_data,
+                             write_skills_data)
+from msm.sqlite_skills_data import SqliteSkillsData
+from local_repos import TempHomeTest
+
+
+class TestSqliteSkillsData(TempHomeTest):
+    def setup(self):
+        super().setup()
+        os.environ[BACKEND_ENV] = 'sqlite'
+        self.data = {'version': 1, 'blacklist': [], 'skills': [
+            build_skill_entry('skill-a', 'default', False),
+            build_skill_entry('skill-b', 'cli', True)
+        ]}
+
+    def teardown(self):
+        del os.environ[BACKEND_ENV]
+        super().teardown()
+
+    def test_write_and_load(self):
+        write_skills_data(self.data)
+        assert load_skills_data() == self.data
+        assert get_skill_entry('skill-b')['origin'] == 'cli'
+        assert get_skill_entry('skill-c') is None
+        assert [e['name'] for e in
+                SqliteSkillsData().get_entries_by_origin('default')] == \
+            ['skill-a']
+
+    def test_exports_json(self):
+        write_skills_data(self.data)
+        with open(join(self.root, '.mycroft', 'skills.json')) as f:
+            assert json.load(f) == self.data
+
+    def test_imports_json(self):
+        write_skills_data(self.data)
+        self.data['skills'].pop()
+        os.makedirs(join(self.root, '.mycroft'), exist_ok=True)
+        with open(join(self.root, '.mycroft', 'skills.json'), 'w') as f:
+            json.dump(self.data, f)
+        os.utime(join(self.root, '.mycroft', 'skills.json'), (1, 1))
+        assert load_skills_data() == self.data
+
+    def test_readers_do_not_block_on_writer(self):
+        write_skills_data(self.data)
+        writer = SqliteSkillsData().connect()
+        try:
+            writer.execute('BEGIN IMMEDIATE')
+            writer.execute('DELETE FROM skills')
+            assert load_skills_data() == self.data
+        finally:
+            writer.execute('ROLLBACK')
+            writer.close()
@@ -0,0 +1,62 @@
+# Copyright (c) 2018 Mycroft AI, Inc.
+#
+# This file is part of Mycroft Skills Manager
+# (see https://github.com/MatthewScholefield/mycroft-light).
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+from threading import Lock, Thread
+from time import sleep
+
+import pytest
+
+from msm.stage_limits import NETWORK, PIP, StageLimits, default_limits
+
+
+class TestStageLimits(object):
+    def test_defaults(self):
+        limits = default_limits(4)
+        assert limits[NETWORK] == 8
+        assert limits[PIP] == 1
+
+    def test_overrides(self):
+        limits = StageLimits(network=2, git=3, pip=1, shell=1)
+        assert limits.workers == 7
+        with pytest.raises(ValueError):
+            StageLimits(download=2)
+
+    def test_limits_concurrency(self):
+        limits = StageLimits(network=2)
+        lock = Lock()
+        active = []
+        peak = [0]
+
+        def run():
+            with limits.stage(NETWORK):
+                with lock:
+                    active.append(1)
+                    peak[0] = max(peak[0], len(active))
+                sleep(0.02)
+                with lock:
+                    active.pop()
+
+        threads = [Thread(target=run) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert peak[0] == 2
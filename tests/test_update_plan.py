@@ -0,0 +1,61 @@
+# Copyright (c) 2018 Mycroft AI, Inc.
+#
+# This file is part of Mycroft Skills Manager
+# (see https://github.com/MatthewScholefield/mycroft-light).
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+from msm import SkillEntry
+from msm.git_reader import get_head_sha
+from local_repos import TempHomeTest, commit, git
+
+
+class TestUpdatePlan(TempHomeTest):
+    def setup(self):
+        super().setup()
+        skills = self.create_skills({'skill-a': None, 'skill-b': None})
+        for name, (url, sha) in skills.items():
+            skills[name] = (url, commit(url, {'f': name}))
+        self.shas = {name: sha for name, (url, sha) in skills.items()}
+        self.create_catalog(skills)
+        self.msm = self.create_msm()
+        for name in skills:
+            self.msm.install(name)
+        self.update = SkillEntry.update
+
+    def teardown(self):
+        SkillEntry.update = self.update
+        super().teardown()
+
+    def test_current_skills_are_not_fetched(self):
+        plan = self.msm.plan_updates()
+        assert sorted(s.name for s in plan.current) == ['skill-a', 'skill-b']
+        assert plan.outdated == []
+
+        def fail(skill, entry=None):
+            raise AssertionError('Updated ' + skill.name)
+        SkillEntry.update = fail
+        assert self.msm.update_all() == [True, True]
+
+    def test_outdated_skill_is_updated(self):
+        skill = self.msm.find_skill('skill-b')
+        git(skill.path, 'reset', '-q', '--hard', 'HEAD~1')
+        plan = self.msm.plan_updates()
+        assert [s.name for s in plan.outdated] == ['skill-b']
+        assert [s.name for s in plan.current] == ['skill-a']
+        self.msm.update_all()
+        assert get_head_sha(skill.path) == self.shas['skill-b']
@@ -0,0 +1,79 @@
+# Copyright (c) 2018 Mycroft AI, Inc.
+#
+# This file is part of Mycroft Skills Manager
+# (see https://github.com/MatthewScholefield/mycroft-light).
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+import os
+import sys
+from os.path import join, exists
+from shutil import rmtree
+from tempfile import mkdtemp
+
+from msm import SkillEntry
+from msm.skill_entry import build_pip_args, call_pip
+from msm.wheelhouse import Wheelhouse
+from local_repos import create_skill_repo, create_wheel
+
+
+class TestWheelhouse(object):
+    def setup(self):
+        self.root = mkdtemp()
+        self.packages = join(self.root, 'packages')
+        create_wheel(self.packages, 'msm-test-pkg')
+        self.wheelhouse = Wheelhouse(join(self.root, 'wheelhouse'))
+        self.env = dict(os.environ)
+        os.environ.update(PIP_NO_INDEX='1', PIP_FIND_LINKS=self.packages)
+
+    def teardown(self):
+        os.environ.clear()
+        os.environ.update(self.env)
+        rmtree(self.root)
+
+    def create_skill(self, name, requirements):
+        url = join(self.root, 'testuser', name)
+        sha = create_skill_repo(url, {'requirements.txt': requirements})
+        return SkillEntry(name, join(self.root, 'skills', name), url, sha)
+
+    def test_build(self):
+        assert not self.wheelhouse.is_available()
+        skills = [self.create_skill('skill-a', 'msm-test-pkg\n')]
+        assert self.wheelhouse.build(skills) == {}
+        assert exists(join(self.wheelhouse.path,
+                           'msm_test_pkg-1.0-py3-none-any.whl'))
+        assert exists(join(self.wheelhouse.requirements_dir, 'skill-a.txt'))
+        assert self.wheelhouse.is_available()
+
+    def test_build_failure(self):
+        skills = [self.create_skill('skill-a', 'msm-test-pkg\n'),
+                  self.create_skill('skill-b', 'msm-missing-pkg\n')]
+        assert list(self.wheelhouse.build(skills)) == ['skill-b']
+        assert self.wheelhouse.is_available()
+
+    def test_pip_args(self):
+        assert '--no-index' not in build_pip_args(['r.txt'], None,
+                                                  self.wheelhouse)
+        create_wheel(self.wheelhouse.path, 'msm-test-pkg')
+        pip_args = build_pip_args(['r.txt'], None, self.wheelhouse)
+        assert pip_args[-3:] == ['--find-links', self.wheelhouse.path,
+                                 '--no-index']
+
+    def test_falls_back_to_index(self):
+        command = [sys.executable, '-c',
+                   'import sys; sys.exit("--no-index" in sys.argv)']
+        assert call_pip(command + ['--no-index'])[0] == 0